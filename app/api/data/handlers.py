@@ -2,19 +2,25 @@ import datetime
 from fastapi import Request, HTTPException, Query
 from fastapi.responses import JSONResponse
 from typing import Optional
-from app.responses import PrettyJSONResponse
+from app.responses import PrettyJSONResponse, render_pretty_json, compute_etag, etag_response
+from app.cache import get_cached_response, set_cached_response, CACHE_KEY_LATEST_RESPONSE
 from ..shared.url_helpers import build_base_url, create_device_links, safe_int_param, create_pagination_links
 from .cache_manager import get_cached_latest_data, get_cached_device_data
 from .transformers import process_and_link_data, safe_transform_device_data
 from app.db import get_raw_latest_data_for_all_devices, get_timestamped_history
 from app.utils import transform_device_data
 
+RESPONSE_CACHE_TTL = 5
+
 async def handle_latest_data(request: Request):
     base_url = build_base_url(request)
+    cached_response = await get_cached_response(CACHE_KEY_LATEST_RESPONSE, base_url)
+    if cached_response:
+        return etag_response(request, *cached_response)
     try:
         raw_data = await get_cached_latest_data()
         processed_data = await process_and_link_data(raw_data, base_url)
-        return {
+        content = {
             "meta": {
                 "server_time": "2025-07-06T18:45:00Z",
                 "total_devices": len(processed_data),
@@ -29,12 +35,17 @@ async def handle_latest_data(request: Request):
     except Exception as e:
         print(f"Latest data endpoint error: {e}")
         return {"error": "data_retrieval_failed", "message": "Unable to retrieve latest device data", "links": {"home": f"{base_url}/"}}
+    return await _cache_rendered_response(request, CACHE_KEY_LATEST_RESPONSE, base_url, content)
 
 async def handle_device_data(device_id: str, request: Request):
     if not device_id or not device_id.strip():
         raise HTTPException(status_code=400, detail="Invalid device ID")
     device_id = device_id.strip()[:100]
     base_url = build_base_url(request)
+    response_key = f"{CACHE_KEY_LATEST_RESPONSE}_{device_id}"
+    cached_response = await get_cached_response(response_key, base_url)
+    if cached_response:
+        return etag_response(request, *cached_response)
     try:
         raw_payload = await get_cached_device_data(device_id)
         if raw_payload is None:
@@ -46,11 +57,16 @@ async def handle_device_data(device_id: str, request: Request):
             "links": create_device_links(base_url, device_id),
             **transformed_payload
         }
-        return response_payload
-        
     except Exception as e:
         print(f"Device data endpoint error for {device_id}: {e}")
         raise HTTPException(status_code=500, detail="Data retrieval failed")
+    return await _cache_rendered_response(request, response_key, base_url, response_payload)
+
+async def _cache_rendered_response(request: Request, cache_key: str, variant: str, content: dict):
+    body = render_pretty_json(content)
+    etag = compute_etag(body)
+    await set_cached_response(cache_key, variant, etag, body, ttl=RESPONSE_CACHE_TTL)
+    return etag_response(request, etag, body)
 
 async def handle_device_not_found(device_id: str, base_url: str):
     try:
@@ -1,6 +1,11 @@
+import os
 from fastapi import Request
 
+PUBLIC_BASE_URL = os.getenv("HOARDER_PUBLIC_BASE_URL", "").rstrip("/")
+
 def build_base_url(request: Request) -> str:
+    if PUBLIC_BASE_URL:
+        return PUBLIC_BASE_URL
     return f"{request.url.scheme}://{request.url.netloc}"
 
 def safe_int_param(value: str, default: int, min_val: int, max_val: int) -> int:
@@ -8,12 +8,12 @@ from app.processing.validation.validators import validate_device_data
 from app.tasks import PriorityQueueManager, TaskPriority, AdaptiveTimeoutManager
 from .client_info import extract_client_info
 from .timestamp_parser import parse_device_timestamp
-from .processing import critical_data_storage, weather_enrichment_and_state_update
+from .processing import critical_data_storage, state_update_and_weather_scheduling
 
 priority_queue_manager = PriorityQueueManager()
 timeout_manager = AdaptiveTimeoutManager()
 
-async def handle_telemetry_request(request: Request):
+async def admit_telemetry() -> str:
     await priority_queue_manager.init_workers()
     
     queue_pressure = priority_queue_manager.get_queue_pressure()
@@ -23,16 +23,14 @@ async def handle_telemetry_request(request: Request):
         critical_queue = priority_queue_manager.task_queues[TaskPriority.CRITICAL]
         if critical_queue.full():
             raise HTTPException(status_code=503, detail="Server critically overloaded")
-    
-    raw = await request.body()
-    
+    return degradation_mode
+
+async def decode_telemetry(raw: bytes, compression_type=None) -> dict:
     if len(raw) > 5 * 1024 * 1024:
         raise HTTPException(status_code=413, detail="Payload too large (max 5MB)")
     
     if len(raw) == 0:
         raise HTTPException(status_code=400, detail="Empty payload")
-    
-    compression_type = request.headers.get("x-compression-type")
 
     try:
         if compression_type == "maximum":
@@ -44,12 +42,13 @@ async def handle_telemetry_request(request: Request):
             raise HTTPException(status_code=400, detail=f"Decode error: {data.get('error', 'Unknown')}")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid data format: {str(e)}")
+    return data
 
+async def enqueue_telemetry(data: dict, client_info: dict, degradation_mode: str) -> dict:
     validation_result = validate_device_data(data)
     if not validation_result['is_valid']:
         raise HTTPException(status_code=400, detail=f"Validation failed: {validation_result['errors']}")
 
-    client_info = extract_client_info(request)
     data.update(client_info)
 
     data_timestamp = parse_device_timestamp(data)
@@ -70,25 +69,40 @@ async def handle_telemetry_request(request: Request):
 
     state_task_id = f"state_{device_id}_{int(datetime.datetime.now().timestamp() * 1000)}"
     state_enqueued = await priority_queue_manager.enqueue_task(
-        weather_enrichment_and_state_update(data.copy()),
+        state_update_and_weather_scheduling(data.copy()),
         state_priority,
         state_task_id
     )
 
     return {
-        "status": "received",
-        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "device_id": device_id,
+        "data_timestamp": data_timestamp,
         "validation_warnings": validation_result.get('warnings', []),
+        "critical_task_enqueued": critical_enqueued,
+        "state_task_enqueued": state_enqueued
+    }
+
+async def handle_telemetry_request(request: Request):
+    degradation_mode = await admit_telemetry()
+    
+    raw = await request.body()
+    data = await decode_telemetry(raw, request.headers.get("x-compression-type"))
+    result = await enqueue_telemetry(data, extract_client_info(request), degradation_mode)
+
+    return {
+        "status": "received",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "device_id": result["device_id"],
+        "validation_warnings": result["validation_warnings"],
         "source_ip": data.get("source_ip"),
         "user_agent_detected": bool(data.get("user_agent")),
         "data_size_bytes": len(raw),
         "content_size_bytes": data.get("content_size_bytes"),
         "has_coordinates": bool(data.get("lat") and data.get("lon")),
-        "data_timestamp": data_timestamp.isoformat(),
+        "data_timestamp": result["data_timestamp"].isoformat(),
         "processing": {
             "degradation_mode": degradation_mode,
-            "critical_task_enqueued": critical_enqueued,
-            "state_task_enqueued": state_enqueued
+            "critical_task_enqueued": result["critical_task_enqueued"],
+            "state_task_enqueued": result["state_task_enqueued"]
         }
     }
@@ -1,9 +1,8 @@
 import json
 import datetime
-import asyncio
 import psutil
 from typing import AsyncGenerator, Optional
-from app.weather import enrich_with_weather_data
+from app.weather.enrichment import weather_enrichment_scheduler
 from app.db import save_timestamped_data, upsert_latest_state
 from .memory_manager import BatchMemoryManager
 
@@ -107,11 +106,5 @@ class StreamProcessor:
 
     async def _process_batch_item_optimized(self, item: dict, data_timestamp: datetime.datetime):
         await save_timestamped_data(item, data_timestamp, is_offline=True, batch_id=item.get('batch_id'))
-        if item.get('lat') and item.get('lon'):
-            try:
-                enriched = await asyncio.wait_for(enrich_with_weather_data(item), timeout=3)
-                await upsert_latest_state(enriched)
-            except (asyncio.TimeoutError, Exception):
-                await upsert_latest_state(item)
-        else:
-            await upsert_latest_state(item)
+        await upsert_latest_state(item)
+        weather_enrichment_scheduler.schedule(item)
@@ -3,88 +3,498 @@ import orjson
 import datetime
 import asyncio
 import time
-from typing import Set, List, Optional, Dict
+import uuid
+from collections import OrderedDict
+from typing import Set, List, Optional, Dict, Callable, Awaitable, Any, Tuple
+from app.api.shared.url_helpers import PUBLIC_BASE_URL
+from app.caching import LocalTTLCache, SingleFlight, CacheBackend, CacheScript, RedisCacheBackend, EmbeddedCacheBackend, CacheMetrics
 
 CACHE_KEY_LATEST_DATA = "latest_data"
-redis_client = None
-_invalidation_queue = asyncio.Queue(maxsize=1000)
+CACHE_KEY_LATEST_RESPONSE = "response_latest_data"
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+REDIS_URL = "redis://localhost"
+LOCAL_CACHE_TTL = 5
+MAX_RESPONSE_VARIANTS = 4
+RESPONSE_VARIANT_IDLE_SECONDS = 60
+BACKEND_PROBE_INTERVAL = 15
+BACKEND_ERROR_THRESHOLD = 3
+redis_backend: Optional[RedisCacheBackend] = None
+embedded_backend = EmbeddedCacheBackend()
+cache_backend: CacheBackend = embedded_backend
+INVALIDATION_QUEUE_SIZE = 1000
+INVALIDATION_BATCH_SIZE = 500
+INVALIDATION_WINDOW_SECONDS = 0.05
+INVALIDATION_RETRY_SECONDS = 1.0
+_invalidation_queue = asyncio.Queue(maxsize=INVALIDATION_QUEUE_SIZE)
+_pending_keys: Set[str] = set()
+_pending_families: Set[str] = set()
+_invalidation_stats = {
+    'enqueued': 0, 'batches': 0, 'keys_unlinked': 0, 'deduplicated': 0, 'overflow_collapsed': 0,
+    'family_flushes': 0, 'retries': 0, 'last_lag_ms': 0.0, 'max_lag_ms': 0.0
+}
 _invalidation_worker_task = None
+_invalidation_listener_task = None
+_backend_monitor_task = None
+_backend_probe_event = asyncio.Event()
+_backend_stats = {'switches': 0, 'consecutive_errors': 0, 'last_switch': None}
+_instance_id = uuid.uuid4().hex
+_local_cache = LocalTTLCache()
+_single_flight = SingleFlight()
+_tier_stats = {'local_hits': 0, 'local_misses': 0, 'redis_hits': 0, 'redis_misses': 0, 'redis_errors': 0}
+_response_variants: "OrderedDict[str, float]" = OrderedDict()
+_response_variant_stats = {'rejected': 0, 'expired': 0}
+_cache_metrics = CacheMetrics()
+_local_cache.on_evict = _cache_metrics.record_eviction
+embedded_backend.on_evict = _cache_metrics.record_eviction
+
+def get_cache_backend() -> CacheBackend:
+    return cache_backend
 
 async def init_redis_pool():
-    global redis_client, _invalidation_worker_task
+    global redis_backend, _invalidation_worker_task, _invalidation_listener_task, _backend_monitor_task
+    redis_backend = RedisCacheBackend(redis.from_url(
+        REDIS_URL, decode_responses=True, socket_timeout=2, health_check_interval=30
+    ))
     try:
-        redis_client = redis.from_url(
-            "redis://localhost", decode_responses=True, socket_timeout=2, health_check_interval=30
-        )
-        await redis_client.ping()
-        if not _invalidation_worker_task:
-            _invalidation_worker_task = asyncio.create_task(_invalidation_worker())
+        await asyncio.wait_for(redis_backend.ping(), timeout=2)
+        _activate_backend(redis_backend)
         print(f"[{datetime.datetime.now()}] Redis connection initialized.")
     except Exception as e:
-        redis_client = None
-        print(f"[{datetime.datetime.now()}] Redis unavailable: {e}")
+        _activate_backend(embedded_backend)
+        print(f"[{datetime.datetime.now()}] Redis unavailable, using embedded cache backend: {e}")
+
+    if not _invalidation_worker_task:
+        _invalidation_worker_task = asyncio.create_task(_invalidation_worker())
+    if not _invalidation_listener_task:
+        _invalidation_listener_task = asyncio.create_task(_invalidation_listener())
+    if not _backend_monitor_task:
+        _backend_monitor_task = asyncio.create_task(_backend_monitor())
+
+def _activate_backend(backend: CacheBackend):
+    global cache_backend
+    if backend is cache_backend:
+        return
+    previous, cache_backend = cache_backend, backend
+    _local_cache.clear()
+    if backend is redis_backend:
+        embedded_backend.clear()
+    _backend_stats['switches'] += 1
+    _backend_stats['consecutive_errors'] = 0
+    _backend_stats['last_switch'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    print(f"[{datetime.datetime.now()}] Cache backend switched: {previous.name} -> {backend.name}")
+
+async def _backend_monitor():
+    while True:
+        try:
+            await asyncio.wait_for(_backend_probe_event.wait(), timeout=BACKEND_PROBE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _backend_probe_event.clear()
+        if not redis_backend:
+            continue
+        try:
+            healthy = await asyncio.wait_for(redis_backend.ping(), timeout=2)
+        except Exception:
+            healthy = False
+        _activate_backend(redis_backend if healthy else embedded_backend)
+
+def _record_backend_result(success: bool):
+    if success:
+        _backend_stats['consecutive_errors'] = 0
+        return
+    _tier_stats['redis_errors'] += 1
+    _backend_stats['consecutive_errors'] += 1
+    if _backend_stats['consecutive_errors'] >= BACKEND_ERROR_THRESHOLD:
+        _backend_probe_event.set()
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
 
 async def get_cached_data(key: str):
-    if not redis_client: return None
+    start = time.perf_counter()
+    found, serialized = _local_cache.get(key)
+    if found:
+        _tier_stats['local_hits'] += 1
+        _cache_metrics.record_get(key, 'local_hits', _elapsed_ms(start))
+        return orjson.loads(serialized)
+    _tier_stats['local_misses'] += 1
+
+    backend = cache_backend
+    generation = _local_cache.generation
     try:
-        cached = await asyncio.wait_for(redis_client.get(key), timeout=1)
-        return orjson.loads(cached) if cached else None
-    except Exception: return None
+        cached, ttl = await asyncio.wait_for(backend.get_with_ttl(key), timeout=1)
+        _record_backend_result(True)
+        if not cached:
+            _tier_stats['redis_misses'] += 1
+            _cache_metrics.record_get(key, 'misses', _elapsed_ms(start))
+            return None
+        _tier_stats['redis_hits'] += 1
+        _cache_metrics.record_get(key, 'backend_hits', _elapsed_ms(start), len(cached))
+        if backend.is_shared:
+            _local_cache.set(key, cached, len(cached), min(LOCAL_CACHE_TTL, ttl or LOCAL_CACHE_TTL), generation)
+        return orjson.loads(cached)
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+        return None
 
 async def set_cached_data(key: str, data: any, ttl: int = 60):
-    if not redis_client: return
+    backend = cache_backend
+    start = time.perf_counter()
+    try:
+        serialized = orjson.dumps(data)
+        await asyncio.wait_for(backend.set(key, serialized, ttl), timeout=1)
+        _record_backend_result(True)
+        _cache_metrics.record_set(key, _elapsed_ms(start), len(serialized))
+        if backend.is_shared:
+            _local_cache.set(key, serialized, len(serialized), min(ttl, LOCAL_CACHE_TTL))
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+
+def _admit_response_variant(variant: str) -> bool:
+    if PUBLIC_BASE_URL:
+        return variant == PUBLIC_BASE_URL
+    now = time.monotonic()
+    if variant in _response_variants:
+        _response_variants[variant] = now
+        _response_variants.move_to_end(variant)
+        return True
+    while _response_variants and now - next(iter(_response_variants.values())) > RESPONSE_VARIANT_IDLE_SECONDS:
+        _response_variants.popitem(last=False)
+        _response_variant_stats['expired'] += 1
+    if len(_response_variants) >= MAX_RESPONSE_VARIANTS:
+        _response_variant_stats['rejected'] += 1
+        return False
+    _response_variants[variant] = now
+    return True
+
+async def get_cached_response(key: str, variant: str) -> Optional[Tuple[str, bytes]]:
+    if not _admit_response_variant(variant):
+        return None
+    start = time.perf_counter()
+    found, variants = _local_cache.get(key)
+    if found and variant in variants:
+        _tier_stats['local_hits'] += 1
+        _cache_metrics.record_get(key, 'local_hits', _elapsed_ms(start))
+        return variants[variant]
+    _tier_stats['local_misses'] += 1
+
+    backend = cache_backend
+    generation = _local_cache.generation
+    try:
+        cached, ttl = await asyncio.wait_for(backend.hget_with_ttl(key, variant), timeout=1)
+        _record_backend_result(True)
+        if not cached:
+            _tier_stats['redis_misses'] += 1
+            _cache_metrics.record_get(key, 'misses', _elapsed_ms(start))
+            return None
+        _tier_stats['redis_hits'] += 1
+        _cache_metrics.record_get(key, 'backend_hits', _elapsed_ms(start), len(cached))
+        etag, _, body = cached.partition('\n')
+        response = (etag, body.encode())
+        if backend.is_shared:
+            _store_local_response(key, variant, response, min(LOCAL_CACHE_TTL, ttl or LOCAL_CACHE_TTL), generation)
+        return response
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+        return None
+
+async def set_cached_response(key: str, variant: str, etag: str, body: bytes, ttl: int = 5):
+    if not _admit_response_variant(variant):
+        return
+    backend = cache_backend
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(backend.hset(key, {variant: f"{etag}\n{body.decode()}"}, ttl), timeout=1)
+        _record_backend_result(True)
+        _cache_metrics.record_set(key, _elapsed_ms(start), len(etag) + len(body))
+        if backend.is_shared:
+            _store_local_response(key, variant, (etag, body), min(ttl, LOCAL_CACHE_TTL))
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+
+def _store_local_response(key: str, variant: str, response: Tuple[str, bytes], ttl: float, generation: int = None):
+    found, variants = _local_cache.get(key)
+    variants = {**(variants if found else {}), variant: response}
+    size = sum(len(etag) + len(body) for etag, body in variants.values())
+    _local_cache.set(key, variants, size, ttl, generation)
+
+async def get_or_load(key: str, loader: Callable[[], Awaitable[Any]], ttl: int = 60, stale_ttl: int = 0):
+    entry = await get_cached_data(key)
+    if isinstance(entry, dict) and 'fresh_until' in entry:
+        if entry['fresh_until'] > time.time():
+            return entry.get('value')
+        _cache_metrics.record_stale(key)
+        _single_flight.refresh(key, lambda: _load_and_store(key, loader, ttl, stale_ttl))
+        return entry.get('value')
+    return await _single_flight.do(key, lambda: _load_and_store(key, loader, ttl, stale_ttl))
+
+async def _load_and_store(key: str, loader: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int):
+    value = await loader()
+    if value is not None:
+        await set_cached_data(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl=ttl + stale_ttl)
+    return value
+
+async def cache_hgetall(key: str) -> Dict[str, str]:
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(cache_backend.hgetall(key), timeout=1)
+        _record_backend_result(True)
+        if result:
+            size = sum(len(field) + len(str(value)) for field, value in result.items())
+            _cache_metrics.record_get(key, 'backend_hits', _elapsed_ms(start), size)
+        else:
+            _cache_metrics.record_get(key, 'misses', _elapsed_ms(start))
+        return result
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+        raise
+
+async def cache_hset(key: str, mapping: Dict[str, Any], ttl: Optional[int] = None):
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(cache_backend.hset(key, mapping, ttl), timeout=1)
+        _record_backend_result(True)
+        size = sum(len(field) + len(str(value)) for field, value in mapping.items())
+        _cache_metrics.record_set(key, _elapsed_ms(start), size)
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+        raise
+
+async def cache_hdel(key: str, *fields: str):
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(cache_backend.hdel(key, *fields), timeout=1)
+        _record_backend_result(True)
+        _cache_metrics.record_op(key, 'hdels', _elapsed_ms(start))
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+        raise
+
+async def cache_incr(key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+    start = time.perf_counter()
     try:
-        await asyncio.wait_for(redis_client.set(key, orjson.dumps(data), ex=ttl), timeout=1)
-    except Exception: pass
+        result = await asyncio.wait_for(cache_backend.incr(key, amount, ttl), timeout=1)
+        _record_backend_result(True)
+        _cache_metrics.record_op(key, 'incrs', _elapsed_ms(start))
+        return result
+    except Exception:
+        _record_backend_result(False)
+        _cache_metrics.record_error(key)
+        raise
+
+async def run_cache_script(script: CacheScript, keys: List[str], args: List[Any]) -> Any:
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(cache_backend.run_script(script, keys, args), timeout=1)
+        _record_backend_result(True)
+        for key in keys:
+            _cache_metrics.record_op(key, f"script:{script.name}", _elapsed_ms(start))
+        return result
+    except Exception:
+        _record_backend_result(False)
+        for key in keys:
+            _cache_metrics.record_error(key)
+        raise
 
 async def invalidate_cache_atomic(primary_key: str, device_id: Optional[str] = None):
     try:
-        await _invalidation_queue.put({'primary_key': primary_key, 'device_id': device_id})
+        _invalidation_queue.put_nowait((primary_key, device_id, time.monotonic()))
+        _invalidation_stats['enqueued'] += 1
     except asyncio.QueueFull:
-        print(f"[{datetime.datetime.now()}] Invalidation queue full, dropping task for {primary_key}")
+        for key in _keys_for_task(primary_key, device_id, as_family=True):
+            (_pending_families if key.endswith('*') else _pending_keys).add(key.rstrip('*'))
+        _invalidation_stats['overflow_collapsed'] += 1
+
+def _keys_for_task(primary_key: str, device_id: Optional[str], as_family: bool = False) -> Set[str]:
+    suffix = '*' if as_family else device_id
+    keys = {primary_key}
+    if primary_key == CACHE_KEY_LATEST_DATA:
+        keys.add("device_stats_summary")
+        keys.add(CACHE_KEY_LATEST_RESPONSE)
+        if device_id:
+            keys.add(f"latest_data_raw_{suffix}")
+            keys.add(f"{CACHE_KEY_LATEST_RESPONSE}_{suffix}")
+            keys.add(f"device_history_{suffix}")
+    elif primary_key.startswith("device_position_") and device_id:
+        keys.add(f"weather_rate_{suffix}")
+    return keys
 
 async def _invalidation_worker():
     while True:
         try:
-            task = await _invalidation_queue.get()
-            await _process_invalidation_task(task)
-            _invalidation_queue.task_done()
+            batch = await _collect_invalidation_batch()
+            await _process_invalidation_batch(batch)
+            for _ in batch:
+                _invalidation_queue.task_done()
         except Exception as e:
             print(f"[{datetime.datetime.now()}] Invalidation worker error: {e}")
             await asyncio.sleep(1)
 
-async def _process_invalidation_task(task: dict):
-    primary_key, device_id = task['primary_key'], task.get('device_id')
-    keys_to_invalidate = {primary_key}
-    
-    if primary_key == CACHE_KEY_LATEST_DATA:
-        keys_to_invalidate.add("device_stats_summary")
-        if device_id:
-            keys_to_invalidate.add(f"latest_data_raw_{device_id}")
-            keys_to_invalidate.add(f"device_history_{device_id}")
-    elif primary_key.startswith("device_position_") and device_id:
-        keys_to_invalidate.add(f"weather_rate_{device_id}")
+async def _collect_invalidation_batch() -> List[tuple]:
+    batch = []
+    if _pending_keys or _pending_families:
+        try:
+            batch.append(await asyncio.wait_for(_invalidation_queue.get(), timeout=INVALIDATION_RETRY_SECONDS))
+        except asyncio.TimeoutError:
+            return batch
+    else:
+        batch.append(await _invalidation_queue.get())
 
-    if keys_to_invalidate and redis_client:
+    deadline = time.monotonic() + INVALIDATION_WINDOW_SECONDS
+    while len(batch) < INVALIDATION_BATCH_SIZE:
+        try:
+            batch.append(_invalidation_queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
         try:
-            await redis_client.delete(*list(keys_to_invalidate))
+            batch.append(await asyncio.wait_for(_invalidation_queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def _process_invalidation_batch(batch: List[tuple]):
+    requested = 0
+    keys = set(_pending_keys)
+    families = set(_pending_families)
+    _pending_keys.clear()
+    _pending_families.clear()
+    for primary_key, device_id, _ in batch:
+        task_keys = _keys_for_task(primary_key, device_id)
+        requested += len(task_keys)
+        keys |= task_keys
+
+    _local_cache.invalidate(keys)
+    for prefix in families:
+        _local_cache.invalidate_prefix(prefix)
+    _cache_metrics.record_invalidations(keys | families)
+
+    if keys or families:
+        backend = cache_backend
+        try:
+            await backend.unlink(keys, notify=(
+                CACHE_INVALIDATION_CHANNEL,
+                orjson.dumps({'origin': _instance_id, 'keys': list(keys), 'prefixes': list(families)})
+            ))
+            for prefix in families:
+                await backend.unlink_prefix(prefix)
+            _record_backend_result(True)
         except Exception as e:
-            print(f"[{datetime.datetime.now()}] Failed to invalidate keys {keys_to_invalidate}: {e}")
+            _record_backend_result(False)
+            _pending_keys.update(keys)
+            _pending_families.update(families)
+            _invalidation_stats['retries'] += 1
+            print(f"[{datetime.datetime.now()}] Failed to invalidate {len(keys)} keys, {len(families)} families: {e}")
+            return
+
+    _invalidation_stats['batches'] += 1
+    _invalidation_stats['keys_unlinked'] += len(keys)
+    _invalidation_stats['deduplicated'] += max(0, requested - len(keys))
+    _invalidation_stats['family_flushes'] += len(families)
+    if batch:
+        lag_ms = (time.monotonic() - min(enqueued_at for _, _, enqueued_at in batch)) * 1000
+        _invalidation_stats['last_lag_ms'] = round(lag_ms, 1)
+        _invalidation_stats['max_lag_ms'] = round(max(_invalidation_stats['max_lag_ms'], lag_ms), 1)
+
+async def _invalidation_listener():
+    while True:
+        if cache_backend is not redis_backend:
+            await asyncio.sleep(1)
+            continue
+        pubsub = None
+        try:
+            pubsub = redis_backend.client.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    _apply_remote_invalidation(message.get('data'))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[{datetime.datetime.now()}] Invalidation listener error: {e}")
+            _local_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            if pubsub:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+def _apply_remote_invalidation(raw_message):
+    try:
+        message = orjson.loads(raw_message)
+    except Exception:
+        _local_cache.clear()
+        return
+    if message.get('origin') != _instance_id:
+        _local_cache.invalidate(message.get('keys', []))
+        for prefix in message.get('prefixes', []):
+            _local_cache.invalidate_prefix(prefix)
 
 async def invalidate_device_cache(device_id: str):
     await invalidate_cache_atomic(CACHE_KEY_LATEST_DATA, device_id)
 
+def get_cache_stats() -> Dict:
+    local_total = _tier_stats['local_hits'] + _tier_stats['local_misses']
+    redis_total = _tier_stats['redis_hits'] + _tier_stats['redis_misses']
+    return {
+        'local': {
+            'hits': _tier_stats['local_hits'], 'misses': _tier_stats['local_misses'],
+            'hit_ratio': round(_tier_stats['local_hits'] / local_total, 3) if local_total else 0.0,
+            **_local_cache.get_stats()
+        },
+        'redis': {
+            'backend': cache_backend.name,
+            'hits': _tier_stats['redis_hits'], 'misses': _tier_stats['redis_misses'],
+            'errors': _tier_stats['redis_errors'], 'backend_switches': _backend_stats['switches'],
+            'hit_ratio': round(_tier_stats['redis_hits'] / redis_total, 3) if redis_total else 0.0
+        },
+        'single_flight': _single_flight.get_stats(),
+        'response_variants': {
+            'active': len(_response_variants), 'max': MAX_RESPONSE_VARIANTS,
+            'idle_seconds': RESPONSE_VARIANT_IDLE_SECONDS, 'pinned': PUBLIC_BASE_URL or None,
+            **_response_variant_stats
+        },
+        'invalidation': get_invalidation_stats()
+    }
+
+def get_cache_family_stats() -> Dict:
+    return _cache_metrics.get_stats()
+
+def get_invalidation_stats() -> Dict:
+    return {
+        'queue_depth': _invalidation_queue.qsize(),
+        'queue_capacity': INVALIDATION_QUEUE_SIZE,
+        'pending_keys': len(_pending_keys),
+        'pending_families': sorted(_pending_families),
+        **_invalidation_stats
+    }
+
 async def get_cache_health():
-    if not redis_client: return {"healthy": False, "error": "not_initialized"}
+    backend = cache_backend
     try:
         start_time = time.time()
-        await asyncio.wait_for(redis_client.ping(), timeout=1)
+        await asyncio.wait_for(backend.ping(), timeout=1)
         latency = (time.time() - start_time) * 1000
-        info = await asyncio.wait_for(redis_client.info('memory'), timeout=1)
+        info = await asyncio.wait_for(backend.info(), timeout=1)
         return {
-            "healthy": True, "latency_ms": f"{latency:.1f}",
-            "memory_usage": info.get('used_memory_human', 'unknown'),
-            "invalidation_queue_size": _invalidation_queue.qsize()
+            "healthy": True, "backend": backend.name, "latency_ms": f"{latency:.1f}",
+            "memory_usage": info.get('memory_usage', 'unknown'),
+            "last_backend_switch": _backend_stats['last_switch'],
+            "invalidation_queue_size": _invalidation_queue.qsize(),
+            "invalidation_lag_ms": _invalidation_stats['last_lag_ms'],
+            "tiers": get_cache_stats()
         }
     except Exception as e:
         return {"healthy": False, "error": str(e)}
@@ -0,0 +1,10 @@
+from .local_tier import LocalTTLCache
+from .single_flight import SingleFlight
+from .backends import CacheBackend, CacheScript, RedisCacheBackend, EmbeddedCacheBackend
+from .metrics import CacheMetrics, Histogram
+
+__all__ = [
+    'LocalTTLCache', 'SingleFlight',
+    'CacheBackend', 'CacheScript', 'RedisCacheBackend', 'EmbeddedCacheBackend',
+    'CacheMetrics', 'Histogram'
+]
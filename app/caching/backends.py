@@ -0,0 +1,244 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from redis.exceptions import NoScriptError
+
+EMBEDDED_MAX_KEYS = 20000
+SCAN_CHUNK_SIZE = 500
+
+class CacheScript:
+    def __init__(self, name: str, lua: str, fallback: Callable[["EmbeddedCacheBackend", List[str], List[str]], Any]):
+        self.name = name
+        self.lua = lua
+        self.fallback = fallback
+
+class CacheBackend(ABC):
+    name = "base"
+    is_shared = False
+
+    @abstractmethod
+    async def ping(self) -> bool: ...
+    @abstractmethod
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[str], Optional[float]]: ...
+    @abstractmethod
+    async def hget_with_ttl(self, key: str, field: str) -> Tuple[Optional[str], Optional[float]]: ...
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int): ...
+    @abstractmethod
+    async def hgetall(self, key: str) -> Dict[str, str]: ...
+    @abstractmethod
+    async def hset(self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None): ...
+    @abstractmethod
+    async def hdel(self, key: str, *fields: str): ...
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int: ...
+    @abstractmethod
+    async def unlink(self, keys: Iterable[str], notify: Optional[Tuple[str, bytes]] = None): ...
+    @abstractmethod
+    async def unlink_prefix(self, prefix: str): ...
+    @abstractmethod
+    async def run_script(self, script: CacheScript, keys: List[str], args: List[Any]) -> Any: ...
+    @abstractmethod
+    async def info(self) -> Dict: ...
+
+class RedisCacheBackend(CacheBackend):
+    name = "redis"
+    is_shared = True
+
+    def __init__(self, client):
+        self.client = client
+        self.script_shas: Dict[str, str] = {}
+
+    async def ping(self) -> bool:
+        return bool(await self.client.ping())
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[str], Optional[float]]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            value, ttl_ms = await pipe.execute()
+        return value, (ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None)
+
+    async def hget_with_ttl(self, key: str, field: str) -> Tuple[Optional[str], Optional[float]]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hget(key, field)
+            pipe.pttl(key)
+            value, ttl_ms = await pipe.execute()
+        return value, (ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None)
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return await self.client.hgetall(key)
+
+    async def hset(self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if ttl:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def hdel(self, key: str, *fields: str):
+        if fields:
+            await self.client.hdel(key, *fields)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incrby(key, amount)
+            if ttl:
+                pipe.expire(key, ttl)
+            results = await pipe.execute()
+        return int(results[0])
+
+    async def unlink(self, keys: Iterable[str], notify: Optional[Tuple[str, bytes]] = None):
+        keys = list(keys)
+        async with self.client.pipeline(transaction=False) as pipe:
+            if keys:
+                pipe.unlink(*keys)
+            if notify:
+                pipe.publish(*notify)
+            await pipe.execute()
+
+    async def unlink_prefix(self, prefix: str):
+        chunk = []
+        async for key in self.client.scan_iter(match=f"{prefix}*", count=SCAN_CHUNK_SIZE):
+            chunk.append(key)
+            if len(chunk) >= SCAN_CHUNK_SIZE:
+                await self.client.unlink(*chunk)
+                chunk = []
+        if chunk:
+            await self.client.unlink(*chunk)
+
+    async def run_script(self, script: CacheScript, keys: List[str], args: List[Any]) -> Any:
+        sha = self.script_shas.get(script.name)
+        if not sha:
+            sha = self.script_shas[script.name] = await self.client.script_load(script.lua)
+        try:
+            return await self.client.evalsha(sha, len(keys), *keys, *args)
+        except NoScriptError:
+            self.script_shas[script.name] = await self.client.script_load(script.lua)
+            return await self.client.evalsha(self.script_shas[script.name], len(keys), *keys, *args)
+
+    async def info(self) -> Dict:
+        info = await self.client.info('memory')
+        return {'memory_usage': info.get('used_memory_human', 'unknown')}
+
+class EmbeddedCacheBackend(CacheBackend):
+    name = "embedded"
+    is_shared = False
+
+    def __init__(self, max_keys: int = EMBEDDED_MAX_KEYS):
+        self.store: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self.max_keys = max_keys
+        self.evictions = 0
+        self.on_evict: Optional[Callable[[str], None]] = None
+
+    def _entry(self, key: str) -> Optional[List[Any]]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self.store[key]
+            return None
+        self.store.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, value: Any, ttl: Optional[float]):
+        self.store[key] = [time.monotonic() + ttl if ttl else None, value]
+        self.store.move_to_end(key)
+        while len(self.store) > self.max_keys:
+            old_key, _ = self.store.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(old_key)
+
+    def _ttl(self, entry: List[Any]) -> Optional[float]:
+        return max(0.0, entry[0] - time.monotonic()) if entry[0] is not None else None
+
+    def read(self, key: str) -> Optional[Any]:
+        entry = self._entry(key)
+        return entry[1] if entry else None
+
+    def write(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._put(key, value, ttl)
+
+    def expire_key(self, key: str, ttl: float):
+        if entry := self._entry(key):
+            entry[0] = time.monotonic() + ttl
+
+    def increment(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        entry = self._entry(key)
+        value = int(entry[1]) + amount if entry else amount
+        if entry:
+            entry[1] = str(value)
+            if ttl:
+                entry[0] = time.monotonic() + ttl
+        else:
+            self._put(key, str(value), ttl)
+        return value
+
+    def read_hash(self, key: str) -> Dict[str, str]:
+        entry = self._entry(key)
+        return dict(entry[1]) if entry and isinstance(entry[1], dict) else {}
+
+    def write_hash(self, key: str, mapping: Dict[str, Any], ttl: Optional[float] = None):
+        entry = self._entry(key)
+        values = entry[1] if entry and isinstance(entry[1], dict) else {}
+        values.update({field: str(value) for field, value in mapping.items()})
+        if entry and isinstance(entry[1], dict):
+            if ttl:
+                entry[0] = time.monotonic() + ttl
+        else:
+            self._put(key, values, ttl)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get_with_ttl(self, key: str) -> Tuple[Optional[str], Optional[float]]:
+        entry = self._entry(key)
+        if not entry or isinstance(entry[1], dict):
+            return None, None
+        return entry[1], self._ttl(entry)
+
+    async def hget_with_ttl(self, key: str, field: str) -> Tuple[Optional[str], Optional[float]]:
+        entry = self._entry(key)
+        if not entry or not isinstance(entry[1], dict):
+            return None, None
+        return entry[1].get(field), self._ttl(entry)
+
+    async def set(self, key: str, value: Any, ttl: int):
+        self._put(key, value.decode() if isinstance(value, bytes) else value, ttl)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return self.read_hash(key)
+
+    async def hset(self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None):
+        self.write_hash(key, mapping, ttl)
+
+    async def hdel(self, key: str, *fields: str):
+        entry = self._entry(key)
+        if entry and isinstance(entry[1], dict):
+            for field in fields:
+                entry[1].pop(field, None)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        return self.increment(key, amount, ttl)
+
+    async def unlink(self, keys: Iterable[str], notify: Optional[Tuple[str, bytes]] = None):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def unlink_prefix(self, prefix: str):
+        for key in [k for k in self.store if k.startswith(prefix)]:
+            del self.store[key]
+
+    async def run_script(self, script: CacheScript, keys: List[str], args: List[Any]) -> Any:
+        return script.fallback(self, keys, [str(arg) for arg in args])
+
+    async def info(self) -> Dict:
+        return {'memory_usage': f"{len(self.store)} keys", 'max_keys': self.max_keys, 'evictions': self.evictions}
+
+    def clear(self):
+        self.store.clear()
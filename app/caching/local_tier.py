@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+LOCAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+LOCAL_CACHE_MAX_ENTRIES = 5000
+LOCAL_CACHE_MAX_ITEM_FRACTION = 4
+
+class LocalTTLCache:
+    def __init__(self, max_bytes: int = LOCAL_CACHE_MAX_BYTES, max_entries: int = LOCAL_CACHE_MAX_ENTRIES):
+        self.entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self.generation = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.on_evict: Optional[Callable[[str], None]] = None
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return False, None
+        self.entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, size: int, ttl: float, generation: int = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._remove(key)
+        if ttl <= 0 or size > self.max_bytes // LOCAL_CACHE_MAX_ITEM_FRACTION:
+            return
+        self.entries[key] = (time.monotonic() + ttl, size, value)
+        self.total_bytes += size
+        while self.entries and (self.total_bytes > self.max_bytes or len(self.entries) > self.max_entries):
+            old_key, (_, old_size, _) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(old_key)
+
+    def invalidate(self, keys: Iterable[str]):
+        self.generation += 1
+        for key in keys:
+            self._remove(key)
+
+    def invalidate_prefix(self, prefix: str):
+        self.generation += 1
+        for key in [k for k in self.entries if k.startswith(prefix)]:
+            self._remove(key)
+
+    def clear(self):
+        self.generation += 1
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def get_stats(self) -> Dict:
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
@@ -0,0 +1,139 @@
+import bisect
+from typing import Dict, Iterable, Optional, Tuple
+
+CACHE_KEY_FAMILIES = (
+    "latest_data_raw_",
+    "response_latest_data_",
+    "device_history_",
+    "device:position:",
+    "device_position_",
+    "global:weather_rate:",
+    "weather_rate_",
+    "weather_quota:",
+    "realtime:",
+)
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+PAYLOAD_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+MAX_TRACKED_FAMILIES = 64
+OTHER_FAMILY = "other"
+
+class Histogram:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{bound}" for bound in self.bounds] + ["inf"]
+        return {
+            'count': self.count,
+            'avg': round(self.total / self.count, 3) if self.count else None,
+            'max': round(self.max, 3),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': {label: count for label, count in zip(labels, self.counts) if count}
+        }
+
+class FamilyMetrics:
+    def __init__(self):
+        self.counters = {
+            'local_hits': 0, 'backend_hits': 0, 'misses': 0, 'stale_hits': 0,
+            'sets': 0, 'errors': 0, 'evictions': 0, 'invalidations': 0
+        }
+        self.get_latency = Histogram(LATENCY_BUCKETS_MS)
+        self.set_latency = Histogram(LATENCY_BUCKETS_MS)
+        self.op_latency: Dict[str, Histogram] = {}
+        self.payload_bytes = Histogram(PAYLOAD_BUCKETS_BYTES)
+
+    def to_dict(self) -> Dict:
+        hits = self.counters['local_hits'] + self.counters['backend_hits']
+        lookups = hits + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0.0,
+            'get_latency_ms': self.get_latency.to_dict(),
+            'set_latency_ms': self.set_latency.to_dict(),
+            'op_latency_ms': {op: histogram.to_dict() for op, histogram in sorted(self.op_latency.items())},
+            'payload_bytes': self.payload_bytes.to_dict()
+        }
+
+class CacheMetrics:
+    def __init__(self, prefixes: Iterable[str] = CACHE_KEY_FAMILIES, max_families: int = MAX_TRACKED_FAMILIES):
+        self.prefixes = sorted(prefixes, key=len, reverse=True)
+        self.max_families = max_families
+        self.families: Dict[str, FamilyMetrics] = {}
+
+    def family_of(self, key: str) -> str:
+        for prefix in self.prefixes:
+            if key.startswith(prefix):
+                return prefix + "*"
+        return key
+
+    def _family(self, key: str) -> FamilyMetrics:
+        name = self.family_of(key)
+        family = self.families.get(name)
+        if family is None:
+            if len(self.families) >= self.max_families:
+                name = OTHER_FAMILY
+                family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = FamilyMetrics()
+        return family
+
+    def record_get(self, key: str, outcome: str, elapsed_ms: float, size: Optional[int] = None):
+        family = self._family(key)
+        family.counters[outcome] += 1
+        family.get_latency.observe(elapsed_ms)
+        if size is not None:
+            family.payload_bytes.observe(size)
+
+    def record_set(self, key: str, elapsed_ms: float, size: Optional[int] = None):
+        family = self._family(key)
+        family.counters['sets'] += 1
+        family.set_latency.observe(elapsed_ms)
+        if size is not None:
+            family.payload_bytes.observe(size)
+
+    def record_op(self, key: str, op: str, elapsed_ms: float):
+        family = self._family(key)
+        family.counters[op] = family.counters.get(op, 0) + 1
+        histogram = family.op_latency.get(op)
+        if histogram is None:
+            histogram = family.op_latency[op] = Histogram(LATENCY_BUCKETS_MS)
+        histogram.observe(elapsed_ms)
+
+    def record_stale(self, key: str):
+        self._family(key).counters['stale_hits'] += 1
+
+    def record_error(self, key: str):
+        self._family(key).counters['errors'] += 1
+
+    def record_eviction(self, key: str):
+        self._family(key).counters['evictions'] += 1
+
+    def record_invalidations(self, keys: Iterable[str]):
+        for key in keys:
+            self._family(key).counters['invalidations'] += 1
+
+    def get_stats(self) -> Dict:
+        return {name: family.to_dict() for name, family in sorted(self.families.items())}
@@ -0,0 +1,41 @@
+import asyncio
+import datetime
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    def __init__(self):
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {'loads': 0, 'coalesced': 0, 'background_refreshes': 0, 'stale_served': 0, 'load_errors': 0}
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.inflight.get(key)
+        if task is None:
+            task = self._start(key, loader)
+            self.stats['loads'] += 1
+        else:
+            self.stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> bool:
+        self.stats['stale_served'] += 1
+        if key in self.inflight:
+            return False
+        self._start(key, loader)
+        self.stats['background_refreshes'] += 1
+        return True
+
+    def _start(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(loader())
+        self.inflight[key] = task
+        task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled() and (error := task.exception()):
+            self.stats['load_errors'] += 1
+            print(f"[{datetime.datetime.now()}] Cache loader for {key} failed: {error}")
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'inflight': len(self.inflight)}
@@ -2,9 +2,13 @@ import asyncio
 import datetime
 from app.db import init_db
 from app.cache import init_redis_pool
+from app.weather.http_pool import init_weather_http_client, close_weather_http_client
 from app.realtime.websocket.cleanup import cleanup_stale_connections
 
 async def startup_handler():
+    from app.services.weather.cache_manager import load_weather_cache_index
+    from app.services.weather.quota import weather_quota
+
     print(f"[{datetime.datetime.now()}] Starting hoarder_server v3.3.0...")
     
     try:
@@ -19,9 +23,16 @@ async def startup_handler():
     except Exception as e:
         print(f"[{datetime.datetime.now()}] Redis initialization failed: {e}")
     
+    await load_weather_cache_index()
+    await weather_quota.load()
+    await init_weather_http_client()
+    
     print(f"[{datetime.datetime.now()}] Server ready")
 
 async def shutdown_handler(sio, connection_manager):
+    from app.services.weather.cache_manager import flush_weather_cache_index
+    from app.services.weather.quota import weather_quota
+
     print(f"[{datetime.datetime.now()}] Shutting down hoarder_server...")
     
     disconnect_tasks = []
@@ -31,6 +42,10 @@ async def shutdown_handler(sio, connection_manager):
     if disconnect_tasks:
         await asyncio.gather(*disconnect_tasks, return_exceptions=True)
     
+    await flush_weather_cache_index()
+    await weather_quota.save()
+    await close_weather_http_client()
+    
     print(f"[{datetime.datetime.now()}] Shutdown complete")
 
 async def periodic_maintenance_task(sio, connection_manager, shared_timezone_manager):
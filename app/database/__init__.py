@@ -1,7 +1,7 @@
 from .connection import init_db, get_pool, close_pool, safe_db_operation, get_simple_pool_stats
 from .config import DB_CONFIG
 from .partitions.manager import create_partition_for_date, ensure_partition_exists
-from .operations import upsert_latest_state, save_timestamped_data
+from .operations import upsert_latest_state, patch_latest_state, save_timestamped_data
 from .retrieval import get_raw_latest_payload_for_device, get_raw_latest_data_for_all_devices
 from .analytics import (
     get_timestamped_history,
@@ -14,7 +14,7 @@ from .helpers import calculate_delta_changes
 __all__ = [
     'init_db', 'get_pool', 'safe_db_operation', 'get_simple_pool_stats',
     'create_partition_for_date', 'ensure_partition_exists', 'close_pool', 'DB_CONFIG',
-    'upsert_latest_state', 'save_timestamped_data',
+    'upsert_latest_state', 'patch_latest_state', 'save_timestamped_data',
     'get_raw_latest_payload_for_device', 'get_raw_latest_data_for_all_devices',
     'get_timestamped_history', 'get_data_gaps',
     'get_top_devices_by_records', 'get_total_records_summary',
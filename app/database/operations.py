@@ -7,6 +7,7 @@ from .connection import get_pool
 from .partitions.manager import ensure_partition_exists
 from .helpers import safe_json_serialize, extract_device_id, sanitize_payload, deep_merge
 from app.cache import invalidate_device_cache
+from app.realtime.device_updates import notify_device_update
 
 async def upsert_latest_state(data: dict):
     device_id = extract_device_id(data)
@@ -36,9 +37,30 @@ async def upsert_latest_state(data: dict):
                     device_id, final_payload, timeout=10
                 )
         await invalidate_device_cache(device_id)
+        notify_device_update(device_id, {'received_at': datetime.datetime.now(datetime.timezone.utc).isoformat(), **merged_data})
     except Exception as e:
         print(f"[{datetime.datetime.now(datetime.timezone.utc)}] CRITICAL ERROR in upsert for {device_id}: {e}")
 
+async def patch_latest_state(device_id: str, fields: Dict[str, Any]) -> bool:
+    patch = sanitize_payload(fields)
+    if not device_id or not patch: return False
+
+    try:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            result = await conn.execute(
+                "UPDATE latest_device_states SET payload = payload || $2::jsonb WHERE device_id = $1",
+                device_id, safe_json_serialize(patch), timeout=10
+            )
+        await invalidate_device_cache(device_id)
+        if result == "UPDATE 0":
+            return False
+        notify_device_update(device_id)
+        return True
+    except Exception as e:
+        print(f"[{datetime.datetime.now(datetime.timezone.utc)}] ERROR patching latest state for {device_id}: {e}")
+        return False
+
 async def save_timestamped_data(
     data: dict, data_timestamp: Optional[datetime.datetime] = None, 
     is_offline: bool = False, batch_id: Optional[str] = None
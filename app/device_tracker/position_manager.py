@@ -1,26 +1,28 @@
 import datetime
 from typing import Optional, Dict
-from app.cache import redis_client
+from app.cache import cache_hgetall, cache_hset
 
 DEVICE_POSITION_KEY_PREFIX = "device:position"
 DEVICE_POSITION_TTL_SECONDS = 30 * 24 * 3600
+POSITION_FLOAT_FIELDS = {
+    'lat', 'lon', 'current_lat', 'current_lon', 'last_weather_update_ts',
+    'seen_lat', 'seen_lon', 'seen_ts', 'prev_seen_lat', 'prev_seen_lon', 'prev_seen_ts'
+}
 
 def _get_redis_key(device_id: str) -> str:
     return f"{DEVICE_POSITION_KEY_PREFIX}:{device_id}"
 
 async def get_device_position(device_id: str) -> Optional[Dict]:
-    if not redis_client: 
-        return None
     redis_key = _get_redis_key(device_id)
     
     try:
-        pos_data = await redis_client.hgetall(redis_key)
+        pos_data = await cache_hgetall(redis_key)
         if not pos_data: 
             return None
         
         typed_pos_data = {}
         for key, value in pos_data.items():
-            if key in ['lat', 'lon', 'current_lat', 'current_lon']:
+            if key in POSITION_FLOAT_FIELDS:
                 try: 
                     typed_pos_data[key] = float(value)
                 except (ValueError, TypeError): 
@@ -39,8 +41,6 @@ async def get_device_position(device_id: str) -> Optional[Dict]:
         return None
 
 async def save_device_position(device_id: str, position_data: Dict):
-    if not redis_client: 
-        return
     redis_key = _get_redis_key(device_id)
     
     try:
@@ -48,9 +48,6 @@ async def save_device_position(device_id: str, position_data: Dict):
         if not save_data: 
             return
         
-        async with redis_client.pipeline(transaction=True) as pipe:
-            pipe.hset(redis_key, mapping=save_data)
-            pipe.expire(redis_key, DEVICE_POSITION_TTL_SECONDS)
-            await pipe.execute()
+        await cache_hset(redis_key, save_data, DEVICE_POSITION_TTL_SECONDS)
     except Exception as e:
         print(f"[{datetime.datetime.now(datetime.timezone.utc)}] Error saving device position: {e}")
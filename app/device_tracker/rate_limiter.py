@@ -1,6 +1,7 @@
 import datetime
-from typing import Tuple, Dict
-from app.cache import redis_client
+from typing import Tuple, Dict, Optional
+from app.cache import run_cache_script
+from app.caching import CacheScript
 
 MAX_WEATHER_FETCHES_PER_MINUTE = 8
 BURST_WEATHER_FETCHES_LIMIT = 12
@@ -42,66 +43,62 @@ else
 end
 """
 
+def _rate_limit_fallback(backend, keys, args):
+    key, burst_key = keys[0], f"{keys[0]}:burst"
+    limit, burst_limit, ttl = int(args[0]), int(args[1]), int(args[2])
+    current = int(backend.read(key) or 0)
+    burst_current = int(backend.read(burst_key) or 0)
+
+    if current >= limit:
+        return [0, current, burst_current, 'rate_limit_exceeded']
+    if burst_current >= burst_limit:
+        return [0, current, burst_current, 'burst_limit_exceeded']
+    new_count = backend.increment(key, 1, ttl)
+    new_burst = backend.increment(burst_key, 1, 300)
+    return [1, new_count, new_burst, 'allowed']
+
+RATE_LIMIT_SCRIPT = CacheScript("weather_rate_limit", REDIS_RATE_LIMIT_SCRIPT, _rate_limit_fallback)
+
 class WeatherRateLimiter:
     def __init__(self):
-        self.script_sha = None
         self.fallback_counts = {}
         self.last_fallback_reset = 0
         
-    async def _ensure_script_loaded(self) -> bool:
-        if not redis_client:
-            return False
-            
-        if self.script_sha:
-            return True
-            
-        try:
-            self.script_sha = await redis_client.script_load(REDIS_RATE_LIMIT_SCRIPT)
-            print(f"[{datetime.datetime.now()}] Weather rate limit script loaded: {self.script_sha}")
-            return True
-        except Exception as e:
-            print(f"[{datetime.datetime.now()}] Failed to load rate limit script: {e}")
-            return False
-        
-    async def check_global_rate_limit(self) -> Tuple[bool, str, Dict]:
-        if not redis_client:
-            return self._fallback_rate_limit()
-            
-        if not await self._ensure_script_loaded():
-            return self._fallback_rate_limit()
-            
+    async def check_global_rate_limit(self, limit: Optional[int] = None, burst_limit: Optional[int] = None) -> Tuple[bool, str, Dict]:
+        limit = MAX_WEATHER_FETCHES_PER_MINUTE if limit is None else limit
+        burst_limit = BURST_WEATHER_FETCHES_LIMIT if burst_limit is None else burst_limit
         try:
             current_minute = int(datetime.datetime.now(datetime.timezone.utc).timestamp() // 60)
             global_key = f"global:weather_rate:{current_minute}"
             
-            result = await redis_client.evalsha(
-                self.script_sha, 1, global_key,
-                str(MAX_WEATHER_FETCHES_PER_MINUTE),
-                str(BURST_WEATHER_FETCHES_LIMIT),
+            result = await run_cache_script(RATE_LIMIT_SCRIPT, [global_key], [
+                str(limit),
+                str(burst_limit),
                 str(WEATHER_QUOTA_RESET_INTERVAL)
-            )
+            ])
             
             allowed, current_count, burst_count, reason = result
             
             stats = {
                 'current_count': current_count,
                 'burst_count': burst_count,
-                'limit': MAX_WEATHER_FETCHES_PER_MINUTE,
-                'burst_limit': BURST_WEATHER_FETCHES_LIMIT,
+                'limit': limit,
+                'burst_limit': burst_limit,
                 'reason': reason,
-                'method': 'redis_atomic'
+                'method': 'cache_atomic'
             }
             
             success = bool(allowed)
-            message = f"Weather API: {reason} ({current_count}/{MAX_WEATHER_FETCHES_PER_MINUTE}, burst: {burst_count}/{BURST_WEATHER_FETCHES_LIMIT})"
+            message = f"Weather API: {reason} ({current_count}/{limit}, burst: {burst_count}/{burst_limit})"
             
             return success, message, stats
             
         except Exception as e:
-            print(f"[{datetime.datetime.now()}] Redis rate limit check failed: {e}")
-            return self._fallback_rate_limit()
+            print(f"[{datetime.datetime.now()}] Cache rate limit check failed: {e}")
+            return self.check_local_rate_limit(limit)
     
-    def _fallback_rate_limit(self) -> Tuple[bool, str, Dict]:
+    def check_local_rate_limit(self, limit: Optional[int] = None) -> Tuple[bool, str, Dict]:
+        limit = MAX_WEATHER_FETCHES_PER_MINUTE if limit is None else limit
         try:
             current_time = datetime.datetime.now(datetime.timezone.utc).timestamp()
             current_minute = int(current_time // 60)
@@ -112,25 +109,25 @@ class WeatherRateLimiter:
                 
             current_count = self.fallback_counts.get(current_minute, 0)
             
-            if current_count >= MAX_WEATHER_FETCHES_PER_MINUTE:
+            if current_count >= limit:
                 stats = {
                     'current_count': current_count,
-                    'limit': MAX_WEATHER_FETCHES_PER_MINUTE,
+                    'limit': limit,
                     'reason': 'fallback_rate_limited',
                     'method': 'fallback_memory'
                 }
-                return False, f"Fallback rate limit exceeded ({current_count}/{MAX_WEATHER_FETCHES_PER_MINUTE})", stats
+                return False, f"Fallback rate limit exceeded ({current_count}/{limit})", stats
             
             self.fallback_counts[current_minute] = current_count + 1
             
             stats = {
                 'current_count': current_count + 1,
-                'limit': MAX_WEATHER_FETCHES_PER_MINUTE,
+                'limit': limit,
                 'reason': 'fallback_allowed',
                 'method': 'fallback_memory'
             }
             
-            return True, f"Fallback rate limit OK ({current_count + 1}/{MAX_WEATHER_FETCHES_PER_MINUTE})", stats
+            return True, f"Fallback rate limit OK ({current_count + 1}/{limit})", stats
         except Exception as e:
             return False, f"Rate limit error: {e}", {'error': str(e), 'method': 'error_fallback'}
 
@@ -1,73 +1,223 @@
 import datetime
+import math
 from typing import Tuple
-from app.transforms.geo import calculate_distance_km
-from .rate_limiter import weather_rate_limiter
-from .position_manager import get_device_position, save_device_position
+from app.cache import run_cache_script
+from app.caching import CacheScript
+from . import rate_limiter
+from .position_manager import DEVICE_POSITION_KEY_PREFIX, DEVICE_POSITION_TTL_SECONDS
 
 MOVEMENT_THRESHOLD_KM = 1.0
 WEATHER_FETCH_COOLDOWN_SECONDS = 30
 WEATHER_EXPIRATION_SECONDS = 3600
+EARTH_RADIUS_KM = 6371.0
+BURST_WINDOW_SECONDS = 300
+TRAJECTORY_SAMPLE_SECONDS = 10
 
-async def should_force_weather_update(device_id: str, current_lat: float, current_lon: float) -> Tuple[bool, str]:
-    now_utc = datetime.datetime.now(datetime.timezone.utc)
-    last_position = await get_device_position(device_id)
+REDIS_WEATHER_DECISION_SCRIPT = """
+local position_key = KEYS[1]
+local rate_key = KEYS[2]
+local burst_key = KEYS[3]
+local now_ts = tonumber(ARGV[1])
+local lat = tonumber(ARGV[2])
+local lon = tonumber(ARGV[3])
+local now_iso = ARGV[4]
+local cooldown = tonumber(ARGV[5])
+local expiration = tonumber(ARGV[6])
+local threshold_km = tonumber(ARGV[7])
+local limit = tonumber(ARGV[8])
+local burst_limit = tonumber(ARGV[9])
+local rate_ttl = tonumber(ARGV[10])
+local burst_ttl = tonumber(ARGV[11])
+local position_ttl = tonumber(ARGV[12])
+local sample_seconds = tonumber(ARGV[13])
+
+local last = redis.call('HMGET', position_key, 'last_weather_update_ts', 'lat', 'lon')
+local last_ts = tonumber(last[1])
+local reason
+
+local seen = redis.call('HMGET', position_key, 'seen_lat', 'seen_lon', 'seen_ts', 'prev_seen_lat', 'prev_seen_lon', 'prev_seen_ts')
+local anchor = {seen[4] or '', seen[5] or '', seen[6] or ''}
+local seen_ts = tonumber(seen[3])
+if seen_ts == nil or now_ts - seen_ts >= sample_seconds then
+    if seen_ts ~= nil then
+        anchor = {seen[1], seen[2], seen[3]}
+        redis.call('HSET', position_key, 'prev_seen_lat', seen[1], 'prev_seen_lon', seen[2], 'prev_seen_ts', seen[3])
+    end
+    redis.call('HSET', position_key, 'seen_lat', ARGV[2], 'seen_lon', ARGV[3], 'seen_ts', ARGV[1])
+    redis.call('EXPIRE', position_key, position_ttl)
+end
+
+local function verdict(allowed, verdict_reason, rate_note)
+    return {allowed, verdict_reason, rate_note, anchor[1], anchor[2], anchor[3]}
+end
+
+if last[1] == false and last[2] == false then
+    reason = 'first_request'
+elseif last_ts == nil then
+    reason = 'invalid_last_position'
+else
+    local age = now_ts - last_ts
+    if age < cooldown then
+        return verdict(0, string.format('cooldown_active_%.1fs', age), '')
+    end
+    if age > expiration then
+        reason = string.format('expired_%.0fs', age)
+    else
+        local last_lat = tonumber(last[2])
+        local last_lon = tonumber(last[3])
+        if last_lat == nil or last_lon == nil then
+            reason = 'moved_unknown'
+        else
+            local dlon = (lon - last_lon + 540) % 360 - 180
+            local x = math.rad(dlon) * math.cos(math.rad((lat + last_lat) / 2))
+            local y = math.rad(lat - last_lat)
+            local distance = 6371.0 * math.sqrt(x * x + y * y)
+            if distance < threshold_km then
+                return verdict(0, string.format('cached_distance_%.2fkm', distance), '')
+            end
+            reason = string.format('moved_%.2fkm', distance)
+        end
+    end
+end
+
+local current = tonumber(redis.call('GET', rate_key) or '0')
+local burst_current = tonumber(redis.call('GET', burst_key) or '0')
+local rate_reason = 'allowed'
+if current >= limit then
+    rate_reason = 'rate_limit_exceeded'
+elseif burst_current >= burst_limit then
+    rate_reason = 'burst_limit_exceeded'
+end
+
+if rate_reason ~= 'allowed' then
+    local message = string.format('Weather API: %s (%d/%d, burst: %d/%d)', rate_reason, current, limit, burst_current, burst_limit)
+    redis.call('HSET', position_key, 'lat', ARGV[2], 'lon', ARGV[3], 'last_seen', now_iso, 'rate_limit_stats', message)
+    redis.call('EXPIRE', position_key, position_ttl)
+    return verdict(0, reason, 'global_rate_limit_' .. rate_reason)
+end
+
+current = redis.call('INCR', rate_key)
+burst_current = redis.call('INCR', burst_key)
+redis.call('EXPIRE', rate_key, rate_ttl)
+redis.call('EXPIRE', burst_key, burst_ttl)
+
+local message = string.format('Weather API: allowed (%d/%d, burst: %d/%d)', current, limit, burst_current, burst_limit)
+redis.call('HSET', position_key, 'lat', ARGV[2], 'lon', ARGV[3], 'last_weather_update', now_iso,
+    'last_weather_update_ts', ARGV[1], 'rate_limit_stats', message)
+redis.call('HINCRBY', position_key, 'weather_update_count', 1)
+redis.call('EXPIRE', position_key, position_ttl)
+return verdict(1, reason, '')
+"""
+
+def _equirectangular_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlon = (lon2 - lon1 + 540) % 360 - 180
+    x = math.radians(dlon) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_KM * math.sqrt(x * x + y * y)
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _weather_decision_fallback(backend, keys, args):
+    position_key, rate_key, burst_key = keys
+    now_ts, lat, lon = float(args[0]), float(args[1]), float(args[2])
+    now_iso = args[3]
+    cooldown, expiration, threshold_km = float(args[4]), float(args[5]), float(args[6])
+    limit, burst_limit = int(args[7]), int(args[8])
+    rate_ttl, burst_ttl, position_ttl = int(args[9]), int(args[10]), int(args[11])
+    sample_seconds = float(args[12])
+
+    position = backend.read_hash(position_key)
+    last_ts = _to_float(position.get('last_weather_update_ts'))
 
-    update_needed = False
-    reason = "cached"
+    anchor = [position.get('prev_seen_lat', ''), position.get('prev_seen_lon', ''), position.get('prev_seen_ts', '')]
+    seen_ts = _to_float(position.get('seen_ts'))
+    if seen_ts is None or now_ts - seen_ts >= sample_seconds:
+        trajectory = {'seen_lat': args[1], 'seen_lon': args[2], 'seen_ts': args[0]}
+        if seen_ts is not None:
+            anchor = [position.get('seen_lat', ''), position.get('seen_lon', ''), position['seen_ts']]
+            trajectory.update({'prev_seen_lat': anchor[0], 'prev_seen_lon': anchor[1], 'prev_seen_ts': anchor[2]})
+        backend.write_hash(position_key, trajectory, position_ttl)
 
-    if not last_position:
-        update_needed = True
-        reason = "first_request"
+    def verdict(allowed, verdict_reason, rate_note):
+        return [allowed, verdict_reason, rate_note, *anchor]
+    if not position.get('last_weather_update_ts') and not position.get('lat'):
+        reason = 'first_request'
+    elif last_ts is None:
+        reason = 'invalid_last_position'
     else:
-        last_update_iso = last_position.get('last_weather_update')
-        if not last_update_iso:
-            update_needed = True
-            reason = "invalid_last_position"
+        age = now_ts - last_ts
+        if age < cooldown:
+            return verdict(0, f"cooldown_active_{age:.1f}s", '')
+        if age > expiration:
+            reason = f"expired_{age:.0f}s"
         else:
-            try:
-                last_update_time = datetime.datetime.fromisoformat(last_update_iso)
-                time_since_update = (now_utc - last_update_time).total_seconds()
-
-                if time_since_update < WEATHER_FETCH_COOLDOWN_SECONDS:
-                    return False, f"cooldown_active_{time_since_update:.1f}s"
-
-                if time_since_update > WEATHER_EXPIRATION_SECONDS:
-                    update_needed = True
-                    reason = f"expired_{time_since_update:.0f}s"
-                else:
-                    last_lat = last_position.get('lat')
-                    last_lon = last_position.get('lon')
-                    distance = calculate_distance_km(current_lat, current_lon, last_lat, last_lon) if last_lat and last_lon else float('inf')
-                    if distance >= MOVEMENT_THRESHOLD_KM:
-                        update_needed = True
-                        reason = f"moved_{distance:.2f}km"
-                    else:
-                        reason = f"cached_distance_{distance:.2f}km"
-            except (ValueError, TypeError):
-                update_needed = True
-                reason = "invalid_timestamp_format"
-
-    if not update_needed:
-        return False, reason
-
-    global_rate_ok, rate_message, rate_stats = await weather_rate_limiter.check_global_rate_limit()
-
-    if global_rate_ok:
+            last_lat, last_lon = _to_float(position.get('lat')), _to_float(position.get('lon'))
+            if last_lat is None or last_lon is None:
+                reason = 'moved_unknown'
+            else:
+                distance = _equirectangular_km(last_lat, last_lon, lat, lon)
+                if distance < threshold_km:
+                    return verdict(0, f"cached_distance_{distance:.2f}km", '')
+                reason = f"moved_{distance:.2f}km"
+
+    current = int(backend.read(rate_key) or 0)
+    burst_current = int(backend.read(burst_key) or 0)
+    rate_reason = 'allowed'
+    if current >= limit:
+        rate_reason = 'rate_limit_exceeded'
+    elif burst_current >= burst_limit:
+        rate_reason = 'burst_limit_exceeded'
+
+    if rate_reason != 'allowed':
+        message = f"Weather API: {rate_reason} ({current}/{limit}, burst: {burst_current}/{burst_limit})"
+        backend.write_hash(position_key, {'lat': args[1], 'lon': args[2], 'last_seen': now_iso, 'rate_limit_stats': message}, position_ttl)
+        return verdict(0, reason, f"global_rate_limit_{rate_reason}")
+
+    current = backend.increment(rate_key, 1, rate_ttl)
+    burst_current = backend.increment(burst_key, 1, burst_ttl)
+    backend.write_hash(position_key, {
+        'lat': args[1], 'lon': args[2], 'last_weather_update': now_iso, 'last_weather_update_ts': args[0],
+        'rate_limit_stats': f"Weather API: allowed ({current}/{limit}, burst: {burst_current}/{burst_limit})",
+        'weather_update_count': int(position.get('weather_update_count') or 0) + 1
+    }, position_ttl)
+    return verdict(1, reason, '')
+
+WEATHER_DECISION_SCRIPT = CacheScript("weather_update_decision", REDIS_WEATHER_DECISION_SCRIPT, _weather_decision_fallback)
+
+async def should_force_weather_update(device_id: str, current_lat: float, current_lon: float) -> Tuple[bool, str]:
+    now_utc = datetime.datetime.now(datetime.timezone.utc)
+    now_ts = now_utc.timestamp()
+    rate_key = f"global:weather_rate:{int(now_ts // 60)}"
+
+    try:
+        result = await run_cache_script(WEATHER_DECISION_SCRIPT, [f"{DEVICE_POSITION_KEY_PREFIX}:{device_id}", rate_key, f"{rate_key}:burst"], [
+            f"{now_ts:.3f}", str(current_lat), str(current_lon), now_utc.isoformat(),
+            str(WEATHER_FETCH_COOLDOWN_SECONDS), str(WEATHER_EXPIRATION_SECONDS), str(MOVEMENT_THRESHOLD_KM),
+            str(rate_limiter.MAX_WEATHER_FETCHES_PER_MINUTE), str(rate_limiter.BURST_WEATHER_FETCHES_LIMIT),
+            str(rate_limiter.WEATHER_QUOTA_RESET_INTERVAL), str(BURST_WINDOW_SECONDS), str(DEVICE_POSITION_TTL_SECONDS),
+            str(TRAJECTORY_SAMPLE_SECONDS)
+        ])
+    except Exception as e:
+        print(f"[{now_utc}] Weather decision script failed for {device_id}: {e}")
+        allowed, rate_message, rate_stats = rate_limiter.weather_rate_limiter.check_local_rate_limit()
+        if allowed:
+            return True, "decision_unavailable"
+        return False, f"global_rate_limit_{rate_stats.get('reason', 'exceeded')}"
+
+    verdict, reason, rate_note = int(result[0]), result[1], result[2]
+    anchor_lat, anchor_lon, anchor_ts = (_to_float(value) for value in result[3:6])
+    if anchor_ts is not None and anchor_lat is not None and anchor_lon is not None:
+        from app.weather.prefetch import weather_prefetcher
+        weather_prefetcher.observe(device_id, anchor_lat, anchor_lon, anchor_ts, current_lat, current_lon, now_ts)
+
+    if verdict:
         print(f"[{now_utc}] Device {device_id} - proceeding with fetch (reason: {reason})")
-        update_payload = {
-            'lat': current_lat, 'lon': current_lon, 'last_weather_update': now_utc.isoformat(),
-            'weather_update_count': (last_position.get('weather_update_count', 0) if last_position else 0) + 1,
-            'rate_limit_stats': rate_message
-        }
-        await save_device_position(device_id, {**(last_position or {}), **update_payload})
         return True, reason
-    else:
+    if rate_note:
         print(f"[{now_utc}] Device {device_id} - update needed ({reason}) but hit global rate limit.")
-        update_payload = {
-            'lat': current_lat, 'lon': current_lon, 'last_seen': now_utc.isoformat(),
-            'rate_limit_stats': rate_message
-        }
-        current_state = {**(last_position or {})}
-        current_state.update(update_payload)
-        await save_device_position(device_id, current_state)
-        return False, f"global_rate_limit_{rate_stats.get('reason', 'exceeded')}"
+        return False, rate_note
+    return False, reason
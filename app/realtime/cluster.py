@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+import os
+import socket
+import time
+import orjson
+import socketio
+from collections import Counter
+from typing import Dict, Optional
+from app.cache import REDIS_URL, cache_hgetall, cache_hset, cache_hdel
+
+REALTIME_MODE_SINGLE = "single"
+REALTIME_MODE_REDIS = "redis"
+REALTIME_MODE_MEMORY = "memory"
+REALTIME_MODE = os.getenv("HOARDER_REALTIME_MODE", REALTIME_MODE_SINGLE).lower()
+REALTIME_REDIS_URL = os.getenv("HOARDER_REALTIME_REDIS_URL", REDIS_URL)
+REALTIME_CHANNEL = "hoarder_socketio"
+WORKERS_KEY = "realtime:workers"
+SYNC_INTERVAL_SECONDS = 5
+WORKER_STALE_SECONDS = 20
+WORKERS_KEY_TTL = 3600
+
+def create_client_manager():
+    if REALTIME_MODE == REALTIME_MODE_REDIS:
+        return socketio.AsyncRedisManager(REALTIME_REDIS_URL, channel=REALTIME_CHANNEL)
+    if REALTIME_MODE == REALTIME_MODE_MEMORY:
+        return socketio.AsyncManager()
+    return None
+
+class RealtimeCluster:
+    def __init__(self, mode: str = REALTIME_MODE):
+        self.mode = mode
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.connection_manager = None
+        self.task: Optional[asyncio.Task] = None
+        self.workers: Dict[str, Dict] = {}
+        self.stats = {'syncs': 0, 'sync_errors': 0, 'last_sync_ms': 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in (REALTIME_MODE_REDIS, REALTIME_MODE_MEMORY)
+
+    def start(self, connection_manager):
+        self.connection_manager = connection_manager
+        if self.enabled and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.enabled:
+            try:
+                await cache_hdel(WORKERS_KEY, self.worker_id)
+            except Exception as e:
+                print(f"[{datetime.datetime.now()}] Realtime worker deregistration failed: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                self.stats['sync_errors'] += 1
+                print(f"[{datetime.datetime.now()}] Realtime cluster sync error: {e}")
+            await asyncio.sleep(SYNC_INTERVAL_SECONDS)
+
+    def snapshot(self) -> Dict:
+        manager = self.connection_manager
+        return {
+            'ts': time.time(),
+            'connections': len(manager.connections),
+            'ip_counts': manager.ip_counts,
+            'devices': list(manager.device_connections)
+        }
+
+    async def sync(self):
+        start = time.perf_counter()
+        await cache_hset(WORKERS_KEY, {self.worker_id: orjson.dumps(self.snapshot()).decode()}, WORKERS_KEY_TTL)
+        raw_workers = await cache_hgetall(WORKERS_KEY)
+
+        now = time.time()
+        workers, stale = {}, []
+        for worker_id, raw in raw_workers.items():
+            if worker_id == self.worker_id:
+                continue
+            try:
+                snapshot = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                stale.append(worker_id)
+                continue
+            if now - snapshot.get('ts', 0) > WORKER_STALE_SECONDS:
+                stale.append(worker_id)
+                continue
+            workers[worker_id] = snapshot
+        if stale:
+            await cache_hdel(WORKERS_KEY, *stale)
+
+        ip_counts = Counter()
+        devices = set()
+        for snapshot in workers.values():
+            ip_counts.update(snapshot.get('ip_counts', {}))
+            devices.update(snapshot.get('devices', []))
+
+        self.workers = workers
+        manager = self.connection_manager
+        manager.remote_connections = sum(snapshot.get('connections', 0) for snapshot in workers.values())
+        manager.remote_ip_counts = dict(ip_counts)
+        manager.remote_devices = devices
+        self.stats['syncs'] += 1
+        self.stats['last_sync_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    def get_stats(self) -> Dict:
+        local = len(self.connection_manager.connections) if self.connection_manager else 0
+        remote = sum(snapshot.get('connections', 0) for snapshot in self.workers.values())
+        return {
+            'mode': self.mode,
+            'worker_id': self.worker_id,
+            'peer_workers': len(self.workers),
+            'local_connections': local,
+            'cluster_connections': local + remote,
+            **self.stats
+        }
+
+realtime_cluster = RealtimeCluster()
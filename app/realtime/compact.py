@@ -0,0 +1,89 @@
+import msgpack
+import orjson
+from typing import Any, Dict
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+ENCODINGS = {ENCODING_JSON, ENCODING_MSGPACK}
+COMPACT_ROOM_SUFFIX = ":mp"
+
+COMPACT_FIELDS = {
+    "time_update": {
+        'device_id': 'd', 'location_date': 'ld', 'location_time': 'lt',
+        'location_timezone': 'tz', 'shared_calculation': 'sc'
+    },
+    "timezone_info": {
+        'device_id': 'd', 'timezone': 'z', 'utc_offset_seconds': 'o', 'timezone_str': 'tz',
+        'next_transition_utc': 'nt', 'next_utc_offset_seconds': 'no', 'next_timezone_str': 'ntz'
+    },
+    "device_update": {'device_id': 'd', 'data': 'p', 'seq': 's', 'stream': 'w'},
+    "device_patch": {'device_id': 'd', 'seq': 's', 'base_seq': 'b', 'stream': 'w', 'set': 'u', 'unset': 'r'}
+}
+
+DOCUMENT_KEYS = {
+    'identity': 'i', 'device_id': 'id', 'device_name': 'dn',
+    'network': 'n', 'cellular': 'c', 'operator': 'op', 'mcc': 'mc', 'mnc': 'mn', 'cell_id': 'ci', 'tac': 'ta',
+    'signal_strength': 'ss', 'type': 'ty', 'wifi': 'wf', 'active': 'ac', 'bssid': 'bs',
+    'bandwidth': 'bw', 'download_capacity': 'dl', 'upload_capacity': 'ul', 'source_ip': 'ip',
+    'location': 'l', 'coordinates': 'co', 'latitude': 'la', 'longitude': 'lo', 'accuracy': 'ay', 'altitude': 'al',
+    'speed': 'sp', 'gps_date_time': 'g', 'date': 'dt', 'time': 'tm', 'timezone': 'tz',
+    'environment': 'e', 'weather': 'w', 'description': 'de', 'temperature': 'te', 'apparent_temp': 'at',
+    'humidity': 'hu', 'precipitation': 'pr', 'pressure_msl': 'pm', 'cloud_cover': 'cc', 'wind': 'wi',
+    'gusts': 'gu', 'direction': 'di', 'observation_time': 'ot', 'last_fetch_request_time': 'lf',
+    'marine': 'm', 'wave': 'wv', 'swell_wave': 'sw', 'height': 'he', 'period': 'pe',
+    'power': 'p', 'battery': 'b', 'percent': 'pc', 'total_capacity': 'tc', 'leftover_calculated': 'lc',
+    'timestamps': 't', 'last_refresh_time_utc': 'lr'
+}
+DOCUMENT_FIELDS = {"device_update": ('data',), "device_patch": ('set',)}
+PATH_LIST_FIELDS = {"device_patch": ('unset',)}
+
+JSON_SIZE_SAMPLE_EVERY = 64
+
+_compact_stats = {'encoded': 0, 'bytes': 0, 'sampled': 0, 'sampled_bytes': 0, 'sampled_json_bytes': 0}
+
+def normalize_encoding(value: Any) -> str:
+    return value if value in ENCODINGS else ENCODING_JSON
+
+def encoded_room(room: str, encoding: str) -> str:
+    return f"{room}{COMPACT_ROOM_SUFFIX}" if encoding == ENCODING_MSGPACK else room
+
+def compact_path(path: str) -> str:
+    return ".".join(DOCUMENT_KEYS.get(part, part) for part in path.split("."))
+
+def compact_document(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {compact_path(key): compact_document(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [compact_document(item) for item in value]
+    return value
+
+def encode_compact(event: str, payload: Dict) -> bytes:
+    fields = COMPACT_FIELDS.get(event, {})
+    documents = DOCUMENT_FIELDS.get(event, ())
+    path_lists = PATH_LIST_FIELDS.get(event, ())
+    body = msgpack.packb({
+        fields.get(key, key): compact_document(value) if key in documents else
+        [compact_path(path) for path in value] if key in path_lists else value
+        for key, value in payload.items()
+    }, use_bin_type=True)
+    _compact_stats['encoded'] += 1
+    _compact_stats['bytes'] += len(body)
+    if _compact_stats['encoded'] % JSON_SIZE_SAMPLE_EVERY == 1:
+        _compact_stats['sampled'] += 1
+        _compact_stats['sampled_bytes'] += len(body)
+        _compact_stats['sampled_json_bytes'] += len(orjson.dumps(payload))
+    return body
+
+async def emit_encoded(sio, event: str, payload: Dict, room: str, encoding: str = ENCODING_JSON, **kwargs):
+    data = encode_compact(event, payload) if encoding == ENCODING_MSGPACK else payload
+    await sio.emit(event, data, room=room, **kwargs)
+
+def get_compact_stats() -> Dict:
+    return {
+        **_compact_stats,
+        'avg_bytes': round(_compact_stats['bytes'] / _compact_stats['encoded'], 1) if _compact_stats['encoded'] else 0.0,
+        'size_ratio': round(_compact_stats['sampled_bytes'] / _compact_stats['sampled_json_bytes'], 3) if _compact_stats['sampled_json_bytes'] else 0.0,
+        'sample_every': JSON_SIZE_SAMPLE_EVERY,
+        'field_maps': {event: fields for event, fields in COMPACT_FIELDS.items()},
+        'document_keys': DOCUMENT_KEYS
+    }
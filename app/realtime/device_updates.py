@@ -0,0 +1,225 @@
+import asyncio
+import datetime
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.realtime.cluster import realtime_cluster
+from app.realtime.compact import ENCODING_JSON, ENCODING_MSGPACK, emit_encoded, encoded_room, normalize_encoding
+
+DEVICE_ROOM_PREFIX = "device:"
+DEVICE_UPDATE_EVENT = "device_update"
+DEVICE_PATCH_EVENT = "device_patch"
+PUSH_INTERVAL_SECONDS = 1.0
+MAX_DIRTY_DEVICES = 5000
+FULL_RESYNC_SECONDS = 60
+PATCH_MAX_RATIO = 0.5
+
+def device_room(device_id: str) -> str:
+    return f"{DEVICE_ROOM_PREFIX}{device_id}"
+
+def flatten_document(document: Dict, prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    out = {} if out is None else out
+    for key, value in document.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flatten_document(value, f"{path}.", out)
+        else:
+            out[path] = value
+    return out
+
+def diff_documents(previous: Dict[str, Any], current: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    changed = {path: value for path, value in current.items() if path not in previous or previous[path] != value}
+    removed = [path for path in previous if path not in current]
+    return changed, removed
+
+class DeviceUpdatePublisher:
+    def __init__(self, interval: float = PUSH_INTERVAL_SECONDS, max_dirty: int = MAX_DIRTY_DEVICES):
+        self.interval = interval
+        self.max_dirty = max_dirty
+        self.sio = None
+        self.connection_manager = None
+        self.dirty: Dict[str, Optional[dict]] = {}
+        self.streams: Dict[str, Dict] = {}
+        # seq/doc are per worker, so with several realtime workers every device_update is a full document
+        self.patches_enabled = not realtime_cluster.enabled
+        self.task: Optional[asyncio.Task] = None
+        self.last_flush_ms = 0.0
+        self.stats = {
+            'notified': 0, 'coalesced': 0, 'no_subscribers': 0, 'dropped': 0,
+            'flushes': 0, 'pushes': 0, 'snapshots': 0, 'push_failures': 0,
+            'patches': 0, 'full_pushes': 0, 'unchanged': 0, 'resyncs': 0,
+            'fields_sent': 0, 'fields_total': 0
+        }
+
+    def start(self, sio, connection_manager):
+        self.sio = sio
+        self.connection_manager = connection_manager
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def has_subscribers(self, device_id: str) -> bool:
+        manager = self.connection_manager
+        return manager is not None and (device_id in manager.device_connections or device_id in manager.remote_devices)
+
+    def notify(self, device_id: str, payload: Optional[dict] = None):
+        if not self.has_subscribers(device_id):
+            self.stats['no_subscribers'] += 1
+            self.streams.pop(device_id, None)
+            return
+        if device_id in self.dirty:
+            self.stats['coalesced'] += 1
+        elif len(self.dirty) >= self.max_dirty:
+            self.stats['dropped'] += 1
+            return
+        self.dirty[device_id] = payload
+        self.stats['notified'] += 1
+
+    async def subscribe(self, sid: str, device_id: str, previous_device_id: Optional[str] = None,
+                        encoding: str = ENCODING_JSON, previous_encoding: str = ENCODING_JSON):
+        encoding = normalize_encoding(encoding)
+        if previous_device_id and (previous_device_id, previous_encoding) != (device_id, encoding):
+            await self.sio.leave_room(sid, encoded_room(device_room(previous_device_id), previous_encoding))
+        await self.sio.enter_room(sid, encoded_room(device_room(device_id), encoding))
+
+    def _subscriber_encodings(self, device_id: str) -> Set[str]:
+        manager = self.connection_manager
+        if device_id in manager.remote_devices:
+            return {ENCODING_JSON, ENCODING_MSGPACK}
+        connections = manager.connections
+        return {connections.get(sid, {}).get('encoding', ENCODING_JSON) for sid in manager.device_connections.get(device_id, ())}
+
+    def _full_message(self, device_id: str, data: Dict, seq: int) -> Dict:
+        return {'device_id': device_id, 'data': data, 'seq': seq, 'stream': realtime_cluster.worker_id}
+
+    async def send_snapshot(self, sid: str, device_id: str, payload: dict, encoding: str = ENCODING_JSON):
+        from app.utils import transform_device_data
+
+        try:
+            data = await transform_device_data(payload)
+            stream = self.streams.get(device_id) if self.patches_enabled else None
+            if stream is None:
+                seq = 0
+                if self.patches_enabled:
+                    self.streams[device_id] = {'seq': seq, 'doc': flatten_document(data), 'full_at': time.time()}
+                await emit_encoded(self.sio, DEVICE_UPDATE_EVENT, self._full_message(device_id, data, seq), sid, encoding, ignore_queue=True)
+            elif flatten_document(data) == stream['doc']:
+                await emit_encoded(self.sio, DEVICE_UPDATE_EVENT, self._full_message(device_id, data, stream['seq']), sid, encoding, ignore_queue=True)
+            else:
+                seq = stream['seq'] + 1
+                self.streams[device_id] = {'seq': seq, 'doc': flatten_document(data), 'full_at': time.time()}
+                await self._emit_to_room(device_id, DEVICE_UPDATE_EVENT, self._full_message(device_id, data, seq))
+            self.stats['snapshots'] += 1
+        except Exception as e:
+            self.stats['push_failures'] += 1
+            print(f"[{datetime.datetime.now()}] Device snapshot failed for {device_id}: {e}")
+
+    async def resync(self, sid: str, device_id: str, encoding: str = ENCODING_JSON):
+        from app.db import get_raw_latest_payload_for_device
+
+        self.stats['resyncs'] += 1
+        payload = await get_raw_latest_payload_for_device(device_id)
+        if payload:
+            await self.send_snapshot(sid, device_id, payload, encoding)
+
+    async def _emit_to_room(self, device_id: str, event: str, message: Dict):
+        for encoding in self._subscriber_encodings(device_id):
+            await emit_encoded(self.sio, event, message, encoded_room(device_room(device_id), encoding), encoding)
+            self.stats['pushes'] += 1
+
+    def _prune_streams(self):
+        for device_id in [device_id for device_id in self.streams if not self.has_subscribers(device_id)]:
+            del self.streams[device_id]
+
+    def _next_message(self, device_id: str, data: Dict, now: float) -> Tuple[Optional[str], Optional[Dict]]:
+        doc = flatten_document(data)
+        self.stats['fields_total'] += len(doc)
+        if not self.patches_enabled:
+            self.stats['full_pushes'] += 1
+            self.stats['fields_sent'] += len(doc)
+            return DEVICE_UPDATE_EVENT, self._full_message(device_id, data, 0)
+        stream = self.streams.get(device_id)
+        if stream is not None and now - stream['full_at'] < FULL_RESYNC_SECONDS:
+            changed, removed = diff_documents(stream['doc'], doc)
+            if not changed and not removed:
+                self.stats['unchanged'] += 1
+                return None, None
+            if len(changed) + len(removed) <= len(doc) * PATCH_MAX_RATIO:
+                base_seq = stream['seq']
+                stream['seq'] += 1
+                stream['doc'] = doc
+                self.stats['patches'] += 1
+                self.stats['fields_sent'] += len(changed) + len(removed)
+                return DEVICE_PATCH_EVENT, {
+                    'device_id': device_id, 'seq': stream['seq'], 'base_seq': base_seq,
+                    'stream': realtime_cluster.worker_id, 'set': changed, 'unset': removed
+                }
+
+        seq = stream['seq'] + 1 if stream is not None else 1
+        self.streams[device_id] = {'seq': seq, 'doc': doc, 'full_at': now}
+        self.stats['full_pushes'] += 1
+        self.stats['fields_sent'] += len(doc)
+        return DEVICE_UPDATE_EVENT, self._full_message(device_id, data, seq)
+
+    async def _run(self):
+        last_prune = time.time()
+        while True:
+            await asyncio.sleep(self.interval)
+            if time.time() - last_prune >= FULL_RESYNC_SECONDS:
+                self._prune_streams()
+                last_prune = time.time()
+            if not self.dirty:
+                continue
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[{datetime.datetime.now()}] Device update flush error: {e}")
+
+    async def flush(self):
+        from app.db import get_raw_latest_payload_for_device
+        from app.utils import transform_device_data
+
+        start = time.perf_counter()
+        batch, self.dirty = self.dirty, {}
+        self.stats['flushes'] += 1
+        for device_id, payload in batch.items():
+            if not self.has_subscribers(device_id):
+                continue
+            try:
+                if payload is None:
+                    payload = await get_raw_latest_payload_for_device(device_id)
+                if payload is None:
+                    continue
+                data = await transform_device_data(payload)
+                event, message = self._next_message(device_id, data, time.time())
+                if event is None:
+                    continue
+                await self._emit_to_room(device_id, event, message)
+            except Exception as e:
+                self.stats['push_failures'] += 1
+                print(f"[{datetime.datetime.now()}] Device update push failed for {device_id}: {e}")
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'pending': len(self.dirty),
+            'streams': len(self.streams),
+            'patches_enabled': self.patches_enabled,
+            'fields_sent_ratio': round(self.stats['fields_sent'] / self.stats['fields_total'], 3) if self.stats['fields_total'] else 0.0,
+            'full_resync_seconds': FULL_RESYNC_SECONDS,
+            'interval_seconds': self.interval,
+            'last_flush_ms': round(self.last_flush_ms, 2)
+        }
+
+device_update_publisher = DeviceUpdatePublisher()
+
+def notify_device_update(device_id: str, payload: Optional[dict] = None):
+    device_update_publisher.notify(device_id, payload)
@@ -0,0 +1,208 @@
+import asyncio
+import datetime
+import hmac
+import os
+import time
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+
+INGEST_NAMESPACE = "/ingest"
+INGEST_ACK_EVENT = "ack"
+INGEST_TOKEN = os.getenv("HOARDER_INGEST_TOKEN", "")
+MAX_INGEST_SESSIONS = int(os.getenv("HOARDER_INGEST_MAX_SESSIONS", "5000"))
+ACK_WINDOW = 16
+ACK_INTERVAL_SECONDS = 1.0
+RETRY_AFTER_SECONDS = 2
+READINGS_PER_MINUTE = 900
+MAX_REJECTED_PER_ACK = 32
+
+class IngestSession:
+    def __init__(self, device_id: str, client_info: Dict, compression: Optional[str]):
+        self.device_id = device_id
+        self.client_info = client_info
+        self.compression = compression
+        self.acked_seq = -1
+        self.last_seq = -1
+        self.unacked = 0
+        self.retry_from: Optional[int] = None
+        self.rejected: List[Dict] = []
+        self.window_start = time.time()
+        self.window_count = 0
+        self.last_ack_at = time.time()
+        self.lock = asyncio.Lock()
+
+    def allow_reading(self, now: float) -> bool:
+        if now - self.window_start >= 60:
+            self.window_start, self.window_count = now, 0
+        self.window_count += 1
+        return self.window_count <= READINGS_PER_MINUTE
+
+class IngestSessionManager:
+    def __init__(self, max_sessions: int = MAX_INGEST_SESSIONS):
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, IngestSession] = {}
+        self.device_sessions: Dict[str, str] = {}
+        self.sio = None
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {
+            'sessions_opened': 0, 'auth_failures': 0, 'sessions_refused': 0, 'replaced': 0,
+            'readings': 0, 'accepted': 0, 'rejected': 0, 'duplicates': 0, 'gaps': 0,
+            'throttled': 0, 'overloaded': 0, 'queue_full': 0, 'state_degraded': 0, 'errors': 0, 'awaiting_retry': 0,
+            'acks': 0, 'bytes': 0
+        }
+
+    def authenticate(self, auth) -> Optional[str]:
+        if not isinstance(auth, dict):
+            return None
+        device_id = auth.get('device_id')
+        if not isinstance(device_id, str) or not device_id.strip():
+            return None
+        if not INGEST_TOKEN or not hmac.compare_digest(str(auth.get('token', '')), INGEST_TOKEN):
+            return None
+        return device_id.strip()[:100]
+
+    def open(self, sid: str, device_id: str, client_info: Dict, compression: Optional[str] = None) -> bool:
+        replaced = self.device_sessions.get(device_id)
+        if replaced is None and len(self.sessions) >= self.max_sessions:
+            self.stats['sessions_refused'] += 1
+            return False
+        if replaced is not None:
+            self.sessions.pop(replaced, None)
+            self.stats['replaced'] += 1
+        self.sessions[sid] = IngestSession(device_id, client_info, compression)
+        self.device_sessions[device_id] = sid
+        self.stats['sessions_opened'] += 1
+        return True
+
+    def close(self, sid: str):
+        session = self.sessions.pop(sid, None)
+        if session is not None and self.device_sessions.get(session.device_id) == sid:
+            del self.device_sessions[session.device_id]
+
+    async def receive(self, sid: str, seq, payload) -> Optional[Dict]:
+        session = self.sessions.get(sid)
+        if session is None or not isinstance(seq, int):
+            return None
+        async with session.lock:
+            return await self._receive(session, seq, payload)
+
+    async def _receive(self, session: IngestSession, seq: int, payload) -> Optional[Dict]:
+        from app.api.telemetry.handler import admit_telemetry, decode_telemetry, enqueue_telemetry
+
+        self.stats['readings'] += 1
+        if seq <= session.last_seq:
+            self.stats['duplicates'] += 1
+            return self._maybe_ack(session)
+        if session.retry_from is not None:
+            if seq != session.retry_from:
+                self.stats['awaiting_retry'] += 1
+                return None
+            session.retry_from = None
+        elif seq > session.last_seq + 1 and session.last_seq >= 0:
+            self.stats['gaps'] += 1
+            return self._defer(session, session.last_seq + 1, "Sequence gap")
+
+        now = time.time()
+        if not session.allow_reading(now):
+            self.stats['throttled'] += 1
+            return self._defer(session, seq, "Rate limit exceeded")
+        try:
+            degradation_mode = await admit_telemetry()
+            if isinstance(payload, (bytes, bytearray)):
+                self.stats['bytes'] += len(payload)
+                data = await decode_telemetry(bytes(payload), session.compression)
+            elif isinstance(payload, dict):
+                data = dict(payload)
+            else:
+                raise HTTPException(status_code=400, detail="Invalid data format: expected object or binary frame")
+            data['device_id'] = session.device_id
+            client_info = {**session.client_info, 'server_received_at': datetime.datetime.now(datetime.timezone.utc).isoformat()}
+            if isinstance(payload, (bytes, bytearray)):
+                client_info['content_size_bytes'] = len(payload)
+            result = await enqueue_telemetry(data, client_info, degradation_mode)
+            if not result['critical_task_enqueued']:
+                self.stats['queue_full'] += 1
+                return self._defer(session, seq, "Task queue full")
+            if not result['state_task_enqueued']:
+                self.stats['state_degraded'] += 1
+            self.stats['accepted'] += 1
+        except HTTPException as e:
+            if e.status_code == 503:
+                self.stats['overloaded'] += 1
+                return self._defer(session, seq, e.detail)
+            self.stats['rejected'] += 1
+            if len(session.rejected) < MAX_REJECTED_PER_ACK:
+                session.rejected.append({'seq': seq, 'error': e.detail})
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"[{datetime.datetime.now()}] Ingest reading {seq} from {session.device_id} failed: {e}")
+            return self._defer(session, seq, "Processing error")
+
+        session.last_seq = seq
+        session.unacked += 1
+        return self._maybe_ack(session)
+
+    def _defer(self, session: IngestSession, seq: int, reason: str) -> Dict:
+        session.retry_from = seq
+        message = self._ack_message(session)
+        message.update({'retry_from': seq, 'retry_after': RETRY_AFTER_SECONDS, 'reason': reason})
+        return message
+
+    def _maybe_ack(self, session: IngestSession) -> Optional[Dict]:
+        if session.unacked >= ACK_WINDOW:
+            return self._ack_message(session)
+        return None
+
+    def _ack_message(self, session: IngestSession) -> Dict:
+        session.acked_seq = session.last_seq
+        session.unacked = 0
+        session.last_ack_at = time.time()
+        message = {'seq': session.acked_seq, 'rejected': session.rejected}
+        session.rejected = []
+        self.stats['acks'] += 1
+        return message
+
+    def ack_now(self, sid: str) -> Optional[Dict]:
+        session = self.sessions.get(sid)
+        return self._ack_message(session) if session is not None else None
+
+    def start(self, sio):
+        self.sio = sio
+        if not INGEST_TOKEN:
+            print(f"[{datetime.datetime.now()}] HOARDER_INGEST_TOKEN not set, {INGEST_NAMESPACE} connections will be refused")
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(ACK_INTERVAL_SECONDS)
+            now = time.time()
+            for sid, session in list(self.sessions.items()):
+                if session.unacked == 0 and not session.rejected:
+                    continue
+                if now - session.last_ack_at < ACK_INTERVAL_SECONDS:
+                    continue
+                try:
+                    await self.sio.emit(INGEST_ACK_EVENT, self._ack_message(session), to=sid, namespace=INGEST_NAMESPACE, ignore_queue=True)
+                except Exception as e:
+                    print(f"[{datetime.datetime.now()}] Ingest ack failed for {sid}: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'active_sessions': len(self.sessions),
+            'max_sessions': self.max_sessions,
+            'ack_window': ACK_WINDOW,
+            'enabled': bool(INGEST_TOKEN)
+        }
+
+ingest_sessions = IngestSessionManager()
@@ -1,4 +1,5 @@
 import asyncio
+import bisect
 import datetime
 import pytz
 import time
@@ -8,6 +9,15 @@ from timezonefinder import TimezoneFinder
 MAX_COORDINATE_GROUPS = 50
 COORDINATE_PRECISION = 3
 
+def format_utc_offset(offset: datetime.timedelta) -> str:
+    total_seconds = offset.total_seconds()
+    hours = int(total_seconds // 3600)
+    minutes = int((abs(total_seconds) % 3600) // 60)
+    sign = '+' if hours >= 0 else '-'
+    if minutes == 0:
+        return f"UTC{sign}{abs(hours)}"
+    return f"UTC{sign}{abs(hours)}:{abs(minutes):02d}"
+
 class TimezoneCalculator:
     def __init__(self):
         self.coordinate_groups = {}
@@ -44,19 +54,8 @@ class TimezoneCalculator:
                     now_utc = datetime.datetime.now(datetime.timezone.utc)
                     now_local = now_utc.replace(tzinfo=pytz.utc).astimezone(tz)
                     
-                    offset = now_local.utcoffset()
-                    total_seconds = offset.total_seconds()
-                    hours = int(total_seconds // 3600)
-                    minutes = int((abs(total_seconds) % 3600) // 60)
-                    sign = '+' if hours >= 0 else '-'
-                    
-                    if minutes == 0:
-                        timezone_str = f"UTC{sign}{abs(hours)}"
-                    else:
-                        timezone_str = f"UTC{sign}{abs(hours)}:{abs(minutes):02d}"
-                    
                     return {
-                        'timezone_str': timezone_str,
+                        'timezone_str': format_utc_offset(now_local.utcoffset()),
                         'date_str': now_local.strftime("%d.%m.%Y"),
                         'time_str': now_local.strftime("%H:%M:%S"),
                         'tz_obj': tz
@@ -70,7 +69,7 @@ class TimezoneCalculator:
             except Exception as e:
                 print(f"[{datetime.datetime.now()}] Timezone calculation error for {coord_key}: {e}")
 
-    async def get_timezone_update(self, coord_key: str) -> Optional[Dict]:
+    def get_timezone_update(self, coord_key: str, now_utc: Optional[datetime.datetime] = None, zone_cache: Optional[Dict] = None) -> Optional[Dict]:
         if coord_key not in self.timezone_results:
             return None
             
@@ -79,20 +78,49 @@ class TimezoneCalculator:
             return tz_data
             
         try:
-            def update_time():
-                now_utc = datetime.datetime.now(datetime.timezone.utc)
-                now_local = now_utc.replace(tzinfo=pytz.utc).astimezone(tz_data['tz_obj'])
-                return {
-                    'timezone_str': tz_data['timezone_str'],
-                    'date_str': now_local.strftime("%d.%m.%Y"),
-                    'time_str': now_local.strftime("%H:%M:%S")
-                }
-            
-            return await asyncio.to_thread(update_time)
+            zone = tz_data['tz_obj']
+            if zone_cache is not None and zone.zone in zone_cache:
+                return zone_cache[zone.zone]
+            now_utc = now_utc or datetime.datetime.now(datetime.timezone.utc)
+            now_local = now_utc.astimezone(zone)
+            update = {
+                'timezone_str': format_utc_offset(now_local.utcoffset()),
+                'date_str': now_local.strftime("%d.%m.%Y"),
+                'time_str': now_local.strftime("%H:%M:%S")
+            }
+            if zone_cache is not None:
+                zone_cache[zone.zone] = update
+            return update
         except Exception as e:
             print(f"[{datetime.datetime.now()}] Timezone update error for {coord_key}: {e}")
             return tz_data
 
+    def get_clock_schedule(self, coord_key: str, now_utc: Optional[datetime.datetime] = None) -> Optional[Dict]:
+        tz_data = self.timezone_results.get(coord_key)
+        if not tz_data or 'tz_obj' not in tz_data:
+            return None
+
+        zone = tz_data['tz_obj']
+        now_utc = now_utc or datetime.datetime.now(datetime.timezone.utc)
+        offset = now_utc.astimezone(zone).utcoffset()
+        schedule = {
+            'timezone': zone.zone,
+            'utc_offset_seconds': int(offset.total_seconds()),
+            'timezone_str': format_utc_offset(offset),
+            'next_transition_utc': None,
+            'next_utc_offset_seconds': None,
+            'next_timezone_str': None
+        }
+        transitions = getattr(zone, '_utc_transition_times', None)
+        if transitions:
+            index = bisect.bisect_right(transitions, now_utc.replace(tzinfo=None))
+            if index < len(transitions):
+                next_offset = zone._transition_info[index][0]
+                schedule['next_transition_utc'] = transitions[index].replace(tzinfo=datetime.timezone.utc).isoformat()
+                schedule['next_utc_offset_seconds'] = int(next_offset.total_seconds())
+                schedule['next_timezone_str'] = format_utc_offset(next_offset)
+        return schedule
+
     def cleanup_old_calculations(self):
         if len(self.coordinate_groups) >= self.max_groups:
             oldest_key = min(self.last_calculation.keys(), 
@@ -1,86 +1,177 @@
-import asyncio
+import time
 import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Set, Tuple
 from collections import defaultdict
+from app.caching import Histogram
+from app.realtime.compact import ENCODING_JSON, ENCODING_MSGPACK, emit_encoded, encoded_room, normalize_encoding
 from .calculator import TimezoneCalculator
 
+TIMEZONE_ROOM_PREFIX = "tz:"
+CLIENT_CLOCK_ROOM_PREFIX = "tzc:"
+TIME_MODE_SERVER = "server"
+TIME_MODE_CLIENT = "client"
+TIME_MODES = {TIME_MODE_SERVER, TIME_MODE_CLIENT}
+TICK_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+def timezone_room(coord_key: str, device_id: str, mode: str = TIME_MODE_SERVER, encoding: str = ENCODING_JSON) -> str:
+    prefix = CLIENT_CLOCK_ROOM_PREFIX if mode == TIME_MODE_CLIENT else TIMEZONE_ROOM_PREFIX
+    return encoded_room(f"{prefix}{coord_key}:{device_id}", encoding)
+
+def _clock_payload(device_id: str, schedule: Dict) -> Dict:
+    return {"device_id": device_id, **schedule}
+
 class SharedTimezoneManager:
     def __init__(self):
-        self.group_subscribers = defaultdict(set)
+        self.group_subscribers: Dict[str, Dict[Tuple[str, str, str], Set[str]]] = defaultdict(dict)
+        self.sid_groups: Dict[str, Tuple[str, str, str, str]] = {}
+        self.next_transitions: Dict[str, Optional[float]] = {}
         self.calculator = TimezoneCalculator()
-        
-    async def subscribe_connection(self, sid: str, device_id: str, lat, lon) -> Optional[str]:
+        self.tick_latency = Histogram(TICK_BUCKETS_MS)
+        self.tick_stats = {
+            'ticks': 0, 'emits': 0, 'emit_failures': 0, 'last_tick_ms': 0.0, 'last_tick_emits': 0,
+            'clock_schedules_sent': 0, 'transition_pushes': 0
+        }
+
+    async def subscribe_connection(self, sio, sid: str, device_id: str, lat, lon, mode: str = TIME_MODE_SERVER, encoding: str = ENCODING_JSON) -> Optional[str]:
         coord_key = self.calculator._normalize_coordinate_key(lat, lon)
         if not coord_key:
             return None
-            
+        mode = mode if mode in TIME_MODES else TIME_MODE_SERVER
+        encoding = normalize_encoding(encoding)
+
+        previous_group = self.sid_groups.get(sid)
+        if previous_group == (coord_key, device_id, mode, encoding):
+            return coord_key
+
         self.calculator.cleanup_old_calculations()
-        
+
         self.calculator.coordinate_groups[coord_key] = (float(lat), float(lon))
-        self.group_subscribers[coord_key].add((sid, device_id))
-        
+        self.group_subscribers[coord_key].setdefault((device_id, mode, encoding), set()).add(sid)
+        self.sid_groups[sid] = (coord_key, device_id, mode, encoding)
+        await sio.enter_room(sid, timezone_room(coord_key, device_id, mode, encoding))
+        if previous_group:
+            await sio.leave_room(sid, timezone_room(*previous_group))
+            await self._discard(sid, previous_group)
+
         if coord_key not in self.calculator.timezone_results:
             await self.calculator.calculate_timezone(coord_key, float(lat), float(lon))
-            
+
+        if mode == TIME_MODE_CLIENT:
+            schedule = self._refresh_schedule(coord_key)
+            if schedule:
+                await emit_encoded(sio, "timezone_info", _clock_payload(device_id, schedule), sid, encoding, ignore_queue=True)
+                self.tick_stats['clock_schedules_sent'] += 1
+
         return coord_key
-    
+
+    def _refresh_schedule(self, coord_key: str, now_utc: Optional[datetime.datetime] = None) -> Optional[Dict]:
+        schedule = self.calculator.get_clock_schedule(coord_key, now_utc)
+        if schedule is None:
+            return None
+        next_transition = schedule['next_transition_utc']
+        self.next_transitions[coord_key] = datetime.datetime.fromisoformat(next_transition).timestamp() if next_transition else None
+        return schedule
+
     async def unsubscribe_connection(self, sid: str, coord_key: Optional[str] = None):
-        if coord_key:
-            self.group_subscribers[coord_key].discard((sid, None))
-            if not self.group_subscribers[coord_key]:
-                await self._cleanup_coordinate_group(coord_key)
-        else:
-            for key in list(self.group_subscribers.keys()):
-                self.group_subscribers[key] = {
-                    (s, d) for s, d in self.group_subscribers[key] if s != sid
-                }
-                if not self.group_subscribers[key]:
-                    await self._cleanup_coordinate_group(key)
-    
+        group = self.sid_groups.pop(sid, None)
+        if group is not None:
+            await self._discard(sid, group)
+
+    async def _discard(self, sid: str, group: Tuple[str, str, str, str]):
+        coord_key, *subscriber = group
+        subscriber = tuple(subscriber)
+        devices = self.group_subscribers.get(coord_key)
+        if devices is None:
+            return
+        sids = devices.get(subscriber)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del devices[subscriber]
+        if not devices:
+            await self._cleanup_coordinate_group(coord_key)
+
     async def _cleanup_coordinate_group(self, coord_key: str):
         self.calculator.coordinate_groups.pop(coord_key, None)
         self.group_subscribers.pop(coord_key, None)
         self.calculator.timezone_results.pop(coord_key, None)
         self.calculator.last_calculation.pop(coord_key, None)
+        self.next_transitions.pop(coord_key, None)
 
     async def broadcast_timezone_updates(self, sio):
-        for coord_key, subscribers in self.group_subscribers.items():
-            if not subscribers:
+        start = time.perf_counter()
+        emits = 0
+        now_utc = datetime.datetime.now(datetime.timezone.utc)
+        zone_updates = {}
+        for coord_key, devices in list(self.group_subscribers.items()):
+            if not devices:
+                continue
+
+            emits += await self._push_transitions(sio, coord_key, devices, now_utc)
+            server_devices = [(device_id, encoding) for device_id, mode, encoding in devices if mode == TIME_MODE_SERVER]
+            if not server_devices:
                 continue
-                
-            tz_update = await self.calculator.get_timezone_update(coord_key)
+
+            tz_update = self.calculator.get_timezone_update(coord_key, now_utc, zone_updates)
             if not tz_update:
                 continue
-                
-            valid_subscribers = []
-            for sid, device_id in list(subscribers):
+
+            for device_id, encoding in server_devices:
                 try:
-                    await sio.emit("time_update", {
+                    await emit_encoded(sio, "time_update", {
                         "device_id": device_id,
                         "location_date": tz_update.get('date_str', 'N/A'),
                         "location_time": tz_update.get('time_str', 'N/A'),
                         "location_timezone": tz_update.get('timezone_str', 'N/A'),
                         "shared_calculation": True
-                    }, room=sid)
-                    valid_subscribers.append((sid, device_id))
+                    }, timezone_room(coord_key, device_id, TIME_MODE_SERVER, encoding), encoding, ignore_queue=True)
+                    emits += 1
                 except Exception:
-                    continue
-            
-            if len(valid_subscribers) != len(subscribers):
-                self.group_subscribers[coord_key] = set(valid_subscribers)
-                if not valid_subscribers:
-                    await self._cleanup_coordinate_group(coord_key)
+                    self.tick_stats['emit_failures'] += 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.tick_latency.observe(elapsed_ms)
+        self.tick_stats['ticks'] += 1
+        self.tick_stats['emits'] += emits
+        self.tick_stats['last_tick_ms'] = round(elapsed_ms, 3)
+        self.tick_stats['last_tick_emits'] = emits
+
+    async def _push_transitions(self, sio, coord_key: str, devices: Dict, now_utc: datetime.datetime) -> int:
+        next_transition = self.next_transitions.get(coord_key)
+        if next_transition is None or now_utc.timestamp() < next_transition:
+            return 0
+        schedule = self._refresh_schedule(coord_key, now_utc)
+        if not schedule:
+            return 0
+        emits = 0
+        for device_id, mode, encoding in list(devices):
+            if mode != TIME_MODE_CLIENT:
+                continue
+            try:
+                await emit_encoded(sio, "timezone_info", _clock_payload(device_id, schedule), timezone_room(coord_key, device_id, mode, encoding), encoding, ignore_queue=True)
+                emits += 1
+                self.tick_stats['transition_pushes'] += 1
+            except Exception:
+                self.tick_stats['emit_failures'] += 1
+        return emits
 
     def get_stats(self) -> Dict:
-        total_subscribers = sum(len(subs) for subs in self.group_subscribers.values())
+        total_subscribers = len(self.sid_groups)
+        rooms = sum(len(devices) for devices in self.group_subscribers.values())
+        client_clock = sum(1 for group in self.sid_groups.values() if group[2] == TIME_MODE_CLIENT)
+        compact = sum(1 for group in self.sid_groups.values() if group[3] == ENCODING_MSGPACK)
         efficiency = 0.0
         if total_subscribers > 0:
-            efficiency = (1 - len(self.calculator.coordinate_groups) / total_subscribers) * 100
-        
+            efficiency = (1 - rooms / total_subscribers) * 100
+
         return {
             'coordinate_groups': len(self.calculator.coordinate_groups),
             'total_subscribers': total_subscribers,
+            'rooms': rooms,
+            'client_clock_subscribers': client_clock,
+            'compact_subscribers': compact,
             'max_groups': self.calculator.max_groups,
             'memory_efficiency': f"{efficiency:.1f}%",
-            'cached_timezones': len(self.calculator.timezone_results)
+            'cached_timezones': len(self.calculator.timezone_results),
+            'broadcast': {**self.tick_stats, 'tick_ms': self.tick_latency.to_dict()}
         }
@@ -1,24 +1,72 @@
+import os
 import time
+import heapq
 import datetime
 import psutil
 import asyncio
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 CONNECTION_TIMEOUT = 120
 CONNECTION_RATE_LIMIT = 8
-MAX_CONNECTIONS = 100
-MEMORY_THRESHOLD_MB = 200
-AGGRESSIVE_THRESHOLD_MB = 230
+MAX_CONNECTIONS = int(os.getenv("HOARDER_WS_MAX_CONNECTIONS", "2000"))
+MEMORY_THRESHOLD_MB = int(os.getenv("HOARDER_WS_MEMORY_THRESHOLD_MB", "400"))
+AGGRESSIVE_THRESHOLD_MB = int(os.getenv("HOARDER_WS_AGGRESSIVE_THRESHOLD_MB", "460"))
+MEMORY_SAMPLE_INTERVAL_SECONDS = 5
+
+class MemorySampler:
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.value_mb: Optional[float] = None
+        self.sampled_at = 0.0
+        self.samples = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def refresh(self) -> float:
+        self.value_mb = self.process.memory_info().rss / 1024 / 1024
+        self.sampled_at = time.time()
+        self.samples += 1
+        return self.value_mb
+
+    def current_mb(self) -> float:
+        return self.value_mb if self.value_mb is not None else self.refresh()
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[{datetime.datetime.now()}] Memory sampling failed: {e}")
+            await asyncio.sleep(self.interval)
+
+memory_sampler = MemorySampler()
 
 class ConnectionManager:
     def __init__(self):
         self.connections: Dict[str, Dict] = {}
+        self.ping_heap: List[Tuple[float, str]] = []
         self.device_connections: Dict[str, set] = {}
         self.ip_counts: Dict[str, int] = {}
+        self.remote_connections = 0
+        self.remote_ip_counts: Dict[str, int] = {}
+        self.remote_devices: set = set()
         self.last_cleanup = 0
         
     def get_memory_usage_mb(self) -> float:
-        return psutil.Process().memory_info().rss / 1024 / 1024
+        return memory_sampler.current_mb()
     
     def _get_client_ip(self, environ: dict) -> str:
         forwarded = environ.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
@@ -30,13 +78,13 @@ class ConnectionManager:
             return False
         
         client_ip = self._get_client_ip(environ)
-        if self.ip_counts.get(client_ip, 0) >= CONNECTION_RATE_LIMIT:
+        if self.ip_counts.get(client_ip, 0) + self.remote_ip_counts.get(client_ip, 0) >= CONNECTION_RATE_LIMIT:
             return False
         
         memory_mb = self.get_memory_usage_mb()
         if memory_mb > AGGRESSIVE_THRESHOLD_MB:
             await self._cleanup(None, aggressive=True)
-            if self.get_memory_usage_mb() > AGGRESSIVE_THRESHOLD_MB:
+            if memory_sampler.refresh() > AGGRESSIVE_THRESHOLD_MB:
                 return False
         elif memory_mb > MEMORY_THRESHOLD_MB:
             return False
@@ -45,7 +93,9 @@ class ConnectionManager:
 
     def add_connection(self, sid: str, environ: dict):
         client_ip = self._get_client_ip(environ)
-        self.connections[sid] = {'connected_at': time.time(), 'last_ping': time.time(), 'client_ip': client_ip}
+        now = time.time()
+        self.connections[sid] = {'connected_at': now, 'last_ping': now, 'client_ip': client_ip}
+        heapq.heappush(self.ping_heap, (now, sid))
         self.ip_counts[client_ip] = self.ip_counts.get(client_ip, 0) + 1
 
     async def remove_connection(self, sid: str):
@@ -68,6 +118,7 @@ class ConnectionManager:
         
         if (old_device_id := self.connections[sid].get('device_id')) and old_device_id in self.device_connections:
             self.device_connections[old_device_id].discard(sid)
+            if not self.device_connections[old_device_id]: del self.device_connections[old_device_id]
             
         self.connections[sid]['device_id'] = device_id
         self.device_connections.setdefault(device_id, set()).add(sid)
@@ -75,12 +126,26 @@ class ConnectionManager:
     def update_ping(self, sid: str):
         if sid in self.connections: self.connections[sid]['last_ping'] = time.time()
 
+    def pop_expired(self, timeout: float, now: Optional[float] = None) -> List[str]:
+        now = now or time.time()
+        expired = []
+        while self.ping_heap and now - self.ping_heap[0][0] > timeout:
+            last_ping, sid = heapq.heappop(self.ping_heap)
+            conn = self.connections.get(sid)
+            if conn is None:
+                continue
+            if conn.get('last_ping', 0) > last_ping:
+                heapq.heappush(self.ping_heap, (conn['last_ping'], sid))
+                continue
+            expired.append(sid)
+        if len(self.ping_heap) > 2 * len(self.connections) + 64:
+            self.ping_heap = [(conn['last_ping'], sid) for sid, conn in self.connections.items()]
+            heapq.heapify(self.ping_heap)
+        return expired
+
     async def _cleanup(self, sio, aggressive: bool = False):
         timeout = 60 if aggressive else CONNECTION_TIMEOUT
-        stale_sids = [
-            sid for sid, conn in self.connections.items()
-            if time.time() - conn.get('last_ping', 0) > timeout
-        ]
+        stale_sids = self.pop_expired(timeout)
         for sid in stale_sids:
             if sio: await sio.disconnect(sid, ignore_queue=True)
             await self.remove_connection(sid)
@@ -91,6 +156,9 @@ class ConnectionManager:
         return {
             'total_connections': len(self.connections), 'max_connections': MAX_CONNECTIONS,
             'device_connections': len(self.device_connections), 'unique_ips': len(self.ip_counts),
+            'remote_connections': self.remote_connections,
             'memory_usage_mb': f"{self.get_memory_usage_mb():.1f}",
-            'memory_threshold_mb': MEMORY_THRESHOLD_MB
+            'memory_sampled_at': memory_sampler.sampled_at,
+            'memory_threshold_mb': MEMORY_THRESHOLD_MB,
+            'expiry_heap_size': len(self.ping_heap)
         }
@@ -1,9 +1,27 @@
+import hashlib
 import orjson
+from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 
+def render_pretty_json(content: any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_INDENT_2)
+
+def compute_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+def etag_response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
 class PrettyJSONResponse(JSONResponse):
     def render(self, content: any) -> bytes:
-        return orjson.dumps(
-            content,
-            option=orjson.OPT_INDENT_2
-        )
+        return render_pretty_json(content)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from app.responses import PrettyJSONResponse
+from app.cache import get_cache_stats, get_cache_family_stats, get_cache_backend
+from app.weather.http_pool import get_weather_http_pool_stats
+from app.weather.openmeteo.batcher import openmeteo_batcher
+from app.weather.openmeteo.forecast_cache import hourly_forecast_cache
+from app.weather.openmeteo.marine_mask import marine_mask
+from app.weather.enrichment import weather_enrichment_scheduler
+from app.weather.prefetch import weather_prefetcher
+
+router = APIRouter()
+
+@router.get("/stats/cache", response_class=PrettyJSONResponse)
+async def cache_stats(family: Optional[str] = Query(None, description="Only return families starting with this prefix")):
+    from app.services.weather.cache_manager import get_weather_cache_stats
+
+    families = get_cache_family_stats()
+    if family:
+        families = {name: stats for name, stats in families.items() if name.startswith(family)}
+    return {
+        "backend": get_cache_backend().name,
+        "tiers": get_cache_stats(),
+        "families": families,
+        "weather_index": get_weather_cache_stats()
+    }
+
+@router.get("/stats/weather", response_class=PrettyJSONResponse)
+async def weather_stats():
+    from app.services.weather.quota import weather_quota
+    from app.services.weather.coordinator import get_weather_provider_stats
+
+    return {
+        "quota": weather_quota.get_stats(),
+        "providers": get_weather_provider_stats(),
+        "enrichment": weather_enrichment_scheduler.get_stats(),
+        "prefetch": weather_prefetcher.get_stats(),
+        "http_pool": get_weather_http_pool_stats(),
+        "openmeteo_batching": openmeteo_batcher.get_stats(),
+        "hourly_forecast": hourly_forecast_cache.get_stats(),
+        "marine_mask": marine_mask.get_stats()
+    }
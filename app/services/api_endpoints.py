@@ -2,9 +2,15 @@ import datetime
 from fastapi import Request
 from app.responses import PrettyJSONResponse
 from app.realtime.websocket.connection_manager import ConnectionManager
+from app.realtime.timezone.manager import SharedTimezoneManager
 from app.db import get_database_size, get_total_records_summary, get_top_devices_by_records
+from app.cache import get_cache_stats
+from app.realtime.device_updates import device_update_publisher
+from app.realtime.cluster import realtime_cluster
+from app.realtime.compact import get_compact_stats
+from app.realtime.ingest import ingest_sessions
 
-def setup_api_endpoints(app, connection_manager: ConnectionManager):
+def setup_api_endpoints(app, connection_manager: ConnectionManager, shared_timezone_manager: SharedTimezoneManager):
     
     @app.get("/", response_class=PrettyJSONResponse)
     async def root_endpoints(request: Request):
@@ -28,7 +34,13 @@ def setup_api_endpoints(app, connection_manager: ConnectionManager):
                 "database_size": db_size,
                 "total_records": records_summary,
                 "top_devices_by_records": top_devices,
-                "websocket_stats": connection_stats
+                "websocket_stats": connection_stats,
+                "device_push_stats": device_update_publisher.get_stats(),
+                "timezone_stats": shared_timezone_manager.get_stats(),
+                "compact_encoding": get_compact_stats(),
+                "ingest_stats": ingest_sessions.get_stats(),
+                "realtime_cluster": realtime_cluster.get_stats(),
+                "cache_stats": get_cache_stats()
             },
             "endpoints": {
                 "self": f"{base_url}/",
@@ -2,24 +2,32 @@ import socketio
 import asyncio
 from app.core.application import create_app
 from app.core.startup import startup_handler, shutdown_handler, periodic_maintenance_task
-from app.realtime.websocket.connection_manager import ConnectionManager
+from app.realtime.websocket.connection_manager import ConnectionManager, memory_sampler
 from app.realtime.timezone.manager import SharedTimezoneManager
+from app.realtime.device_updates import device_update_publisher
+from app.realtime.cluster import create_client_manager, realtime_cluster
+from app.realtime.ingest import ingest_sessions
 from app.middleware.rate_limiter import rate_limit_middleware
 from .websocket_handlers import setup_websocket_events
+from .ingest_handlers import setup_ingest_events
 from .api_endpoints import setup_api_endpoints
 
 def create_socket_app():
     app = create_app()
     app.middleware("http")(rate_limit_middleware)
     
-    sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*", max_http_buffer_size=1024*1024)
+    sio = socketio.AsyncServer(
+        async_mode="asgi", cors_allowed_origins="*", max_http_buffer_size=1024*1024,
+        client_manager=create_client_manager()
+    )
     socket_app = socketio.ASGIApp(sio, other_asgi_app=app)
     
     connection_manager = ConnectionManager()
     shared_timezone_manager = SharedTimezoneManager()
     
-    setup_api_endpoints(app, connection_manager)
+    setup_api_endpoints(app, connection_manager, shared_timezone_manager)
     setup_websocket_events(sio, connection_manager, shared_timezone_manager)
+    setup_ingest_events(sio, connection_manager)
     setup_lifecycle_events(app, sio, connection_manager, shared_timezone_manager)
     
     return socket_app
@@ -28,8 +36,16 @@ def setup_lifecycle_events(app, sio, connection_manager, shared_timezone_manager
     @app.on_event("startup")
     async def startup():
         await startup_handler()
+        memory_sampler.start()
+        realtime_cluster.start(connection_manager)
+        device_update_publisher.start(sio, connection_manager)
+        ingest_sessions.start(sio)
         asyncio.create_task(periodic_maintenance_task(sio, connection_manager, shared_timezone_manager))
 
     @app.on_event("shutdown")
     async def shutdown():
+        await ingest_sessions.stop()
+        await device_update_publisher.stop()
+        await realtime_cluster.stop()
+        await memory_sampler.stop()
         await shutdown_handler(sio, connection_manager)
@@ -0,0 +1,41 @@
+import datetime
+from app.realtime.websocket.connection_manager import ConnectionManager
+from app.realtime.ingest import INGEST_ACK_EVENT, INGEST_NAMESPACE, ingest_sessions
+
+def setup_ingest_events(sio, connection_manager: ConnectionManager):
+
+    @sio.on("connect", namespace=INGEST_NAMESPACE)
+    async def ingest_connect(sid, environ, auth=None):
+        device_id = ingest_sessions.authenticate(auth)
+        if device_id is None:
+            ingest_sessions.stats['auth_failures'] += 1
+            return False
+
+        client_info = {
+            'source_ip': connection_manager._get_client_ip(environ),
+            'user_agent': environ.get('HTTP_USER_AGENT'),
+            'x_forwarded_for': environ.get('HTTP_X_FORWARDED_FOR'),
+            'x_real_ip': environ.get('HTTP_X_REAL_IP'),
+            'content_type': 'socket.io'
+        }
+        compression = auth.get('compression') if auth.get('compression') == "maximum" else None
+        replaced = ingest_sessions.device_sessions.get(device_id)
+        if not ingest_sessions.open(sid, device_id, client_info, compression):
+            return False
+        if replaced is not None:
+            await sio.disconnect(replaced, namespace=INGEST_NAMESPACE)
+        print(f"[{datetime.datetime.now()}] Ingest session opened for {device_id} on {sid}")
+
+    @sio.on("disconnect", namespace=INGEST_NAMESPACE)
+    async def ingest_disconnect(sid, *args):
+        ingest_sessions.close(sid)
+
+    @sio.on("reading", namespace=INGEST_NAMESPACE)
+    async def reading(sid, seq=None, payload=None):
+        ack = await ingest_sessions.receive(sid, seq, payload)
+        if ack is not None:
+            await sio.emit(INGEST_ACK_EVENT, ack, to=sid, namespace=INGEST_NAMESPACE, ignore_queue=True)
+
+    @sio.on("flush", namespace=INGEST_NAMESPACE)
+    async def flush(sid, data=None):
+        return ingest_sessions.ack_now(sid)
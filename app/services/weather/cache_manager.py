@@ -1,18 +1,23 @@
 import os
-import json
 import time
+import fcntl
+import tempfile
 import datetime
 import asyncio
-import aiofiles
-from typing import Optional, Dict, Any
-from app.transforms.geo import calculate_distance_km
+import orjson
+from collections import OrderedDict, defaultdict
+from typing import Optional, Dict, Any, Set, Tuple
+from app.transforms.geo import calculate_distance_km, grid_cell, neighbour_cells
 
 CACHE_DIR = "/tmp/weather_cache"
+INDEX_FILE = os.path.join(CACHE_DIR, "index.json")
+INDEX_LOCK_FILE = os.path.join(CACHE_DIR, "index.lock")
+INDEX_FORMAT_VERSION = 1
 CACHE_DURATION = 3600
 DISTANCE_THRESHOLD_KM = 1.0
-MAX_CACHE_FILES = 100
-MAX_CACHE_SIZE_MB = 50
-_cleanup_lock = asyncio.Lock()
+GRID_CELL_DEGREES = 0.01
+MAX_CACHE_ENTRIES = 5000
+INDEX_FLUSH_DELAY_SECONDS = 5.0
 
 WEATHER_KEYS = {
     'weather_temp', 'weather_humidity', 'weather_apparent_temp',
@@ -23,6 +28,97 @@ WEATHER_KEYS = {
     'marine_swell_wave_period'
 }
 
+class WeatherSpatialIndex:
+    def __init__(self, cell_degrees: float = GRID_CELL_DEGREES, max_entries: int = MAX_CACHE_ENTRIES):
+        self.cell_degrees = cell_degrees
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, float, float, Dict[str, Any]]]" = OrderedDict()
+        self.cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self.dirty = False
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expirations': 0, 'cells_probed': 0}
+
+    def find(self, lat: float, lon: float, now: float, record_hit: bool = True, record_miss: bool = True) -> Optional[Dict[str, Any]]:
+        best, best_distance = None, DISTANCE_THRESHOLD_KM
+        for cell in neighbour_cells(lat, lon, DISTANCE_THRESHOLD_KM, self.cell_degrees):
+            self.stats['cells_probed'] += 1
+            for key in list(self.cells.get(cell, ())):
+                entry_lat, entry_lon, stored_at, data = self.entries[key]
+                if now - stored_at > CACHE_DURATION:
+                    self.remove(key)
+                    self.stats['expirations'] += 1
+                    continue
+                distance = calculate_distance_km(lat, lon, entry_lat, entry_lon)
+                if distance <= best_distance:
+                    best, best_distance = data, distance
+        if best is not None and record_hit:
+            self.stats['hits'] += 1
+        elif best is None and record_miss:
+            self.stats['misses'] += 1
+        return best
+
+    def add(self, key: str, lat: float, lon: float, stored_at: float, data: Dict[str, Any]):
+        self.remove(key)
+        self.entries[key] = (lat, lon, stored_at, data)
+        self.cells[grid_cell(lat, lon, self.cell_degrees)].add(key)
+        self.dirty = True
+        while len(self.entries) > self.max_entries:
+            self.remove(next(iter(self.entries)))
+            self.stats['evictions'] += 1
+
+    def remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        cell = grid_cell(entry[0], entry[1], self.cell_degrees)
+        keys = self.cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+        self.dirty = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'version': INDEX_FORMAT_VERSION,
+            'entries': [[key, *entry] for key, entry in self.entries.items()]
+        }
+
+    def restore(self, snapshot: Dict[str, Any], now: float) -> int:
+        if snapshot.get('version') != INDEX_FORMAT_VERSION:
+            return 0
+        loaded = 0
+        for key, lat, lon, stored_at, data in snapshot.get('entries', []):
+            if now - stored_at <= CACHE_DURATION:
+                self.add(key, lat, lon, stored_at, data)
+                loaded += 1
+        self.dirty = False
+        return loaded
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self.entries),
+            'cells': len(self.cells),
+            'max_entries': self.max_entries,
+            'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+        }
+
+def merge_index_snapshots(local: Dict[str, Any], on_disk: Optional[Dict[str, Any]], now: float,
+                          max_entries: int = MAX_CACHE_ENTRIES) -> Dict[str, Any]:
+    merged = {}
+    for snapshot in (on_disk, local):
+        if not snapshot or snapshot.get('version') != INDEX_FORMAT_VERSION:
+            continue
+        for key, lat, lon, stored_at, data in snapshot.get('entries', []):
+            if now - stored_at <= CACHE_DURATION and (key not in merged or merged[key][2] <= stored_at):
+                merged[key] = (lat, lon, stored_at, data)
+    newest = sorted(merged.items(), key=lambda item: item[1][2])[-max_entries:]
+    return {'version': INDEX_FORMAT_VERSION, 'entries': [[key, *entry] for key, entry in newest]}
+
+_index = WeatherSpatialIndex()
+_flush_task: Optional[asyncio.Task] = None
+
 def safe_ensure_cache_dir():
     try:
         os.makedirs(CACHE_DIR, exist_ok=True)
@@ -31,69 +127,76 @@ def safe_ensure_cache_dir():
         return False
 
 def get_cache_key(lat: float, lon: float) -> str:
-    import hashlib
-    rounded_lat, rounded_lon = round(lat, 3), round(lon, 3)
-    return hashlib.md5(f"{rounded_lat}_{rounded_lon}".encode()).hexdigest()
+    return f"{round(lat, 3)}_{round(lon, 3)}"
 
-async def find_cached_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
-    if not safe_ensure_cache_dir(): return None
-    try:
-        cache_files = await asyncio.to_thread(lambda: [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith('.json')])
-    except FileNotFoundError:
-        return None
+async def find_cached_weather(lat: float, lon: float, record_miss: bool = True) -> Optional[Dict[str, Any]]:
+    return _index.find(lat, lon, time.time(), record_miss=record_miss)
 
-    for cache_path in cache_files:
-        try:
-            if time.time() - os.path.getmtime(cache_path) > CACHE_DURATION:
-                continue
-            async with aiofiles.open(cache_path, 'r') as f:
-                content = await f.read()
-            cached_data = json.loads(content)
-            
-            if calculate_distance_km(lat, lon, cached_data.get('_cache_lat', 0), cached_data.get('_cache_lon', 0)) <= DISTANCE_THRESHOLD_KM:
-                return {k: v for k, v in cached_data.items() if k in WEATHER_KEYS}
-        except Exception:
-            continue
-    return None
+def is_weather_cached(lat: float, lon: float) -> bool:
+    return _index.find(lat, lon, time.time(), record_hit=False, record_miss=False) is not None
 
 async def save_weather_cache(lat: float, lon: float, data: Dict[str, Any]):
-    if not safe_ensure_cache_dir(): return
-        
-    cache_key = get_cache_key(lat, lon)
-    cache_file = os.path.join(CACHE_DIR, f"{cache_key}.json")
-    
     cache_data = {k: v for k, v in data.items() if k in WEATHER_KEYS}
-    cache_data.update({
-        '_cache_lat': lat, '_cache_lon': lon,
-        '_cache_time': datetime.datetime.now(datetime.timezone.utc).isoformat()
-    })
-    
+    _index.add(get_cache_key(lat, lon), lat, lon, time.time(), cache_data)
+    _index.stats['stores'] += 1
+    _schedule_index_flush()
+
+def _schedule_index_flush():
+    global _flush_task
+    if _flush_task and not _flush_task.done():
+        return
+    _flush_task = asyncio.create_task(_delayed_index_flush())
+
+async def _delayed_index_flush():
+    await asyncio.sleep(INDEX_FLUSH_DELAY_SECONDS)
+    await flush_weather_cache_index()
+
+async def flush_weather_cache_index():
+    if not _index.dirty or not safe_ensure_cache_dir():
+        return
+    _index.dirty = False
     try:
-        json_content = await asyncio.to_thread(json.dumps, cache_data)
-        async with aiofiles.open(cache_file, 'w') as f:
-            await f.write(json_content)
-        await enforce_cache_limits()
+        await asyncio.to_thread(_write_index_file, _index.snapshot(), _index.max_entries)
     except Exception as e:
-        print(f"Cache write error: {e}")
+        _index.dirty = True
+        print(f"[{datetime.datetime.now()}] Weather cache index write failed: {e}")
 
-async def enforce_cache_limits():
-    async with _cleanup_lock:
+def _write_index_file(snapshot: Dict[str, Any], max_entries: int):
+    with open(INDEX_LOCK_FILE, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
         try:
-            files = await asyncio.to_thread(lambda: [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith('.json')])
-            if not files: return
-
-            files_with_meta = [(p, os.path.getsize(p), os.path.getmtime(p)) for p in files]
-            total_size_mb = sum(size for _, size, _ in files_with_meta) / (1024*1024)
-            
-            if len(files_with_meta) <= MAX_CACHE_FILES and total_size_mb <= MAX_CACHE_SIZE_MB: return
-            
-            files_with_meta.sort(key=lambda x: x[2])
-            
-            removed_count = 0
-            while len(files_with_meta) > MAX_CACHE_FILES or sum(f[1] for f in files_with_meta)/(1024*1024) > MAX_CACHE_SIZE_MB:
-                if not files_with_meta: break
-                file_to_remove = files_with_meta.pop(0)
-                os.remove(file_to_remove[0])
-                removed_count += 1
-            if removed_count > 0: print(f"[{datetime.datetime.now()}] Cache cleanup: removed {removed_count} files.")
-        except Exception: pass
+            on_disk = _read_index_file()
+            try:
+                existing = orjson.loads(on_disk) if on_disk else None
+            except orjson.JSONDecodeError:
+                existing = None
+            payload = orjson.dumps(merge_index_snapshots(snapshot, existing, time.time(), max_entries))
+            fd, temp_file = tempfile.mkstemp(dir=CACHE_DIR, prefix="index.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                os.replace(temp_file, INDEX_FILE)
+            except BaseException:
+                os.unlink(temp_file)
+                raise
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _read_index_file() -> Optional[bytes]:
+    if not os.path.exists(INDEX_FILE):
+        return None
+    with open(INDEX_FILE, 'rb') as f:
+        return f.read()
+
+async def load_weather_cache_index():
+    if not safe_ensure_cache_dir():
+        return
+    try:
+        payload = await asyncio.to_thread(_read_index_file)
+        loaded = _index.restore(orjson.loads(payload), time.time()) if payload else 0
+        print(f"[{datetime.datetime.now()}] Weather cache index loaded: {loaded} entries")
+    except Exception as e:
+        print(f"[{datetime.datetime.now()}] Weather cache index load failed: {e}")
+
+def get_weather_cache_stats() -> Dict:
+    return _index.get_stats()
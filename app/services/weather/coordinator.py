@@ -1,10 +1,10 @@
-import os
 import datetime
 import asyncio
 from typing import Optional, Dict, Any
 from collections import defaultdict
 from .api_clients import fetch_openmeteo_weather, fetch_wttr_weather
 from .cache_manager import find_cached_weather, save_weather_cache
+from .quota import weather_quota
 from app.weather.simple_breaker import weather_breaker, wttr_breaker
 
 WEATHER_CODE_DESCRIPTIONS = {
@@ -19,39 +19,20 @@ WEATHER_CODE_DESCRIPTIONS = {
     96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
 }
 
-DAILY_API_LIMIT = 9000
-REQUEST_LOG_FILE = "/tmp/weather_requests.log"
+HEDGE_ENABLED = True
+HEDGE_DEFAULT_DELAY_SECONDS = 1.5
+HEDGE_MIN_DELAY_SECONDS = 0.25
+HEDGE_MAX_DELAY_SECONDS = 2.5
 _api_locks = defaultdict(asyncio.Lock)
-
-def safe_log_api_request():
-    try:
-        timestamp = datetime.datetime.now().isoformat()
-        with open(REQUEST_LOG_FILE, 'a') as f:
-            f.write(f"{timestamp}\n")
-    except Exception:
-        pass
-
-def get_today_request_count() -> int:
-    try:
-        if not os.path.exists(REQUEST_LOG_FILE):
-            return 0
-        today = datetime.date.today()
-        count = 0
-        with open(REQUEST_LOG_FILE, 'r') as f:
-            for line in f:
-                try:
-                    request_time = datetime.datetime.fromisoformat(line.strip())
-                    if request_time.date() == today:
-                        count += 1
-                except:
-                    continue
-        return count
-    except Exception:
-        return 0
+_losing_requests = set()
+_hedge_stats = {
+    'lookups': 0, 'primary_only': 0, 'hedges_fired': 0, 'primary_wins': 0,
+    'fallback_wins': 0, 'both_failed': 0, 'sequential_fallbacks': 0
+}
 
 async def get_weather_data(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     try:
-        cached_data = await find_cached_weather(lat, lon)
+        cached_data = await find_cached_weather(lat, lon, record_miss=False)
         if cached_data:
             return cached_data
     except Exception as e:
@@ -64,28 +45,82 @@ async def get_weather_data(lat: float, lon: float) -> Optional[Dict[str, Any]]:
                 return cached_data
         except Exception:
             pass
-        if get_today_request_count() >= DAILY_API_LIMIT:
+        if weather_quota.exhausted():
             return await try_fallback_weather_api(lat, lon)
-        primary_result = await try_primary_weather_api(lat, lon)
-        if primary_result:
+        result = await fetch_with_hedging(lat, lon)
+        if result:
             try:
-                await save_weather_cache(lat, lon, primary_result)
+                await save_weather_cache(lat, lon, result)
             except Exception as e:
                 print(f"[{datetime.datetime.now()}] Cache save failed: {e}")
+            return result
+    return None
+
+def _hedge_delay() -> float:
+    p50_ms = weather_breaker.latency_percentile(0.5)
+    if p50_ms is None:
+        return HEDGE_DEFAULT_DELAY_SECONDS
+    return min(max(p50_ms / 1000, HEDGE_MIN_DELAY_SECONDS), HEDGE_MAX_DELAY_SECONDS)
+
+async def fetch_with_hedging(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    _hedge_stats['lookups'] += 1
+    primary = asyncio.create_task(try_primary_weather_api(lat, lon))
+    if HEDGE_ENABLED and wttr_breaker.allow():
+        await asyncio.wait({primary}, timeout=_hedge_delay())
+    else:
+        await asyncio.wait({primary})
+
+    if primary.done():
+        primary_result = primary.result()
+        if primary_result:
+            _hedge_stats['primary_only'] += 1
             return primary_result
+        _hedge_stats['sequential_fallbacks'] += 1
         fallback_result = await try_fallback_weather_api(lat, lon)
-        if fallback_result:
-            try:
-                await save_weather_cache(lat, lon, fallback_result)
-            except Exception as e:
-                print(f"[{datetime.datetime.now()}] Fallback cache save failed: {e}")
-            return fallback_result
+        if not fallback_result:
+            _hedge_stats['both_failed'] += 1
+        return fallback_result
+
+    _hedge_stats['hedges_fired'] += 1
+    fallback = asyncio.create_task(try_fallback_weather_api(lat, lon))
+    pending = {primary, fallback}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            result = task.result()
+            if result:
+                _hedge_stats['primary_wins' if task is primary else 'fallback_wins'] += 1
+                _finish_in_background(pending)
+                return result
+    _hedge_stats['both_failed'] += 1
     return None
 
+def _finish_in_background(tasks):
+    for task in tasks:
+        _losing_requests.add(task)
+        task.add_done_callback(_losing_requests.discard)
+
+def get_weather_provider_stats() -> Dict[str, Any]:
+    hedges = _hedge_stats['hedges_fired']
+    return {
+        'breakers': {
+            'open_meteo': weather_breaker.get_status(),
+            'wttr': wttr_breaker.get_status()
+        },
+        'hedging': {
+            **_hedge_stats,
+            'enabled': HEDGE_ENABLED,
+            'losers_in_flight': len(_losing_requests),
+            'current_delay_seconds': round(_hedge_delay(), 3),
+            'hedge_rate': round(hedges / _hedge_stats['lookups'], 3) if _hedge_stats['lookups'] else 0.0,
+            'primary_win_rate': round(_hedge_stats['primary_wins'] / hedges, 3) if hedges else 0.0,
+            'fallback_win_rate': round(_hedge_stats['fallback_wins'] / hedges, 3) if hedges else 0.0
+        }
+    }
+
 async def try_primary_weather_api(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     try:
         result = await weather_breaker.call(fetch_openmeteo_weather, lat, lon)
-        safe_log_api_request()
         if result and any(v is not None for v in result.values()):
             return result
     except Exception as e:
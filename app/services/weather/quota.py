@@ -0,0 +1,121 @@
+import os
+import asyncio
+import tempfile
+import datetime
+import orjson
+from typing import Optional, Dict
+from app.cache import cache_incr
+
+DAILY_API_LIMIT = 9000
+QUOTA_KEY_PREFIX = "weather_quota"
+QUOTA_KEY_TTL_SECONDS = 2 * 24 * 3600
+QUOTA_SNAPSHOT_FILE = "/tmp/weather_quota.json"
+QUOTA_SNAPSHOT_DELAY_SECONDS = 5.0
+
+def _utc_today() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+class DailyQuotaCounter:
+    def __init__(self, limit: int = DAILY_API_LIMIT, snapshot_file: str = QUOTA_SNAPSHOT_FILE):
+        self.limit = limit
+        self.snapshot_file = snapshot_file
+        self.day = _utc_today()
+        self.count = 0
+        self.local_count = 0
+        self.snapshot_task: Optional[asyncio.Task] = None
+        self.stats = {'mirror_errors': 0, 'rollovers': 0, 'snapshots_written': 0}
+
+    def _roll_over(self):
+        today = _utc_today()
+        if today != self.day:
+            self.day = today
+            self.count = 0
+            self.local_count = 0
+            self.stats['rollovers'] += 1
+
+    def _key(self) -> str:
+        return f"{QUOTA_KEY_PREFIX}:{self.day}"
+
+    def current(self) -> int:
+        self._roll_over()
+        return self.count
+
+    def exhausted(self) -> bool:
+        return self.current() >= self.limit
+
+    async def record(self, amount: int = 1):
+        self._roll_over()
+        self.count += amount
+        self.local_count += amount
+        try:
+            shared_count = await cache_incr(self._key(), amount, QUOTA_KEY_TTL_SECONDS)
+            self.count = max(self.count, shared_count)
+        except Exception:
+            self.stats['mirror_errors'] += 1
+        self._schedule_snapshot()
+
+    def _schedule_snapshot(self):
+        if self.snapshot_task and not self.snapshot_task.done():
+            return
+        self.snapshot_task = asyncio.create_task(self._delayed_snapshot())
+
+    async def _delayed_snapshot(self):
+        await asyncio.sleep(QUOTA_SNAPSHOT_DELAY_SECONDS)
+        await self.save()
+
+    async def save(self):
+        payload = orjson.dumps({'day': self.day, 'count': self.count})
+        try:
+            await asyncio.to_thread(self._write_snapshot, payload)
+            self.stats['snapshots_written'] += 1
+        except Exception as e:
+            print(f"[{datetime.datetime.now()}] Weather quota snapshot failed: {e}")
+
+    def _write_snapshot(self, payload: bytes):
+        directory, name = os.path.split(self.snapshot_file)
+        fd, temp_file = tempfile.mkstemp(dir=directory or ".", prefix=f"{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_file, self.snapshot_file)
+        except BaseException:
+            os.unlink(temp_file)
+            raise
+
+    def _read_snapshot(self) -> Optional[bytes]:
+        if not os.path.exists(self.snapshot_file):
+            return None
+        with open(self.snapshot_file, 'rb') as f:
+            return f.read()
+
+    async def load(self):
+        self._roll_over()
+        try:
+            payload = await asyncio.to_thread(self._read_snapshot)
+            snapshot = orjson.loads(payload) if payload else {}
+            if snapshot.get('day') == self.day:
+                self.count = max(self.count, int(snapshot.get('count', 0)))
+        except Exception as e:
+            print(f"[{datetime.datetime.now()}] Weather quota snapshot load failed: {e}")
+        try:
+            shared_count = await cache_incr(self._key(), 0, QUOTA_KEY_TTL_SECONDS)
+            if shared_count < self.count:
+                shared_count = await cache_incr(self._key(), self.count - shared_count, QUOTA_KEY_TTL_SECONDS)
+            self.count = shared_count
+        except Exception:
+            self.stats['mirror_errors'] += 1
+        print(f"[{datetime.datetime.now()}] Weather quota loaded: {self.count}/{self.limit} for {self.day}")
+
+    def get_stats(self) -> Dict:
+        count = self.current()
+        return {
+            'day': self.day,
+            'count': count,
+            'worker_count': self.local_count,
+            'limit': self.limit,
+            'remaining': max(0, self.limit - count),
+            'exhausted': count >= self.limit,
+            **self.stats
+        }
+
+weather_quota = DailyQuotaCounter()
@@ -1,6 +1,8 @@
 import datetime
 from app.realtime.websocket.connection_manager import ConnectionManager
-from app.realtime.timezone.manager import SharedTimezoneManager
+from app.realtime.timezone.manager import SharedTimezoneManager, TIME_MODE_SERVER
+from app.realtime.device_updates import device_update_publisher
+from app.realtime.compact import ENCODING_JSON, normalize_encoding
 from app.db import get_raw_latest_payload_for_device
 from app.transforms import safe_float
 
@@ -18,12 +20,7 @@ def setup_websocket_events(sio, connection_manager: ConnectionManager, shared_ti
 
     @sio.event
     async def disconnect(sid):
-        connection_data = connection_manager.connections.get(sid, {})
-        coord_key = connection_data.get('coord_key')
-        
-        if coord_key:
-            await shared_timezone_manager.unsubscribe_connection(sid, coord_key)
-        
+        await shared_timezone_manager.unsubscribe_connection(sid)
         await connection_manager.remove_connection(sid)
         print(f"[{datetime.datetime.now()}] WebSocket disconnected: {sid}")
 
@@ -32,17 +29,37 @@ def setup_websocket_events(sio, connection_manager: ConnectionManager, shared_ti
         connection_manager.update_ping(sid)
 
     @sio.on("register_device")
-    async def register_device(sid, device_id):
+    async def register_device(sid, data):
+        device_id, time_mode, encoding = data, TIME_MODE_SERVER, ENCODING_JSON
+        if isinstance(data, dict):
+            device_id, time_mode = data.get('device_id'), data.get('time_mode', TIME_MODE_SERVER)
+            encoding = normalize_encoding(data.get('encoding'))
+        connection = connection_manager.connections.get(sid, {})
+        previous_device_id, previous_encoding = connection.get('device_id'), connection.get('encoding', ENCODING_JSON)
         await connection_manager.register_device(sid, device_id)
+        device_id = connection_manager.connections.get(sid, {}).get('device_id')
+        if not device_id:
+            return
+        connection_manager.connections[sid]['encoding'] = encoding
+        await device_update_publisher.subscribe(sid, device_id, previous_device_id, encoding, previous_encoding)
         print(f"[{datetime.datetime.now()}] Device {device_id} registered for updates on {sid}")
         
         try:
             payload = await get_raw_latest_payload_for_device(device_id)
             if payload:
+                await device_update_publisher.send_snapshot(sid, device_id, payload, encoding)
                 lat, lon = safe_float(payload.get('lat')), safe_float(payload.get('lon'))
                 if lat is not None and lon is not None:
-                    coord_key = await shared_timezone_manager.subscribe_connection(sid, device_id, lat, lon)
+                    coord_key = await shared_timezone_manager.subscribe_connection(sio, sid, device_id, lat, lon, time_mode, encoding)
                     if coord_key and sid in connection_manager.connections:
                         connection_manager.connections[sid]['coord_key'] = coord_key
         except Exception as e:
             print(f"[{datetime.datetime.now()}] Error registering device timezone: {e}")
+
+    @sio.on("request_resync")
+    async def request_resync(sid, data=None):
+        connection = connection_manager.connections.get(sid)
+        if not connection or not connection.get('device_id'):
+            return
+        connection_manager.update_ping(sid)
+        await device_update_publisher.resync(sid, connection['device_id'], connection.get('encoding', ENCODING_JSON))
@@ -13,7 +13,7 @@ from app.shared.time.formatters import (
     get_current_location_time,
     format_last_refresh_time
 )
-from .geo import calculate_distance_km
+from .geo import calculate_distance_km, grid_cell, neighbour_cells, initial_bearing_deg, destination_point
 
 __all__ = [
     'safe_int',
@@ -27,5 +27,9 @@ __all__ = [
     'format_last_refresh_time',
     'get_timezone_info_from_coordinates',
     'calculate_distance_km',
+    'grid_cell',
+    'neighbour_cells',
+    'initial_bearing_deg',
+    'destination_point',
     'WEATHER_CODE_DESCRIPTIONS'
 ]
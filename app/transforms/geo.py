@@ -26,3 +26,54 @@ def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) ->
 
     distance = R * c
     return distance
+
+KM_PER_DEGREE_LAT = 111.32
+
+def grid_cell(lat: float, lon: float, cell_degrees: float) -> tuple:
+    """
+    Return the (row, column) index of the fixed-size lat/lon grid cell
+    containing the given point. Columns wrap at the antimeridian.
+    """
+    columns = round(360 / cell_degrees)
+    return math.floor(lat / cell_degrees), math.floor(lon / cell_degrees) % columns
+
+def neighbour_cells(lat: float, lon: float, radius_km: float, cell_degrees: float) -> list:
+    """
+    Return every grid cell that may contain a point within radius_km of
+    (lat, lon). Longitude span widens with latitude since meridians converge.
+    """
+    row, column = grid_cell(lat, lon, cell_degrees)
+    columns = round(360 / cell_degrees)
+    lat_span = math.ceil(radius_km / (KM_PER_DEGREE_LAT * cell_degrees))
+    km_per_degree_lon = KM_PER_DEGREE_LAT * max(math.cos(math.radians(min(abs(lat), 89.9))), 1e-3)
+    lon_span = min(math.ceil(radius_km / (km_per_degree_lon * cell_degrees)), columns // 2)
+    return [
+        (row + d_row, (column + d_col) % columns)
+        for d_row in range(-lat_span, lat_span + 1)
+        for d_col in range(-lon_span, lon_span + 1)
+    ]
+
+def initial_bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Return the initial great-circle bearing from the first point towards
+    the second, in degrees clockwise from north (0-360).
+    """
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    dlon = math.radians(lon2 - lon1)
+    x = math.sin(dlon) * math.cos(lat2_rad)
+    y = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(lat2_rad) * math.cos(dlon)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+def destination_point(lat: float, lon: float, bearing_deg: float, distance_km: float) -> tuple:
+    """
+    Return the (lat, lon) reached by travelling distance_km along a
+    great circle from (lat, lon) with the given initial bearing.
+    """
+    R = 6371.0
+    angular = distance_km / R
+    bearing = math.radians(bearing_deg)
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2 = math.asin(math.sin(lat1) * math.cos(angular) + math.cos(lat1) * math.sin(angular) * math.cos(bearing))
+    lon2 = lon1 + math.atan2(math.sin(bearing) * math.sin(angular) * math.cos(lat1),
+                             math.cos(angular) - math.sin(lat1) * math.sin(lat2))
+    return math.degrees(lat2), (math.degrees(lon2) + 540) % 360 - 180
@@ -0,0 +1,84 @@
+import asyncio
+import datetime
+import time
+from typing import Dict, Optional
+from app.caching import Histogram
+from app.db import patch_latest_state
+from .utils import enrich_with_weather_data, safe_device_id_extraction
+
+MAX_CONCURRENT_ENRICHMENTS = 8
+MAX_PENDING_DEVICES = 2000
+ENRICHMENT_TIMEOUT_SECONDS = 6
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 6000)
+
+class WeatherEnrichmentScheduler:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_ENRICHMENTS, max_pending: int = MAX_PENDING_DEVICES):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.pending: Dict[str, dict] = {}
+        self.runners: Dict[str, asyncio.Task] = {}
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.stats = {
+            'scheduled': 0, 'coalesced': 0, 'dropped': 0, 'completed': 0,
+            'patched': 0, 'no_weather': 0, 'timeouts': 0, 'failures': 0
+        }
+
+    def schedule(self, data: dict) -> bool:
+        device_id = safe_device_id_extraction(data)
+        if not device_id or not (data.get('lat') and data.get('lon')):
+            return False
+        if device_id in self.pending:
+            self.stats['coalesced'] += 1
+        elif len(self.pending) >= self.max_pending:
+            self.stats['dropped'] += 1
+            return False
+        self.pending[device_id] = data
+        self.stats['scheduled'] += 1
+        if device_id not in self.runners:
+            self.runners[device_id] = asyncio.create_task(self._run_device(device_id))
+        return True
+
+    async def _run_device(self, device_id: str):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            while device_id in self.pending:
+                async with self.semaphore:
+                    data = self.pending.pop(device_id, None)
+                    if data is not None:
+                        await self._enrich_and_patch(device_id, data)
+        finally:
+            self.runners.pop(device_id, None)
+
+    async def _enrich_and_patch(self, device_id: str, data: dict):
+        from app.services.weather.cache_manager import WEATHER_KEYS
+
+        start = time.perf_counter()
+        try:
+            enriched = await asyncio.wait_for(enrich_with_weather_data(dict(data)), timeout=ENRICHMENT_TIMEOUT_SECONDS)
+            weather_fields = {k: v for k, v in enriched.items() if k in WEATHER_KEYS and v is not None and data.get(k) != v}
+            if weather_fields:
+                if await patch_latest_state(device_id, weather_fields):
+                    self.stats['patched'] += 1
+            else:
+                self.stats['no_weather'] += 1
+            self.stats['completed'] += 1
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+        except Exception as e:
+            self.stats['failures'] += 1
+            print(f"[{datetime.datetime.now(datetime.timezone.utc)}] ERROR: Background weather enrichment failed for {device_id}: {e}")
+        finally:
+            self.latency.observe((time.perf_counter() - start) * 1000)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'pending': len(self.pending),
+            'running': len(self.runners),
+            'max_concurrency': self.max_concurrency,
+            'latency_ms': self.latency.to_dict()
+        }
+
+weather_enrichment_scheduler = WeatherEnrichmentScheduler()
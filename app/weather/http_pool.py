@@ -0,0 +1,83 @@
+import datetime
+import httpx
+from typing import Optional, Dict, Any
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+DEFAULT_TIMEOUT = httpx.Timeout(connect=2.0, read=3.0, write=2.0, pool=5.0)
+
+_client: Optional[httpx.AsyncClient] = None
+_pool_stats = {
+    'requests': 0, 'responses': 0, 'connections_opened': 0, 'tls_handshakes': 0,
+    'connect_failures': 0, 'clients_created': 0, 'created_at': None
+}
+
+async def _trace(event_name: str, info: Dict[str, Any]):
+    if event_name == 'connection.connect_tcp.complete':
+        _pool_stats['connections_opened'] += 1
+    elif event_name == 'connection.start_tls.complete':
+        _pool_stats['tls_handshakes'] += 1
+    elif event_name == 'connection.connect_tcp.failed':
+        _pool_stats['connect_failures'] += 1
+
+async def _on_request(request: httpx.Request):
+    _pool_stats['requests'] += 1
+    request.extensions['trace'] = _trace
+
+async def _on_response(response: httpx.Response):
+    _pool_stats['responses'] += 1
+
+def _create_client() -> httpx.AsyncClient:
+    _pool_stats['clients_created'] += 1
+    _pool_stats['created_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+        ),
+        http2=HTTP2_AVAILABLE,
+        headers={'User-Agent': 'hoarder-server/3.3.0'},
+        event_hooks={'request': [_on_request], 'response': [_on_response]}
+    )
+
+async def init_weather_http_client():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+        print(f"[{datetime.datetime.now()}] Weather HTTP client initialized (http2={HTTP2_AVAILABLE})")
+
+async def close_weather_http_client():
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+def get_weather_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+def get_weather_http_pool_stats() -> Dict:
+    connections = []
+    if _client is not None and not _client.is_closed:
+        connections = getattr(getattr(_client._transport, '_pool', None), 'connections', [])
+    requests = _pool_stats['requests']
+    return {
+        **_pool_stats,
+        'http2': HTTP2_AVAILABLE,
+        'open_connections': len(connections),
+        'idle_connections': sum(1 for connection in connections if connection.is_idle()),
+        'max_connections': MAX_CONNECTIONS,
+        'max_keepalive_connections': MAX_KEEPALIVE_CONNECTIONS,
+        'connection_reuse_ratio': round(1 - _pool_stats['connections_opened'] / requests, 3) if requests else 0.0
+    }
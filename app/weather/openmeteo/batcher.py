@@ -0,0 +1,73 @@
+import asyncio
+import datetime
+from typing import Optional, Dict, Tuple, List
+from .config import BATCH_WINDOW_SECONDS, MAX_BATCH_LOCATIONS, TOTAL_TIMEOUT
+from .http_client import fetch_weather_batch
+
+class OpenMeteoBatcher:
+    def __init__(self, window_seconds: float = BATCH_WINDOW_SECONDS, max_locations: int = MAX_BATCH_LOCATIONS):
+        self.window_seconds = window_seconds
+        self.max_locations = max_locations
+        self.pending: Dict[str, Tuple[float, float, asyncio.Future]] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {
+            'lookups': 0, 'coalesced': 0, 'batches': 0, 'locations_sent': 0,
+            'largest_batch': 0, 'failed_batches': 0
+        }
+
+    async def fetch(self, lat: float, lon: float) -> Tuple[Optional[Dict], Optional[Dict]]:
+        self.stats['lookups'] += 1
+        key = f"{round(float(lat), 4)},{round(float(lon), 4)}"
+        pending = self.pending.get(key)
+        if pending:
+            self.stats['coalesced'] += 1
+            future = pending[2]
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[key] = (lat, lon, future)
+            if len(self.pending) >= self.max_locations:
+                self._flush()
+            elif self.flush_handle is None:
+                self.flush_handle = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+        return await asyncio.wait_for(asyncio.shield(future), timeout=self.window_seconds + TOTAL_TIMEOUT)
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+        batch, self.pending = list(self.pending.values()), {}
+        asyncio.create_task(self._send(batch))
+
+    async def _send(self, batch: List[Tuple[float, float, asyncio.Future]]):
+        from app.services.weather.quota import weather_quota
+
+        self.stats['batches'] += 1
+        self.stats['locations_sent'] += len(batch)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        try:
+            results, extra_requests = await fetch_weather_batch([(lat, lon) for lat, lon, _ in batch])
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            await weather_quota.record(1 + extra_requests)
+        except Exception as e:
+            self.stats['failed_batches'] += 1
+            print(f"[{datetime.datetime.now()}] OpenMeteo batch of {len(batch)} locations failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+
+    def get_stats(self) -> Dict:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'pending': len(self.pending),
+            'avg_batch_size': round(self.stats['locations_sent'] / batches, 2) if batches else 0.0,
+            'window_seconds': self.window_seconds,
+            'max_locations': self.max_locations
+        }
+
+openmeteo_batcher = OpenMeteoBatcher()
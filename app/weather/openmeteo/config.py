@@ -1,3 +1,4 @@
+import os
 import httpx
 
 WEATHER_PARAMS = [
@@ -11,24 +12,61 @@ MARINE_PARAMS = [
     'swell_wave_height', 'swell_wave_direction', 'swell_wave_period'
 ]
 
-WEATHER_API_URL = 'https://api.open-meteo.com/v1/forecast'
-MARINE_API_URL = 'https://marine-api.open-meteo.com/v1/marine'
+WEATHER_API_URL = os.getenv("HOARDER_OPENMETEO_URL", 'https://api.open-meteo.com/v1/forecast')
+MARINE_API_URL = os.getenv("HOARDER_OPENMETEO_MARINE_URL", 'https://marine-api.open-meteo.com/v1/marine')
 
 TIMEOUT_CONFIG = httpx.Timeout(connect=2.0, read=3.0, write=2.0, pool=5.0)
 TOTAL_TIMEOUT = 4.0
+BATCH_WINDOW_SECONDS = 0.2
+MAX_BATCH_LOCATIONS = 50
 
-def get_weather_params(lat: float, lon: float) -> dict:
+HOURLY_FORECAST_ENABLED = os.getenv("HOARDER_WEATHER_HOURLY_FORECAST", "0") == "1"
+FORECAST_HOURS = 48
+FORECAST_CELL_DEGREES = 0.05
+FORECAST_TTL_SECONDS = 6 * 3600
+
+def get_marine_params(lat: float, lon: float) -> dict:
     return {
         'latitude': lat,
         'longitude': lon,
-        'current': WEATHER_PARAMS,
+        'current': MARINE_PARAMS,
         'timezone': 'auto'
     }
 
-def get_marine_params(lat: float, lon: float) -> dict:
+def get_hourly_weather_params(lat: float, lon: float) -> dict:
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'hourly': WEATHER_PARAMS,
+        'past_hours': 1,
+        'forecast_hours': FORECAST_HOURS,
+        'timeformat': 'unixtime',
+        'timezone': 'auto'
+    }
+
+def get_hourly_marine_params(lat: float, lon: float) -> dict:
     return {
         'latitude': lat,
         'longitude': lon,
+        'hourly': MARINE_PARAMS,
+        'past_hours': 1,
+        'forecast_hours': FORECAST_HOURS,
+        'timeformat': 'unixtime',
+        'timezone': 'auto'
+    }
+
+def get_batch_weather_params(locations: list) -> dict:
+    return {
+        'latitude': ','.join(str(lat) for lat, _ in locations),
+        'longitude': ','.join(str(lon) for _, lon in locations),
+        'current': WEATHER_PARAMS,
+        'timezone': 'auto'
+    }
+
+def get_batch_marine_params(locations: list) -> dict:
+    return {
+        'latitude': ','.join(str(lat) for lat, _ in locations),
+        'longitude': ','.join(str(lon) for _, lon in locations),
         'current': MARINE_PARAMS,
         'timezone': 'auto'
     }
@@ -47,5 +85,15 @@ def get_client_info():
             'pool': 5.0,
             'total': TOTAL_TIMEOUT
         },
+        'hourly_forecast': {
+            'enabled': HOURLY_FORECAST_ENABLED,
+            'hours': FORECAST_HOURS,
+            'cell_degrees': FORECAST_CELL_DEGREES,
+            'ttl_seconds': FORECAST_TTL_SECONDS
+        },
+        'batching': {
+            'window_seconds': BATCH_WINDOW_SECONDS,
+            'max_locations': MAX_BATCH_LOCATIONS
+        },
         'data_types': ['weather', 'marine']
     }
@@ -0,0 +1,125 @@
+import bisect
+import datetime
+import time
+import httpx
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, List, Any
+from app.caching import SingleFlight
+from app.transforms.geo import grid_cell
+from .config import FORECAST_CELL_DEGREES, FORECAST_TTL_SECONDS
+from .http_client import fetch_hourly_forecast
+from .marine_mask import marine_mask, skipped_marine_payload
+
+MAX_FORECAST_CELLS = 2000
+CURRENT_INTERVAL_SECONDS = 900
+CIRCULAR_PARAMS = {'wind_direction_10m', 'wave_direction', 'swell_wave_direction'}
+NEAREST_PARAMS = {'weather_code'}
+
+def _interpolate(name: str, before: Any, after: Any, fraction: float) -> Any:
+    if before is None or after is None or name in NEAREST_PARAMS:
+        nearest, other = (before, after) if fraction < 0.5 else (after, before)
+        return nearest if nearest is not None else other
+    if name in CIRCULAR_PARAMS:
+        delta = ((after - before + 180) % 360) - 180
+        return round((before + delta * fraction) % 360, 1)
+    return round(before + (after - before) * fraction, 2)
+
+class HourlySeries:
+    def __init__(self, payload: Dict):
+        hourly = payload.get('hourly') or {}
+        self.times: List[int] = [int(t) for t in hourly.get('time', [])]
+        self.values = {name: series for name, series in hourly.items() if name != 'time'}
+        self.utc_offset = int(payload.get('utc_offset_seconds') or 0)
+
+    def covers(self, timestamp: float) -> bool:
+        return len(self.times) >= 2 and self.times[0] <= timestamp <= self.times[-1]
+
+    def current_at(self, timestamp: float) -> Dict[str, Dict]:
+        index = min(max(bisect.bisect_right(self.times, timestamp) - 1, 0), len(self.times) - 2)
+        start, end = self.times[index], self.times[index + 1]
+        fraction = (timestamp - start) / (end - start) if end > start else 0.0
+        current = {
+            name: _interpolate(name, series[index], series[index + 1], fraction)
+            for name, series in self.values.items() if len(series) > index + 1
+        }
+        label = int(timestamp) - int(timestamp) % CURRENT_INTERVAL_SECONDS + self.utc_offset
+        current['time'] = datetime.datetime.fromtimestamp(label, tz=datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M')
+        return {'current': current}
+
+class HourlyForecastCache:
+    def __init__(self, cell_degrees: float = FORECAST_CELL_DEGREES, ttl: float = FORECAST_TTL_SECONDS, max_cells: int = MAX_FORECAST_CELLS):
+        self.cell_degrees = cell_degrees
+        self.ttl = ttl
+        self.max_cells = max_cells
+        self.cells: "OrderedDict[Tuple[int, int], Tuple[float, HourlySeries, Optional[HourlySeries]]]" = OrderedDict()
+        self.single_flight = SingleFlight()
+        self.stats = {'hits': 0, 'misses': 0, 'fetches': 0, 'fetch_errors': 0, 'expired': 0, 'evictions': 0}
+
+    async def get_current(self, lat: float, lon: float) -> Tuple[Optional[Dict], Optional[Dict]]:
+        cell = grid_cell(lat, lon, self.cell_degrees)
+        now = time.time()
+        entry = self._fresh_entry(cell, now)
+        if entry is None:
+            self.stats['misses'] += 1
+            entry = await self.single_flight.do(f"{cell[0]}:{cell[1]}", lambda: self._load(cell))
+        else:
+            self.stats['hits'] += 1
+        _, weather_series, marine_series = entry
+        if marine_series and marine_series.covers(now):
+            marine_current = marine_series.current_at(now)
+        else:
+            marine_current = skipped_marine_payload() if marine_mask.is_unavailable(lat, lon) else None
+        return weather_series.current_at(now), marine_current
+
+    def _fresh_entry(self, cell: Tuple[int, int], now: float):
+        entry = self.cells.get(cell)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl or not entry[1].covers(now):
+            del self.cells[cell]
+            self.stats['expired'] += 1
+            return None
+        self.cells.move_to_end(cell)
+        return entry
+
+    async def _load(self, cell: Tuple[int, int]):
+        from app.services.weather.quota import weather_quota
+
+        center_lat = round((cell[0] + 0.5) * self.cell_degrees, 4)
+        center_lon = round((cell[1] + 0.5) * self.cell_degrees, 4)
+        if center_lon > 180:
+            center_lon = round(center_lon - 360, 4)
+        self.stats['fetches'] += 1
+        try:
+            weather_data, marine_data = await fetch_hourly_forecast(center_lat, center_lon)
+        except httpx.HTTPStatusError:
+            self.stats['fetch_errors'] += 1
+            await weather_quota.record()
+            raise
+        except Exception:
+            self.stats['fetch_errors'] += 1
+            raise
+        await weather_quota.record()
+
+        weather_series = HourlySeries(weather_data) if weather_data else None
+        if weather_series is None or not weather_series.covers(time.time()):
+            self.stats['fetch_errors'] += 1
+            raise Exception("OpenMeteo forecast returned no usable hourly data")
+        entry = (time.time(), weather_series, HourlySeries(marine_data) if marine_data else None)
+        self.cells[cell] = entry
+        while len(self.cells) > self.max_cells:
+            self.cells.popitem(last=False)
+            self.stats['evictions'] += 1
+        return entry
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'cells': len(self.cells),
+            'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            'cell_degrees': self.cell_degrees,
+            'ttl_seconds': self.ttl
+        }
+
+hourly_forecast_cache = HourlyForecastCache()
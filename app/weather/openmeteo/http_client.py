@@ -1,57 +1,141 @@
 import asyncio
 import httpx
-import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List
+from app.weather.http_pool import get_weather_http_client
+from .marine_mask import marine_mask, skipped_marine_payload
 from .config import (
     WEATHER_API_URL, MARINE_API_URL, TIMEOUT_CONFIG, TOTAL_TIMEOUT,
-    get_weather_params, get_marine_params
+    get_marine_params, get_batch_weather_params, get_batch_marine_params,
+    get_hourly_weather_params, get_hourly_marine_params
 )
 
-async def fetch_weather_data(lat: float, lon: float) -> Tuple[Optional[Dict], Optional[Dict]]:
-    weather_params = get_weather_params(lat, lon)
-    marine_params = get_marine_params(lat, lon)
-    
-    async with httpx.AsyncClient(timeout=TIMEOUT_CONFIG) as client:
-        try:
-            weather_task = client.get(WEATHER_API_URL, params=weather_params)
-            marine_task = client.get(MARINE_API_URL, params=marine_params)
-            
-            weather_response, marine_response = await asyncio.wait_for(
-                asyncio.gather(weather_task, marine_task, return_exceptions=True), 
-                timeout=TOTAL_TIMEOUT
-            )
+MIN_MARINE_FALLBACK_SECONDS = 0.5
+MARINE_FALLBACK_MARGIN_SECONDS = 0.25
+
+async def _get_marine(client: httpx.AsyncClient, params: Optional[Dict]) -> Optional[httpx.Response]:
+    if params is None:
+        return None
+    return await client.get(MARINE_API_URL, params=params, timeout=TIMEOUT_CONFIG)
+
+async def _fetch_weather_and_marine(weather_params: Dict, marine_params: Optional[Dict]) -> Tuple[Any, Optional[httpx.Response]]:
+    client = get_weather_http_client()
+    weather_response, marine_response = await asyncio.wait_for(
+        asyncio.gather(
+            client.get(WEATHER_API_URL, params=weather_params, timeout=TIMEOUT_CONFIG),
+            _get_marine(client, marine_params),
+            return_exceptions=True
+        ),
+        timeout=TOTAL_TIMEOUT
+    )
+
+    weather_data = None
+    if not isinstance(weather_response, Exception):
+        weather_response.raise_for_status()
+        weather_data = weather_response.json()
+
+    return weather_data, (None if isinstance(marine_response, Exception) else marine_response)
+
+def _marine_payload(lat: float, lon: float, marine_response: Optional[httpx.Response]) -> Optional[Dict]:
+    if marine_response is None:
+        return None
+    if not marine_response.is_success:
+        marine_mask.record_response(lat, lon, marine_response.status_code, None)
+        return skipped_marine_payload() if marine_mask.is_unavailable(lat, lon) else None
+    marine_data = marine_response.json()
+    marine_mask.record_response(lat, lon, marine_response.status_code, marine_data)
+    return marine_data
+
+async def fetch_hourly_forecast(lat: float, lon: float) -> Tuple[Optional[Dict], Optional[Dict]]:
+    skip_marine = marine_mask.should_skip(lat, lon)
+    try:
+        weather_data, marine_response = await _fetch_weather_and_marine(
+            get_hourly_weather_params(lat, lon), None if skip_marine else get_hourly_marine_params(lat, lon)
+        )
+        marine_data = None if skip_marine else _marine_payload(lat, lon, marine_response)
+        return weather_data, marine_data
+        
+    except asyncio.TimeoutError:
+        raise asyncio.TimeoutError("OpenMeteo forecast timeout")
+    except httpx.HTTPStatusError as e:
+        raise e
+    except Exception as e:
+        raise Exception(f"OpenMeteo forecast error: {str(e)}")
 
-            weather_data = None
-            marine_data = None
-            
-            if not isinstance(weather_response, Exception):
-                weather_response.raise_for_status()
-                weather_data = weather_response.json()
-
-            if not isinstance(marine_response, Exception):
-                marine_response.raise_for_status()
-                marine_data = marine_response.json()
-            
-            return weather_data, marine_data
-            
-        except asyncio.TimeoutError:
-            raise asyncio.TimeoutError("OpenMeteo API timeout")
-        except httpx.HTTPStatusError as e:
-            raise e
-        except Exception as e:
-            raise Exception(f"OpenMeteo API error: {str(e)}")
+def _is_client_error(response: Optional[httpx.Response]) -> bool:
+    return response is not None and 400 <= response.status_code < 500 and response.status_code != 429
+
+async def _fetch_marine_individually(locations: List[Tuple[float, float]], timeout: float) -> List[Optional[Dict]]:
+    client = get_weather_http_client()
+    try:
+        responses = await asyncio.wait_for(
+            asyncio.gather(*(_get_marine(client, get_marine_params(lat, lon)) for lat, lon in locations), return_exceptions=True),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        return [None] * len(locations)
+    return [
+        None if isinstance(response, Exception) else _marine_payload(lat, lon, response)
+        for (lat, lon), response in zip(locations, responses)
+    ]
+
+def _split_locations(payload: Any, count: int) -> List[Optional[Dict]]:
+    if payload is None:
+        return [None] * count
+    items = payload if isinstance(payload, list) else [payload]
+    return [items[i] if i < len(items) else None for i in range(count)]
+
+async def fetch_weather_batch(locations: List[Tuple[float, float]]) -> Tuple[List[Tuple[Optional[Dict], Optional[Dict]]], int]:
+    deadline = asyncio.get_running_loop().time() + TOTAL_TIMEOUT
+    extra_requests = 0
+    marine_indexes = [i for i, (lat, lon) in enumerate(locations) if not marine_mask.should_skip(lat, lon)]
+    marine_locations = [locations[i] for i in marine_indexes]
+    try:
+        weather_data, marine_response = await _fetch_weather_and_marine(
+            get_batch_weather_params(locations),
+            get_batch_marine_params(marine_locations) if marine_locations else None
+        )
+
+        marine_results: List[Optional[Dict]] = [skipped_marine_payload() for _ in locations]
+        if len(marine_locations) == 1:
+            marine_results[marine_indexes[0]] = _marine_payload(*marine_locations[0], marine_response)
+        elif _is_client_error(marine_response):
+            remaining = deadline - asyncio.get_running_loop().time() - MARINE_FALLBACK_MARGIN_SECONDS
+            marine_items = [None] * len(marine_locations)
+            if remaining >= MIN_MARINE_FALLBACK_SECONDS:
+                extra_requests = len(marine_locations)
+                marine_items = await _fetch_marine_individually(marine_locations, remaining)
+            for index, marine_data in zip(marine_indexes, marine_items):
+                marine_results[index] = marine_data
+        elif marine_locations:
+            marine_items = _split_locations(
+                marine_response.json() if marine_response is not None and marine_response.is_success else None,
+                len(marine_locations)
+            )
+            for index, (lat, lon), marine_data in zip(marine_indexes, marine_locations, marine_items):
+                if marine_data is not None:
+                    marine_mask.record_response(lat, lon, marine_response.status_code, marine_data)
+                marine_results[index] = marine_data
+        
+        return list(zip(_split_locations(weather_data, len(locations)), marine_results)), extra_requests
+        
+    except asyncio.TimeoutError:
+        raise asyncio.TimeoutError("OpenMeteo API timeout")
+    except httpx.HTTPStatusError as e:
+        raise e
+    except Exception as e:
+        raise Exception(f"OpenMeteo API error: {str(e)}")
 
 async def test_api_connectivity() -> Dict[str, bool]:
     try:
-        async with httpx.AsyncClient(timeout=TIMEOUT_CONFIG) as client:
-            weather_task = asyncio.create_task(client.get(WEATHER_API_URL, params={'latitude': 0, 'longitude': 0}))
-            marine_task = asyncio.create_task(client.get(MARINE_API_URL, params={'latitude': 0, 'longitude': 0}))
-            
-            results = await asyncio.gather(weather_task, marine_task, return_exceptions=True)
-            
-            return {
-                'weather_api': not isinstance(results[0], Exception),
-                'marine_api': not isinstance(results[1], Exception)
-            }
+        client = get_weather_http_client()
+        weather_task = asyncio.create_task(client.get(WEATHER_API_URL, params={'latitude': 0, 'longitude': 0}, timeout=TIMEOUT_CONFIG))
+        marine_task = asyncio.create_task(client.get(MARINE_API_URL, params={'latitude': 0, 'longitude': 0}, timeout=TIMEOUT_CONFIG))
+        
+        results = await asyncio.gather(weather_task, marine_task, return_exceptions=True)
+        
+        return {
+            'weather_api': not isinstance(results[0], Exception),
+            'marine_api': not isinstance(results[1], Exception)
+        }
     except Exception:
         return {'weather_api': False, 'marine_api': False}
@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Any
+from app.transforms.geo import grid_cell
+
+MARINE_CELL_DEGREES = 0.1
+MARINE_NEGATIVE_TTL_SECONDS = 7 * 24 * 3600
+MAX_MARINE_CELLS = 20000
+MARINE_META_FIELDS = {'time', 'interval'}
+
+def skipped_marine_payload() -> Dict[str, Dict]:
+    return {'current': {}}
+
+def is_empty_marine_payload(payload: Optional[Dict[str, Any]]) -> bool:
+    if not isinstance(payload, dict):
+        return False
+    for block in ('current', 'hourly'):
+        values = payload.get(block)
+        if not isinstance(values, dict):
+            continue
+        for name, value in values.items():
+            if name in MARINE_META_FIELDS:
+                continue
+            if isinstance(value, list) and any(v is not None for v in value):
+                return False
+            if not isinstance(value, list) and value is not None:
+                return False
+        return True
+    return False
+
+class MarineAvailabilityMask:
+    def __init__(self, cell_degrees: float = MARINE_CELL_DEGREES, ttl: float = MARINE_NEGATIVE_TTL_SECONDS, max_cells: int = MAX_MARINE_CELLS):
+        self.cell_degrees = cell_degrees
+        self.ttl = ttl
+        self.max_cells = max_cells
+        self.unavailable: "OrderedDict[Tuple[int, int], float]" = OrderedDict()
+        self.stats = {'checks': 0, 'skipped': 0, 'marked_empty': 0, 'marked_client_error': 0, 'expired': 0}
+
+    def should_skip(self, lat: float, lon: float) -> bool:
+        self.stats['checks'] += 1
+        if self.is_unavailable(lat, lon):
+            self.stats['skipped'] += 1
+            return True
+        return False
+
+    def is_unavailable(self, lat: float, lon: float) -> bool:
+        cell = grid_cell(lat, lon, self.cell_degrees)
+        marked_at = self.unavailable.get(cell)
+        if marked_at is None:
+            return False
+        if time.time() - marked_at > self.ttl:
+            del self.unavailable[cell]
+            self.stats['expired'] += 1
+            return False
+        return True
+
+    def record_response(self, lat: float, lon: float, status_code: Optional[int], payload: Optional[Dict[str, Any]]):
+        if status_code is not None and 400 <= status_code < 500 and status_code != 429:
+            self._mark(lat, lon)
+            self.stats['marked_client_error'] += 1
+        elif is_empty_marine_payload(payload):
+            self._mark(lat, lon)
+            self.stats['marked_empty'] += 1
+
+    def _mark(self, lat: float, lon: float):
+        cell = grid_cell(lat, lon, self.cell_degrees)
+        self.unavailable[cell] = time.time()
+        self.unavailable.move_to_end(cell)
+        while len(self.unavailable) > self.max_cells:
+            self.unavailable.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'unavailable_cells': len(self.unavailable),
+            'skip_rate': round(self.stats['skipped'] / self.stats['checks'], 3) if self.stats['checks'] else 0.0,
+            'cell_degrees': self.cell_degrees,
+            'ttl_seconds': self.ttl
+        }
+
+marine_mask = MarineAvailabilityMask()
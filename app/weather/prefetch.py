@@ -0,0 +1,135 @@
+import asyncio
+import datetime
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.device_tracker import rate_limiter
+from app.transforms.geo import calculate_distance_km, initial_bearing_deg, destination_point
+
+PREFETCH_ENABLED = os.getenv("HOARDER_WEATHER_PREFETCH", "1") == "1"
+PREFETCH_HORIZON_SECONDS = 300
+PREFETCH_STEP_FACTOR = 1.5
+MAX_PREFETCH_POINTS = 5
+MIN_PREFETCH_SPEED_KMH = 10
+MAX_PREFETCH_SPEED_KMH = 250
+MAX_TRAJECTORY_AGE_SECONDS = 300
+PREFETCH_INTERVAL_SECONDS = 30
+PREFETCH_QUOTA_HEADROOM = 3
+MAX_CONCURRENT_PREFETCHES = 2
+MAX_PENDING_PREFETCHES = 500
+MAX_TRACKED_DEVICES = 10000
+
+class TrajectoryPrefetcher:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_PREFETCHES, max_pending: int = MAX_PENDING_PREFETCHES):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.pending: Dict[str, List[Tuple[float, float]]] = {}
+        self.runners: Dict[str, asyncio.Task] = {}
+        self.last_planned: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {
+            'observed': 0, 'stale_trajectory': 0, 'stationary': 0, 'implausible_speed': 0,
+            'throttled': 0, 'dropped': 0, 'planned': 0, 'points_planned': 0, 'already_cached': 0,
+            'prefetched': 0, 'no_spare_quota': 0, 'daily_quota_exhausted': 0, 'failures': 0
+        }
+
+    def observe(self, device_id: str, from_lat: float, from_lon: float, from_ts: float, lat: float, lon: float, now_ts: float) -> bool:
+        if not PREFETCH_ENABLED:
+            return False
+        self.stats['observed'] += 1
+        elapsed = now_ts - from_ts
+        if elapsed <= 0 or elapsed > MAX_TRAJECTORY_AGE_SECONDS:
+            self.stats['stale_trajectory'] += 1
+            return False
+        speed_kmh = calculate_distance_km(from_lat, from_lon, lat, lon) / elapsed * 3600
+        if speed_kmh < MIN_PREFETCH_SPEED_KMH:
+            self.stats['stationary'] += 1
+            return False
+        if speed_kmh > MAX_PREFETCH_SPEED_KMH:
+            self.stats['implausible_speed'] += 1
+            return False
+        last = self.last_planned.get(device_id)
+        if last is not None and now_ts - last < PREFETCH_INTERVAL_SECONDS:
+            self.stats['throttled'] += 1
+            return False
+        if device_id not in self.pending and len(self.pending) >= self.max_pending:
+            self.stats['dropped'] += 1
+            return False
+
+        self.last_planned[device_id] = now_ts
+        self.last_planned.move_to_end(device_id)
+        while len(self.last_planned) > MAX_TRACKED_DEVICES:
+            self.last_planned.popitem(last=False)
+        points = self.plan(lat, lon, initial_bearing_deg(from_lat, from_lon, lat, lon), speed_kmh)
+        if not points:
+            return False
+        self.pending[device_id] = points
+        self.stats['planned'] += 1
+        self.stats['points_planned'] += len(points)
+        if device_id not in self.runners:
+            self.runners[device_id] = asyncio.create_task(self._run_device(device_id))
+        return True
+
+    def plan(self, lat: float, lon: float, bearing: float, speed_kmh: float) -> List[Tuple[float, float]]:
+        from app.services.weather.cache_manager import DISTANCE_THRESHOLD_KM
+
+        step_km = PREFETCH_STEP_FACTOR * DISTANCE_THRESHOLD_KM
+        reach_km = speed_kmh * PREFETCH_HORIZON_SECONDS / 3600
+        points, distance = [], step_km
+        while distance <= reach_km and len(points) < MAX_PREFETCH_POINTS:
+            points.append(destination_point(lat, lon, bearing, distance))
+            distance += step_km
+        return points
+
+    async def _run_device(self, device_id: str):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            while device_id in self.pending:
+                async with self.semaphore:
+                    points = self.pending.pop(device_id, None)
+                    if points:
+                        await self._prefetch(device_id, points)
+        finally:
+            self.runners.pop(device_id, None)
+
+    async def _prefetch(self, device_id: str, points: List[Tuple[float, float]]):
+        from app.services.weather.cache_manager import is_weather_cached
+        from app.services.weather.coordinator import get_weather_data
+        from app.services.weather.quota import weather_quota
+
+        for lat, lon in points:
+            if is_weather_cached(lat, lon):
+                self.stats['already_cached'] += 1
+                continue
+            if weather_quota.exhausted():
+                self.stats['daily_quota_exhausted'] += 1
+                return
+            allowed, _, _ = await rate_limiter.weather_rate_limiter.check_global_rate_limit(
+                limit=max(0, rate_limiter.MAX_WEATHER_FETCHES_PER_MINUTE - PREFETCH_QUOTA_HEADROOM),
+                burst_limit=max(0, rate_limiter.BURST_WEATHER_FETCHES_LIMIT - PREFETCH_QUOTA_HEADROOM)
+            )
+            if not allowed:
+                self.stats['no_spare_quota'] += 1
+                return
+            try:
+                if await get_weather_data(lat, lon):
+                    self.stats['prefetched'] += 1
+                else:
+                    self.stats['failures'] += 1
+            except Exception as e:
+                self.stats['failures'] += 1
+                print(f"[{datetime.datetime.now(datetime.timezone.utc)}] ERROR: Weather prefetch failed for {device_id}: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'enabled': PREFETCH_ENABLED,
+            'pending': len(self.pending),
+            'running': len(self.runners),
+            'tracked_devices': len(self.last_planned),
+            'horizon_seconds': PREFETCH_HORIZON_SECONDS,
+            'quota_headroom': PREFETCH_QUOTA_HEADROOM
+        }
+
+weather_prefetcher = TrajectoryPrefetcher()
@@ -1,56 +1,128 @@
 import time
 import asyncio
+from collections import deque
 from enum import Enum
+from typing import Optional
 
 class BreakerState(Enum):
     CLOSED = "closed"
     OPEN = "open"
     HALF_OPEN = "half_open"
 
-class SimpleCircuitBreaker:
-    def __init__(self, name, failure_threshold=3, timeout=30):
+class SlidingWindowBreaker:
+    def __init__(self, name, window_seconds=60, min_calls=8, failure_rate_threshold=0.5,
+                 p95_threshold_ms=3000, open_seconds=30, half_open_probes=2):
         self.name = name
-        self.failure_threshold = failure_threshold
-        self.timeout = timeout
-        self.failure_count = 0
-        self.last_failure_time = 0
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.p95_threshold_ms = p95_threshold_ms
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.samples = deque()
         self.state = BreakerState.CLOSED
-    
-    async def call(self, func, *args, **kwargs):
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self.last_trip_reason = None
+        self.stats = {'calls': 0, 'rejected': 0, 'trips': 0, 'cancelled': 0}
+
+    def allow(self) -> bool:
         if self.state == BreakerState.OPEN:
-            if time.time() - self.last_failure_time > self.timeout:
-                self.state = BreakerState.HALF_OPEN
-            else:
-                raise Exception(f"{self.name} circuit breaker is OPEN")
-        
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self.state = BreakerState.HALF_OPEN
+            self.probes_in_flight = 0
+            self.probe_successes = 0
+        if self.state == BreakerState.HALF_OPEN:
+            return self.probes_in_flight < self.half_open_probes
+        return True
+
+    async def call(self, func, *args, **kwargs):
+        if not self.allow():
+            self.stats['rejected'] += 1
+            raise Exception(f"{self.name} circuit breaker is {self.state.value.upper()}")
+
+        probing = self.state == BreakerState.HALF_OPEN
+        if probing:
+            self.probes_in_flight += 1
+        self.stats['calls'] += 1
+        start = time.monotonic()
         try:
             result = await func(*args, **kwargs)
-            self._on_success()
+            self._record(True, (time.monotonic() - start) * 1000, probing)
             return result
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
         except Exception as e:
-            self._on_failure()
+            self._record(False, (time.monotonic() - start) * 1000, probing)
             raise e
-    
-    def _on_success(self):
-        self.failure_count = 0
-        if self.state == BreakerState.HALF_OPEN:
-            self.state = BreakerState.CLOSED
-    
-    def _on_failure(self):
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        if self.failure_count >= self.failure_threshold:
-            self.state = BreakerState.OPEN
-    
+        finally:
+            if probing:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _record(self, success: bool, latency_ms: float, probing: bool):
+        now = time.monotonic()
+        if self.state == BreakerState.HALF_OPEN and probing:
+            if not success:
+                self._trip("probe_failed")
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.half_open_probes:
+                self.state = BreakerState.CLOSED
+                self.samples.clear()
+            return
+
+        self.samples.append((now, success, latency_ms))
+        self._prune(now)
+        if self.state != BreakerState.CLOSED or len(self.samples) < self.min_calls:
+            return
+        failure_rate = self.failure_rate()
+        p95 = self.latency_percentile(0.95)
+        if failure_rate >= self.failure_rate_threshold:
+            self._trip(f"failure_rate_{failure_rate:.2f}")
+        elif p95 is not None and p95 >= self.p95_threshold_ms:
+            self._trip(f"p95_{p95:.0f}ms")
+
+    def _trip(self, reason: str):
+        self.state = BreakerState.OPEN
+        self.opened_at = time.monotonic()
+        self.last_trip_reason = reason
+        self.stats['trips'] += 1
+
+    def _prune(self, now: float):
+        while self.samples and now - self.samples[0][0] > self.window_seconds:
+            self.samples.popleft()
+
+    def failure_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, success, _ in self.samples if not success) / len(self.samples)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        self._prune(time.monotonic())
+        latencies = sorted(latency for _, success, latency in self.samples if success)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
     def get_status(self):
+        self._prune(time.monotonic())
+        p50, p95 = self.latency_percentile(0.5), self.latency_percentile(0.95)
         return {
             'name': self.name,
             'state': self.state.value,
-            'failures': self.failure_count
+            'window_calls': len(self.samples),
+            'failure_rate': round(self.failure_rate(), 3),
+            'p50_ms': round(p50, 1) if p50 is not None else None,
+            'p95_ms': round(p95, 1) if p95 is not None else None,
+            'last_trip_reason': self.last_trip_reason,
+            **self.stats
         }
 
-weather_breaker = SimpleCircuitBreaker("OpenMeteo", failure_threshold=3, timeout=30)
-wttr_breaker = SimpleCircuitBreaker("WTTR", failure_threshold=2, timeout=20)
+weather_breaker = SlidingWindowBreaker("OpenMeteo", failure_rate_threshold=0.5, p95_threshold_ms=3000, open_seconds=30)
+wttr_breaker = SlidingWindowBreaker("WTTR", failure_rate_threshold=0.5, p95_threshold_ms=2500, open_seconds=20)
 
 async def get_breaker_status():
     return {
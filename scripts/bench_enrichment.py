@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import asyncio
+import argparse
+import math
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from weather_standin import StandinConfig, create_standin_app, standin_env
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def _make_fleet(count, center_lat, center_lon, spread_km, rng):
+    fleet = []
+    for i in range(count):
+        distance = spread_km * math.sqrt(rng.random())
+        bearing = rng.uniform(0, 2 * math.pi)
+        lat = center_lat + distance * math.cos(bearing) / 111.32
+        lon = center_lon + distance * math.sin(bearing) / (111.32 * math.cos(math.radians(center_lat)))
+        fleet.append({'device_id': f"bench-{i:05d}", 'lat': lat, 'lon': lon})
+    return fleet
+
+async def main():
+    parser = argparse.ArgumentParser(description="Drive simulated devices through weather enrichment against a local provider stand-in")
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--round-interval", type=float, default=1.0, help="Seconds between rounds")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--spread-km", type=float, default=20.0, help="Radius of the fleet around the centre")
+    parser.add_argument("--move-prob", type=float, default=0.1, help="Chance per round that a device moves ~2 km")
+    parser.add_argument("--center", default="59.91,10.75")
+    parser.add_argument("--cooldown", type=float, default=None, help="Override the per-device weather cooldown (seconds)")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Override the global fetches-per-minute limit")
+    parser.add_argument("--hourly-forecast", action="store_true", help="Enable the hourly forecast cache")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-rate-limit", type=int, default=0)
+    parser.add_argument("--inland-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ.update(standin_env("127.0.0.1", port))
+    if args.hourly_forecast:
+        os.environ["HOARDER_WEATHER_HOURLY_FORECAST"] = "1"
+
+    import uvicorn
+    from app.weather import enrich_with_weather_data
+    from app.services.weather import cache_manager
+    from app.services.weather.quota import weather_quota
+    from app.weather.openmeteo.forecast_cache import hourly_forecast_cache
+    from app.weather.openmeteo.marine_mask import marine_mask
+    from app.weather.http_pool import close_weather_http_client
+    from app.device_tracker import tracker, rate_limiter
+
+    scratch = tempfile.mkdtemp(prefix="hoarder_bench_")
+    cache_manager.CACHE_DIR = scratch
+    cache_manager.INDEX_FILE = os.path.join(scratch, "index.json")
+    weather_quota.snapshot_file = os.path.join(scratch, "quota.json")
+    if args.cooldown is not None:
+        tracker.WEATHER_FETCH_COOLDOWN_SECONDS = args.cooldown
+    if args.rate_limit is not None:
+        rate_limiter.MAX_WEATHER_FETCHES_PER_MINUTE = args.rate_limit
+        rate_limiter.BURST_WEATHER_FETCHES_LIMIT = max(rate_limiter.BURST_WEATHER_FETCHES_LIMIT, args.rate_limit)
+
+    standin = create_standin_app(StandinConfig(
+        args.latency_ms, args.jitter_ms, args.error_rate, args.upstream_rate_limit, args.inland_ratio, args.seed
+    ))
+    server = uvicorn.Server(uvicorn.Config(standin, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    rng = random.Random(args.seed)
+    center_lat, center_lon = (float(v) for v in args.center.split(','))
+    fleet = _make_fleet(args.devices, center_lat, center_lon, args.spread_km, rng)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, enriched = [], 0
+
+    async def enrich(device):
+        nonlocal enriched
+        async with semaphore:
+            start = time.perf_counter()
+            result = await enrich_with_weather_data(dict(device))
+            latencies.append((time.perf_counter() - start) * 1000)
+            if result.get('weather_temp') is not None:
+                enriched += 1
+
+    real_stdout = sys.stdout
+    started = time.perf_counter()
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        for round_index in range(args.rounds):
+            for device in fleet:
+                if round_index and rng.random() < args.move_prob:
+                    device['lat'] += 2.0 / 111.32
+            await asyncio.gather(*(enrich(device) for device in fleet))
+            if round_index < args.rounds - 1:
+                await asyncio.sleep(args.round_interval)
+        elapsed = time.perf_counter() - started
+        leftovers = [task for task in asyncio.all_tasks() if task not in (asyncio.current_task(), server_task)]
+        if leftovers:
+            await asyncio.wait(leftovers, timeout=5)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    upstream = standin.state.stats
+    index_stats = cache_manager.get_weather_cache_stats()
+    forecast_stats = hourly_forecast_cache.get_stats()
+    upstream_calls = upstream['forecast'] + upstream['marine'] + upstream['wttr']
+    lookups = len(latencies)
+
+    print(f"Devices: {args.devices}  rounds: {args.rounds}  enrichment calls: {lookups}  wall time: {elapsed:.1f}s")
+    print(f"Enrichment latency: p50={_percentile(latencies, 0.5):.1f}ms  p99={_percentile(latencies, 0.99):.1f}ms  max={max(latencies):.1f}ms")
+    print(f"Payloads with weather: {enriched}/{lookups}")
+    print(f"Upstream calls: forecast={upstream['forecast']} marine={upstream['marine']} wttr={upstream['wttr']} "
+          f"(429={upstream['rate_limited']} errors={upstream['errors']})")
+    print(f"API calls per device: {upstream_calls / args.devices:.2f}  quota used: {weather_quota.current()}")
+    print(f"Weather cache hit ratio: {index_stats['hit_ratio']:.3f} ({index_stats['hits']} hits / {index_stats['misses']} misses)")
+    if args.hourly_forecast:
+        print(f"Forecast cache hit ratio: {forecast_stats['hit_ratio']:.3f} ({forecast_stats['cells']} cells)")
+    print(f"Marine skip rate: {marine_mask.get_stats()['skip_rate']:.3f}")
+
+    await close_weather_http_client()
+    server.should_exit = True
+    await server_task
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import asyncio
+import argparse
+import statistics
+import sys
+import time
+import os
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.weather import http_pool
+
+STUB_BODY = b'{"current":{"temperature_2m":12.3,"relative_humidity_2m":80,"weather_code":3}}'
+
+async def handle_stub_connection(reader, writer, connect_delay, response_delay):
+    # Accept cost stands in for the TCP + TLS handshake a real provider would need
+    await asyncio.sleep(connect_delay)
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            await asyncio.sleep(response_delay)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Connection: keep-alive\r\nContent-Length: " + str(len(STUB_BODY)).encode() + b"\r\n\r\n" + STUB_BODY
+            )
+            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        pass
+    finally:
+        writer.close()
+
+async def run_per_call_clients(url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                (await client.get(url)).raise_for_status()
+            return (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+async def run_shared_client(url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    client = http_pool.get_weather_http_client()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            (await client.get(url)).raise_for_status()
+            return (time.perf_counter() - start) * 1000
+
+    try:
+        return await asyncio.gather(*(one() for _ in range(requests)))
+    finally:
+        await http_pool.close_weather_http_client()
+
+def report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<20} n={len(ordered):<5} p50={statistics.median(ordered):7.2f}ms  p95={p95:7.2f}ms  max={ordered[-1]:7.2f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare per-call httpx clients with the shared weather client pool")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--connect-delay-ms", type=float, default=30.0, help="Simulated connection setup cost")
+    parser.add_argument("--response-delay-ms", type=float, default=5.0, help="Simulated upstream processing time")
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(
+        lambda r, w: handle_stub_connection(r, w, args.connect_delay_ms / 1000, args.response_delay_ms / 1000),
+        "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v1/forecast"
+    print(f"Stub server on {url} (connect {args.connect_delay_ms}ms, response {args.response_delay_ms}ms)")
+
+    async with server:
+        report("per-call client", await run_per_call_clients(url, args.requests, args.concurrency))
+        report("shared pool", await run_shared_client(url, args.requests, args.concurrency))
+        stats = http_pool.get_weather_http_pool_stats()
+        print(f"Shared pool opened {stats['connections_opened']} connections for {stats['requests']} requests")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import asyncio
+import argparse
+import math
+import random
+import time
+import uvicorn
+from collections import deque
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+WEATHER_PARAMS = [
+    'temperature_2m', 'relative_humidity_2m', 'apparent_temperature',
+    'precipitation', 'weather_code', 'pressure_msl', 'cloud_cover',
+    'wind_speed_10m', 'wind_direction_10m', 'wind_gusts_10m'
+]
+MARINE_PARAMS = [
+    'wave_height', 'wave_direction', 'wave_period',
+    'swell_wave_height', 'swell_wave_direction', 'swell_wave_period'
+]
+
+class StandinConfig:
+    def __init__(self, latency_ms=80.0, jitter_ms=40.0, error_rate=0.0, rate_limit_per_minute=0, inland_ratio=0.5, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.inland_ratio = inland_ratio
+        self.random = random.Random(seed)
+
+def _weather_values(lat: float, lon: float, timestamp: float) -> dict:
+    hour = timestamp / 3600
+    base = 15 - abs(lat) * 0.3 + 8 * math.sin(2 * math.pi * (hour % 24 - 9) / 24)
+    return {
+        'temperature_2m': round(base, 1),
+        'relative_humidity_2m': int(60 + 30 * math.sin(hour / 7 + lon)),
+        'apparent_temperature': round(base - 1.5, 1),
+        'precipitation': round(max(0.0, math.sin(hour / 5 + lat)) * 1.2, 1),
+        'weather_code': [0, 1, 2, 3, 61, 80][int(abs(lat * 10 + lon * 10 + hour / 3)) % 6],
+        'pressure_msl': round(1013 + 10 * math.sin(hour / 30 + lat), 1),
+        'cloud_cover': int(50 + 50 * math.sin(hour / 4 + lon)),
+        'wind_speed_10m': round(4 + 3 * abs(math.sin(hour / 6 + lat)), 1),
+        'wind_direction_10m': int((hour * 15 + lon * 10) % 360),
+        'wind_gusts_10m': round(7 + 4 * abs(math.sin(hour / 6 + lat)), 1)
+    }
+
+def _marine_values(lat: float, lon: float, timestamp: float) -> dict:
+    hour = timestamp / 3600
+    return {
+        'wave_height': round(1 + abs(math.sin(hour / 8 + lat)), 2),
+        'wave_direction': int((hour * 10 + lat * 10) % 360),
+        'wave_period': round(6 + 2 * math.sin(hour / 9), 1),
+        'swell_wave_height': round(0.6 + abs(math.sin(hour / 11 + lon)) * 0.5, 2),
+        'swell_wave_direction': int((hour * 7 + lon * 10) % 360),
+        'swell_wave_period': round(9 + 2 * math.sin(hour / 13), 1)
+    }
+
+def _parse_coordinates(request: Request):
+    lats = [float(v) for v in request.query_params.get('latitude', '').split(',') if v]
+    lons = [float(v) for v in request.query_params.get('longitude', '').split(',') if v]
+    return list(zip(lats, lons))
+
+def _requested(request: Request, block: str, known: list) -> list:
+    values = request.query_params.getlist(block)
+    names = [name for value in values for name in value.split(',') if name]
+    return [name for name in names if name in known]
+
+def create_standin_app(config: StandinConfig) -> FastAPI:
+    app = FastAPI(title="Weather provider stand-in")
+    app.state.config = config
+    app.state.stats = {'forecast': 0, 'marine': 0, 'wttr': 0, 'locations': 0, 'rate_limited': 0, 'errors': 0}
+    recent_requests = deque()
+
+    async def simulate(kind: str, locations: int = 1):
+        app.state.stats[kind] += 1
+        app.state.stats['locations'] += locations
+        now = time.monotonic()
+        if config.rate_limit_per_minute:
+            while recent_requests and now - recent_requests[0] > 60:
+                recent_requests.popleft()
+            if len(recent_requests) >= config.rate_limit_per_minute:
+                app.state.stats['rate_limited'] += 1
+                return JSONResponse(status_code=429, content={'error': True, 'reason': 'Too many requests'})
+            recent_requests.append(now)
+        delay = max(0.0, config.latency_ms + config.random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if config.random.random() < config.error_rate:
+            app.state.stats['errors'] += 1
+            return JSONResponse(status_code=503, content={'error': True, 'reason': 'Simulated upstream failure'})
+        return None
+
+    def is_inland(lat: float, lon: float) -> bool:
+        cell = (math.floor(lat * 10) * 73856093) ^ (math.floor(lon * 10) * 19349663)
+        return (cell % 1000) / 1000 < config.inland_ratio
+
+    def build(lat, lon, request, known, values_fn, inland=False):
+        now = time.time()
+        result = {'latitude': lat, 'longitude': lon, 'utc_offset_seconds': 0, 'timezone': 'GMT'}
+        current = _requested(request, 'current', known)
+        if current:
+            values = values_fn(lat, lon, now)
+            result['current'] = {'time': time.strftime('%Y-%m-%dT%H:%M', time.gmtime(now - now % 900)), 'interval': 900}
+            result['current'].update({name: None if inland else values[name] for name in current})
+        hourly = _requested(request, 'hourly', known)
+        if hourly:
+            past = int(request.query_params.get('past_hours', 0))
+            hours = int(request.query_params.get('forecast_hours', 24))
+            start = int(now - now % 3600) - past * 3600
+            times = [start + i * 3600 for i in range(past + hours)]
+            series = [values_fn(lat, lon, t) for t in times]
+            result['hourly'] = {'time': times}
+            result['hourly'].update({name: [None if inland else row[name] for row in series] for name in hourly})
+        return result
+
+    @app.get("/v1/forecast")
+    async def forecast(request: Request):
+        locations = _parse_coordinates(request)
+        if not locations:
+            return JSONResponse(status_code=400, content={'error': True, 'reason': 'latitude and longitude required'})
+        if (failure := await simulate('forecast', len(locations))) is not None:
+            return failure
+        items = [build(lat, lon, request, WEATHER_PARAMS, _weather_values) for lat, lon in locations]
+        return items if len(items) > 1 else items[0]
+
+    @app.get("/v1/marine")
+    async def marine(request: Request):
+        locations = _parse_coordinates(request)
+        if not locations:
+            return JSONResponse(status_code=400, content={'error': True, 'reason': 'latitude and longitude required'})
+        if (failure := await simulate('marine', len(locations))) is not None:
+            return failure
+        items = [build(lat, lon, request, MARINE_PARAMS, _marine_values, is_inland(lat, lon)) for lat, lon in locations]
+        return items if len(items) > 1 else items[0]
+
+    @app.get("/_stats")
+    async def stats():
+        return app.state.stats
+
+    @app.get("/{coordinates}")
+    async def wttr(coordinates: str):
+        try:
+            lat, lon = (float(v) for v in coordinates.split(','))
+        except ValueError:
+            return JSONResponse(status_code=404, content={'error': 'unknown location'})
+        if (failure := await simulate('wttr')) is not None:
+            return failure
+        values = _weather_values(lat, lon, time.time())
+        return {'current_condition': [{
+            'temp_C': str(round(values['temperature_2m'])),
+            'humidity': str(values['relative_humidity_2m']),
+            'FeelsLikeC': str(round(values['apparent_temperature'])),
+            'precipMM': str(values['precipitation']),
+            'pressure': str(round(values['pressure_msl'])),
+            'cloudcover': str(values['cloud_cover']),
+            'windspeedKmph': str(round(values['wind_speed_10m'] * 3.6)),
+            'winddirDegree': str(values['wind_direction_10m']),
+            'observation_time': time.strftime('%I:%M %p', time.gmtime())
+        }]}
+
+    return app
+
+def standin_env(host: str, port: int) -> dict:
+    base = f"http://{host}:{port}"
+    return {
+        'HOARDER_OPENMETEO_URL': f"{base}/v1/forecast",
+        'HOARDER_OPENMETEO_MARINE_URL': f"{base}/v1/marine",
+        'HOARDER_WTTR_URL': base
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Open-Meteo forecast/marine and wttr APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=40.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per minute before answering 429 (0 = unlimited)")
+    parser.add_argument("--inland-ratio", type=float, default=0.5, help="Fraction of 0.1 degree cells with no marine data")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StandinConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit, args.inland_ratio, args.seed)
+    for name, value in standin_env(args.host, args.port).items():
+        print(f"export {name}={value}")
+    uvicorn.run(create_standin_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import msgpack
+from app.realtime import compact
+from app.realtime.compact import (
+    ENCODING_JSON, ENCODING_MSGPACK, compact_path, encode_compact, encoded_room, normalize_encoding
+)
+
+def _decode(body: bytes):
+    return msgpack.unpackb(body, raw=False)
+
+def test_event_fields_are_shortened():
+    body = encode_compact("timezone_info", {'device_id': 'dev1', 'timezone': 'Europe/Berlin', 'utc_offset_seconds': 3600})
+    assert _decode(body) == {'d': 'dev1', 'z': 'Europe/Berlin', 'o': 3600}
+
+def test_unknown_events_pass_through():
+    assert _decode(encode_compact("custom", {'device_id': 'dev1'})) == {'device_id': 'dev1'}
+
+def test_device_update_document_keys_are_shortened_recursively():
+    body = encode_compact("device_update", {
+        'device_id': 'dev1', 'seq': 3,
+        'data': {'location': {'coordinates': {'latitude': 1.5}}, 'custom': ['location', 'power']}
+    })
+    assert _decode(body) == {'d': 'dev1', 's': 3, 'p': {'l': {'co': {'la': 1.5}}, 'custom': ['location', 'power']}}
+
+def test_device_patch_compacts_set_keys_and_unset_paths_only():
+    body = encode_compact("device_patch", {
+        'device_id': 'dev1', 'seq': 4, 'base_seq': 3,
+        'set': {'location.coordinates.latitude': 1.5, 'identity.device_name': 'power'},
+        'unset': ['power.battery.percent', 'custom.field']
+    })
+    assert _decode(body) == {
+        'd': 'dev1', 's': 4, 'b': 3,
+        'u': {'l.co.la': 1.5, 'i.dn': 'power'},
+        'r': ['p.b.pc', 'custom.field']
+    }
+
+def test_compact_path_keeps_unknown_segments():
+    assert compact_path("environment.weather.unknown") == "e.w.unknown"
+
+def test_encoding_helpers():
+    assert normalize_encoding("msgpack") == ENCODING_MSGPACK
+    assert normalize_encoding("xml") == ENCODING_JSON
+    assert encoded_room("device_1", ENCODING_MSGPACK) == "device_1:mp"
+    assert encoded_room("device_1", ENCODING_JSON) == "device_1"
+
+def test_json_size_is_sampled(monkeypatch):
+    monkeypatch.setattr(compact, "_compact_stats", {'encoded': 0, 'bytes': 0, 'sampled': 0, 'sampled_bytes': 0, 'sampled_json_bytes': 0})
+    for _ in range(compact.JSON_SIZE_SAMPLE_EVERY + 1):
+        encode_compact("device_update", {'device_id': 'dev1', 'data': {'location': {'latitude': 1.0}}})
+    stats = compact.get_compact_stats()
+    assert stats['encoded'] == compact.JSON_SIZE_SAMPLE_EVERY + 1
+    assert stats['sampled'] == 2
+    assert 0 < stats['size_ratio'] < 1
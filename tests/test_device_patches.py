@@ -0,0 +1,34 @@
+from app.realtime.device_updates import diff_documents, flatten_document
+
+def test_flatten_nested_document_to_dotted_paths():
+    document = {
+        'identity': {'device_id': 'dev1'},
+        'location': {'coordinates': {'latitude': 1.5, 'longitude': 2.5}, 'speed': None},
+        'tags': ['a', 'b']
+    }
+    assert flatten_document(document) == {
+        'identity.device_id': 'dev1',
+        'location.coordinates.latitude': 1.5,
+        'location.coordinates.longitude': 2.5,
+        'location.speed': None,
+        'tags': ['a', 'b']
+    }
+
+def test_empty_objects_are_kept_as_leaves():
+    assert flatten_document({'environment': {'marine': {}}}) == {'environment.marine': {}}
+
+def test_diff_reports_changed_added_and_removed_paths():
+    previous = flatten_document({'location': {'latitude': 1.0, 'longitude': 2.0}, 'power': {'battery': {'percent': 50}}})
+    current = flatten_document({'location': {'latitude': 1.1, 'longitude': 2.0}, 'network': {'type': 'wifi'}})
+    changed, removed = diff_documents(previous, current)
+    assert changed == {'location.latitude': 1.1, 'network.type': 'wifi'}
+    assert removed == ['power.battery.percent']
+
+def test_diff_of_identical_documents_is_empty():
+    document = flatten_document({'location': {'latitude': 1.0}, 'tags': [1, 2]})
+    assert diff_documents(document, dict(document)) == ({}, [])
+
+def test_value_changing_to_none_is_a_set_not_an_unset():
+    changed, removed = diff_documents({'location.speed': 3.0}, {'location.speed': None})
+    assert changed == {'location.speed': None}
+    assert removed == []
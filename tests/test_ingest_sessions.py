@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from app.api.telemetry import handler
+from app.realtime import ingest
+from app.realtime.ingest import ACK_WINDOW, IngestSessionManager
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+    outcome = {'critical_task_enqueued': True, 'state_task_enqueued': True}
+
+    async def admit_telemetry():
+        return None
+
+    async def enqueue_telemetry(data, client_info, degradation_mode):
+        if data.get('invalid'):
+            raise HTTPException(status_code=400, detail="Invalid reading")
+        calls.append(data)
+        return dict(outcome)
+
+    monkeypatch.setattr(handler, "admit_telemetry", admit_telemetry)
+    monkeypatch.setattr(handler, "enqueue_telemetry", enqueue_telemetry)
+    return SimpleNamespace(calls=calls, outcome=outcome)
+
+def _session_manager():
+    manager = IngestSessionManager()
+    assert manager.open("sid1", "dev1", {'source_ip': '10.0.0.1'})
+    return manager
+
+def _send(manager, *readings):
+    async def scenario():
+        return [await manager.receive("sid1", seq, payload) for seq, payload in readings]
+    return asyncio.run(scenario())
+
+def test_acks_after_a_full_window(upstream):
+    manager = _session_manager()
+    acks = _send(manager, *[(seq, {'value': seq}) for seq in range(ACK_WINDOW)])
+    assert acks[:-1] == [None] * (ACK_WINDOW - 1)
+    assert acks[-1] == {'seq': ACK_WINDOW - 1, 'rejected': []}
+    assert all(data['device_id'] == 'dev1' for data in upstream.calls)
+
+def test_duplicates_are_not_enqueued_twice(upstream):
+    manager = _session_manager()
+    _send(manager, (0, {}), (1, {}), (1, {}), (0, {}))
+    assert len(upstream.calls) == 2
+    assert manager.stats['duplicates'] == 2
+
+def test_gap_asks_for_the_missing_reading(upstream):
+    manager = _session_manager()
+    acks = _send(manager, (0, {}), (3, {}), (4, {}), (1, {}))
+    assert acks[1]['retry_from'] == 1
+    assert acks[1]['seq'] == 0
+    assert acks[1]['reason'] == "Sequence gap"
+    assert acks[2] is None
+    assert manager.stats['awaiting_retry'] == 1
+    assert manager.sessions["sid1"].last_seq == 1
+    assert len(upstream.calls) == 2
+
+def test_full_queue_defers_without_advancing(upstream):
+    manager = _session_manager()
+    upstream.outcome['critical_task_enqueued'] = False
+    ack = _send(manager, (0, {}))[0]
+    assert ack['retry_from'] == 0
+    assert ack['seq'] == -1
+    assert manager.sessions["sid1"].last_seq == -1
+    upstream.outcome['critical_task_enqueued'] = True
+    _send(manager, (0, {}))
+    assert manager.sessions["sid1"].last_seq == 0
+
+def test_missing_state_task_still_acks_stored_reading(upstream):
+    manager = _session_manager()
+    upstream.outcome['state_task_enqueued'] = False
+    _send(manager, (0, {}))
+    assert manager.ack_now("sid1") == {'seq': 0, 'rejected': []}
+    assert manager.stats['state_degraded'] == 1
+
+def test_invalid_readings_are_reported_in_the_next_ack(upstream):
+    manager = _session_manager()
+    _send(manager, (0, {'invalid': True}), (1, {}))
+    assert manager.ack_now("sid1") == {'seq': 1, 'rejected': [{'seq': 0, 'error': "Invalid reading"}]}
+    assert manager.ack_now("sid1")['rejected'] == []
+
+def test_concurrent_readings_are_processed_in_order(upstream, monkeypatch):
+    manager = _session_manager()
+    original = handler.enqueue_telemetry
+
+    async def slow_enqueue(data, client_info, degradation_mode):
+        await asyncio.sleep(0.01 if data['value'] == 0 else 0)
+        return await original(data, client_info, degradation_mode)
+
+    monkeypatch.setattr(handler, "enqueue_telemetry", slow_enqueue)
+
+    async def scenario():
+        await asyncio.gather(manager.receive("sid1", 0, {'value': 0}), manager.receive("sid1", 1, {'value': 1}))
+
+    asyncio.run(scenario())
+    assert [data['value'] for data in upstream.calls] == [0, 1]
+    assert manager.stats['gaps'] == 0
+
+def test_authentication_requires_the_shared_token(monkeypatch):
+    manager = IngestSessionManager()
+    monkeypatch.setattr(ingest, "INGEST_TOKEN", "")
+    assert manager.authenticate({'device_id': 'dev1', 'token': ''}) is None
+    monkeypatch.setattr(ingest, "INGEST_TOKEN", "secret")
+    assert manager.authenticate({'device_id': 'dev1', 'token': 'wrong'}) is None
+    assert manager.authenticate({'device_id': ' dev1 ', 'token': 'secret'}) == 'dev1'
+
+def test_new_session_replaces_the_previous_one_for_a_device():
+    manager = IngestSessionManager(max_sessions=1)
+    assert manager.open("sid1", "dev1", {})
+    assert not manager.open("sid2", "dev2", {})
+    assert manager.open("sid3", "dev1", {})
+    assert list(manager.sessions) == ["sid3"]
+    manager.close("sid1")
+    assert manager.device_sessions == {'dev1': 'sid3'}
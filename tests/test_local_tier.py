@@ -0,0 +1,69 @@
+from app.caching import local_tier
+from app.caching.local_tier import LocalTTLCache
+
+def test_get_returns_value_until_ttl_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(local_tier.time, "monotonic", lambda: now[0])
+    cache = LocalTTLCache()
+    cache.set("a", b"value", 5, ttl=5)
+    assert cache.get("a") == (True, b"value")
+    now[0] += 5
+    assert cache.get("a") == (False, None)
+    assert cache.expirations == 1
+    assert cache.total_bytes == 0
+
+def test_evicts_least_recently_used_entry():
+    evicted = []
+    cache = LocalTTLCache(max_entries=2)
+    cache.on_evict = evicted.append
+    cache.set("a", 1, 1, ttl=60)
+    cache.set("b", 2, 1, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, 1, ttl=60)
+    assert evicted == ["b"]
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
+
+def test_evicts_by_total_bytes():
+    cache = LocalTTLCache(max_bytes=100)
+    cache.set("a", 1, 20, ttl=60)
+    cache.set("b", 2, 20, ttl=60)
+    cache.set("c", 3, 20, ttl=60)
+    cache.set("d", 4, 20, ttl=60)
+    cache.set("e", 5, 25, ttl=60)
+    assert cache.total_bytes <= 100
+    assert cache.get("a") == (False, None)
+    assert cache.evictions == 1
+
+def test_rejects_oversized_items_and_zero_ttl():
+    cache = LocalTTLCache(max_bytes=100)
+    cache.set("big", 1, 26, ttl=60)
+    cache.set("expired", 1, 1, ttl=0)
+    assert cache.get("big") == (False, None)
+    assert cache.get("expired") == (False, None)
+    assert cache.total_bytes == 0
+
+def test_overwrite_replaces_size_accounting():
+    cache = LocalTTLCache()
+    cache.set("a", 1, 10, ttl=60)
+    cache.set("a", 2, 4, ttl=60)
+    assert cache.total_bytes == 4
+    assert cache.get("a") == (True, 2)
+
+def test_stale_generation_write_is_dropped_after_invalidation():
+    cache = LocalTTLCache()
+    generation = cache.generation
+    cache.invalidate(["a"])
+    cache.set("a", "stale", 1, ttl=60, generation=generation)
+    assert cache.get("a") == (False, None)
+    cache.set("a", "fresh", 1, ttl=60, generation=cache.generation)
+    assert cache.get("a") == (True, "fresh")
+
+def test_invalidate_prefix_only_removes_matching_keys():
+    cache = LocalTTLCache()
+    cache.set("latest_data_raw_1", 1, 1, ttl=60)
+    cache.set("latest_data_raw_2", 2, 1, ttl=60)
+    cache.set("device_history_1", 3, 1, ttl=60)
+    cache.invalidate_prefix("latest_data_raw_")
+    assert cache.get_stats()['entries'] == 1
+    assert cache.get("device_history_1") == (True, 3)
@@ -0,0 +1,44 @@
+from app.weather.openmeteo import marine_mask as marine_mask_module
+from app.weather.openmeteo.marine_mask import MarineAvailabilityMask, is_empty_marine_payload
+
+def test_empty_payload_detection():
+    assert is_empty_marine_payload({'current': {'time': '2024-01-01T00:00', 'wave_height': None}})
+    assert is_empty_marine_payload({'hourly': {'time': ['t'], 'wave_height': [None, None]}})
+    assert not is_empty_marine_payload({'current': {'wave_height': 0.4}})
+    assert not is_empty_marine_payload({'hourly': {'wave_height': [None, 0.2]}})
+    assert not is_empty_marine_payload(None)
+    assert not is_empty_marine_payload({})
+
+def test_client_errors_and_empty_payloads_mark_the_cell():
+    mask = MarineAvailabilityMask()
+    mask.record_response(47.0, 8.0, 400, None)
+    mask.record_response(10.0, 10.0, 200, {'current': {'wave_height': None}})
+    assert mask.should_skip(47.01, 8.01)
+    assert mask.should_skip(10.0, 10.0)
+    assert mask.stats['marked_client_error'] == 1
+    assert mask.stats['marked_empty'] == 1
+
+def test_rate_limits_server_errors_and_real_data_do_not_mark():
+    mask = MarineAvailabilityMask()
+    mask.record_response(47.0, 8.0, 429, None)
+    mask.record_response(47.0, 8.0, 503, None)
+    mask.record_response(47.0, 8.0, 200, {'current': {'wave_height': 1.2}})
+    assert not mask.should_skip(47.0, 8.0)
+    assert mask.get_stats()['unavailable_cells'] == 0
+
+def test_marks_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(marine_mask_module.time, "time", lambda: now[0])
+    mask = MarineAvailabilityMask(ttl=60)
+    mask.record_response(47.0, 8.0, 404, None)
+    now[0] += 61
+    assert not mask.should_skip(47.0, 8.0)
+    assert mask.stats['expired'] == 1
+
+def test_oldest_cells_are_dropped_when_full():
+    mask = MarineAvailabilityMask(max_cells=2)
+    for lat in (10.0, 20.0, 30.0):
+        mask.record_response(lat, 0.0, 404, None)
+    assert not mask.is_unavailable(10.0, 0.0)
+    assert mask.is_unavailable(20.0, 0.0)
+    assert mask.is_unavailable(30.0, 0.0)
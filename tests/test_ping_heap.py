@@ -0,0 +1,51 @@
+import asyncio
+from app.realtime.websocket import connection_manager as connection_manager_module
+from app.realtime.websocket.connection_manager import ConnectionManager
+
+def _manager_with(monkeypatch, now, sids):
+    monkeypatch.setattr(connection_manager_module.time, "time", lambda: now[0])
+    manager = ConnectionManager()
+    for sid in sids:
+        manager.add_connection(sid, {'REMOTE_ADDR': '10.0.0.1'})
+    return manager
+
+def test_pops_only_connections_past_timeout(monkeypatch):
+    now = [1000.0]
+    manager = _manager_with(monkeypatch, now, ["a"])
+    now[0] = 1050.0
+    manager.add_connection("b", {'REMOTE_ADDR': '10.0.0.2'})
+    assert manager.pop_expired(120, now=1121.0) == ["a"]
+    assert manager.pop_expired(120, now=1121.0) == []
+    assert manager.pop_expired(120, now=1171.0) == ["b"]
+
+def test_recent_ping_reschedules_instead_of_expiring(monkeypatch):
+    now = [1000.0]
+    manager = _manager_with(monkeypatch, now, ["a"])
+    now[0] = 1100.0
+    manager.update_ping("a")
+    assert manager.pop_expired(120, now=1121.0) == []
+    assert manager.ping_heap == [(1100.0, "a")]
+    assert manager.pop_expired(120, now=1221.0) == ["a"]
+
+def test_removed_connections_are_skipped(monkeypatch):
+    now = [1000.0]
+    manager = _manager_with(monkeypatch, now, ["a", "b"])
+    asyncio.run(manager.remove_connection("a"))
+    assert manager.pop_expired(120, now=1121.0) == ["b"]
+    assert manager.ping_heap == []
+
+def test_heap_is_rebuilt_when_it_outgrows_connections(monkeypatch):
+    now = [1000.0]
+    manager = _manager_with(monkeypatch, now, [f"sid{i}" for i in range(100)])
+    for i in range(100):
+        asyncio.run(manager.remove_connection(f"sid{i}"))
+    manager.add_connection("live", {'REMOTE_ADDR': '10.0.0.3'})
+    assert manager.pop_expired(120, now=1001.0) == []
+    assert manager.ping_heap == [(1000.0, "live")]
+
+def test_small_heaps_are_not_rebuilt(monkeypatch):
+    now = [1000.0]
+    manager = _manager_with(monkeypatch, now, ["a", "b"])
+    asyncio.run(manager.remove_connection("a"))
+    assert manager.pop_expired(120, now=1001.0) == []
+    assert len(manager.ping_heap) == 2
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from app.caching.single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_load():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(flight.do("key", loader) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.stats['loads'] == 1
+    assert flight.stats['coalesced'] == 4
+    assert flight.get_stats()['inflight'] == 0
+
+def test_errors_propagate_to_every_waiter_and_are_not_cached():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+
+        async def succeeding():
+            return "ok"
+
+        return flight, results, await flight.do("key", succeeding)
+
+    flight, results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats['load_errors'] == 1
+    assert retried == "ok"
+
+def test_cancelled_waiter_does_not_cancel_shared_load():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "value"
+
+        first = asyncio.create_task(flight.do("key", loader))
+        second = asyncio.create_task(flight.do("key", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "value"
+
+def test_refresh_skips_keys_already_loading():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+
+        started = flight.refresh("key", loader)
+        duplicate = flight.refresh("key", loader)
+        release.set()
+        await asyncio.sleep(0)
+        return flight, started, duplicate
+
+    flight, started, duplicate = asyncio.run(scenario())
+    assert (started, duplicate) == (True, False)
+    assert flight.stats['background_refreshes'] == 1
+    assert flight.stats['stale_served'] == 2
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from app.weather import simple_breaker
+from app.weather.simple_breaker import BreakerState, SlidingWindowBreaker
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(simple_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+async def _ok():
+    return "ok"
+
+async def _fail():
+    raise RuntimeError("upstream failed")
+
+def _run(breaker, func):
+    try:
+        return asyncio.run(breaker.call(func))
+    except Exception as e:
+        return e
+
+def test_stays_closed_below_min_calls(clock):
+    breaker = SlidingWindowBreaker("test", min_calls=4)
+    for _ in range(3):
+        _run(breaker, _fail)
+    assert breaker.state == BreakerState.CLOSED
+
+def test_trips_on_failure_rate_and_rejects(clock):
+    breaker = SlidingWindowBreaker("test", min_calls=4, failure_rate_threshold=0.5)
+    for func in (_ok, _ok, _fail, _fail):
+        _run(breaker, func)
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.last_trip_reason == "failure_rate_0.50"
+    assert isinstance(_run(breaker, _ok), Exception)
+    assert breaker.stats['rejected'] == 1
+
+def test_trips_on_slow_p95(clock):
+    breaker = SlidingWindowBreaker("test", min_calls=4, p95_threshold_ms=500)
+
+    async def slow():
+        clock[0] += 1.0
+        return "ok"
+
+    for _ in range(4):
+        _run(breaker, slow)
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.last_trip_reason.startswith("p95_")
+
+def test_old_samples_leave_the_window(clock):
+    breaker = SlidingWindowBreaker("test", window_seconds=60, min_calls=4)
+    for _ in range(3):
+        _run(breaker, _fail)
+    clock[0] += 61
+    _run(breaker, _fail)
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.get_status()['window_calls'] == 1
+
+def test_half_open_probes_close_the_breaker(clock):
+    breaker = SlidingWindowBreaker("test", min_calls=1, open_seconds=30, half_open_probes=2)
+    _run(breaker, _fail)
+    assert breaker.state == BreakerState.OPEN
+    clock[0] += 30
+    assert _run(breaker, _ok) == "ok"
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert _run(breaker, _ok) == "ok"
+    assert breaker.state == BreakerState.CLOSED
+
+def test_failed_probe_reopens(clock):
+    breaker = SlidingWindowBreaker("test", min_calls=1, open_seconds=30)
+    _run(breaker, _fail)
+    clock[0] += 30
+    _run(breaker, _fail)
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.last_trip_reason == "probe_failed"
+    assert breaker.stats['trips'] == 2
+
+def test_cancellation_is_not_counted_as_failure(clock):
+    breaker = SlidingWindowBreaker("test", min_calls=1)
+
+    async def scenario():
+        task = asyncio.create_task(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.stats['cancelled'] == 1
+    assert breaker.get_status()['window_calls'] == 0
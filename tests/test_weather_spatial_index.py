@@ -0,0 +1,67 @@
+from app.services.weather.cache_manager import (
+    CACHE_DURATION, INDEX_FORMAT_VERSION, WeatherSpatialIndex, merge_index_snapshots
+)
+
+NOW = 1_000_000.0
+
+def test_finds_nearest_entry_within_threshold():
+    index = WeatherSpatialIndex()
+    index.add("near", 52.5200, 13.4050, NOW, {'weather_temp': 10})
+    index.add("nearer", 52.5201, 13.4051, NOW, {'weather_temp': 11})
+    assert index.find(52.5201, 13.4050, NOW) == {'weather_temp': 11}
+    assert index.stats['hits'] == 1
+
+def test_finds_entries_across_cell_boundaries():
+    index = WeatherSpatialIndex()
+    index.add("edge", 52.5099, 13.4000, NOW, {'weather_temp': 9})
+    assert index.find(52.5101, 13.4000, NOW) == {'weather_temp': 9}
+
+def test_misses_beyond_threshold_and_counts_only_when_asked():
+    index = WeatherSpatialIndex()
+    index.add("far", 52.5200, 13.4050, NOW, {'weather_temp': 10})
+    assert index.find(52.5400, 13.4050, NOW, record_miss=False) is None
+    assert index.stats['misses'] == 0
+    assert index.find(52.5400, 13.4050, NOW) is None
+    assert index.stats['misses'] == 1
+
+def test_expired_entries_are_dropped_on_lookup():
+    index = WeatherSpatialIndex()
+    index.add("old", 52.5200, 13.4050, NOW - CACHE_DURATION - 1, {'weather_temp': 10})
+    assert index.find(52.5200, 13.4050, NOW) is None
+    assert index.stats['expirations'] == 1
+    assert index.get_stats()['entries'] == 0
+    assert index.get_stats()['cells'] == 0
+
+def test_oldest_entry_is_evicted_when_full():
+    index = WeatherSpatialIndex(max_entries=2)
+    index.add("a", 10.0, 10.0, NOW, {})
+    index.add("b", 20.0, 20.0, NOW, {})
+    index.add("c", 30.0, 30.0, NOW, {})
+    assert list(index.entries) == ["b", "c"]
+    assert index.stats['evictions'] == 1
+
+def test_snapshot_round_trip_skips_expired_entries():
+    index = WeatherSpatialIndex()
+    index.add("fresh", 10.0, 10.0, NOW, {'weather_temp': 1})
+    index.add("stale", 20.0, 20.0, NOW - CACHE_DURATION - 1, {'weather_temp': 2})
+    restored = WeatherSpatialIndex()
+    assert restored.restore(index.snapshot(), NOW) == 1
+    assert restored.find(10.0, 10.0, NOW) == {'weather_temp': 1}
+    assert not restored.dirty
+
+def test_merge_keeps_newest_copy_of_each_key():
+    on_disk = {'version': INDEX_FORMAT_VERSION, 'entries': [
+        ["shared", 1.0, 1.0, NOW - 10, {'v': 'disk'}],
+        ["disk_only", 2.0, 2.0, NOW - 5, {'v': 'disk'}]
+    ]}
+    local = {'version': INDEX_FORMAT_VERSION, 'entries': [["shared", 1.0, 1.0, NOW, {'v': 'local'}]]}
+    merged = {entry[0]: entry[4] for entry in merge_index_snapshots(local, on_disk, NOW)['entries']}
+    assert merged == {'shared': {'v': 'local'}, 'disk_only': {'v': 'disk'}}
+
+def test_merge_ignores_unknown_versions_and_caps_entries():
+    on_disk = {'version': INDEX_FORMAT_VERSION + 1, 'entries': [["ignored", 1.0, 1.0, NOW, {}]]}
+    local = {'version': INDEX_FORMAT_VERSION, 'entries': [
+        [f"k{i}", 1.0, 1.0, NOW - i, {}] for i in range(5)
+    ]}
+    merged = merge_index_snapshots(local, on_disk, NOW, max_entries=2)
+    assert [entry[0] for entry in merged['entries']] == ["k1", "k0"]